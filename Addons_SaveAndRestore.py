@@ -0,0 +1,332 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# The registry of the addons in the Mod folder, for the checks at startup and for the backup catalog.
+# For every addon it records the folder, the version in package.xml, the git commit it is on, whether it is
+# disabled in the addon manager, and the modification times these were read at.
+# Only the top level of the Mod folder is listed, with os.scandir: the files inside the addons are never visited.
+# The time of the Mod folder changes when an addon is added, removed or renamed. The time of an addon folder changes
+# when a file like ADDON_DISABLED is added or removed. package.xml and the git data are only read again when their
+# own time changed. So at a normal startup, an update costs a few stats per addon.
+# The registry also remembers the state of the addons the user was last told about ("Known"), so changes since then
+# can be reported. It is one json file, written next to the old one and swapped in.
+# The file is kept in the FreeCAD user folder, outside the Mod folder, so writing it does not change any time
+# the registry looks at.
+# With Watcher_SaveAndRestore, only the addons the watcher reports are read again while FreeCAD runs.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import re
+import json
+import uuid
+
+# An addon that is disabled in the addon manager holds this file
+DISABLED_FILE = "ADDON_DISABLED"
+REGISTRY_FILE = "SaveAndRestore AddonRegistry.json"
+# The files of older versions, in the folder of this addon
+LEGACY_FILES = ["WBList.json", "ResetList.json"]
+REGISTRY_VERSION = 1
+
+# Addons that change the toolbars. When one of them is disabled or removed, the toolbars must be restored
+TOOLBAR_ADDONS = ["FreeCAD-Ribbon"]
+
+# The version in package.xml. Only the first version element is read, which is the one of the package itself
+_VersionRegex = re.compile(rb"<version>\s*([^<\s]+)\s*</version>")
+
+
+def WriteJson(FileName, Data):
+    """Write Data to a new file next to FileName first and swap it in, so a crash never leaves half a file."""
+    TempFile = f"{FileName}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(TempFile, "w") as outfile:
+            json.dump(Data, outfile, separators=(",", ":"))
+        os.replace(TempFile, FileName)
+    except BaseException:
+        if os.path.exists(TempFile):
+            os.remove(TempFile)
+        raise
+    return
+
+
+def ReturnMTime(Path) -> int:
+    """Return the modification time of Path in ns, or 0 if it does not exist."""
+    try:
+        return os.stat(Path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def ReadPackageVersion(AddonPath) -> str:
+    """Return the version in the package.xml of an addon, or "" if there is none."""
+    try:
+        with open(os.path.join(AddonPath, "package.xml"), "rb") as file:
+            Match = _VersionRegex.search(file.read(64 * 1024))
+    except OSError:
+        return ""
+    return Match.group(1).decode("utf-8", "replace") if Match else ""
+
+
+def ReadGitHead(AddonPath) -> str:
+    """Return the commit a git clone is on, or "" if the addon is no git clone. Runs no git command."""
+    GitDir = os.path.join(AddonPath, ".git")
+    try:
+        with open(os.path.join(GitDir, "HEAD"), "r") as file:
+            Head = file.read().strip()
+        if not Head.startswith("ref:"):
+            # A detached HEAD holds the commit itself
+            return Head
+        Ref = Head[4:].strip()
+        RefFile = os.path.join(GitDir, *Ref.split("/"))
+        if os.path.exists(RefFile):
+            with open(RefFile, "r") as file:
+                return file.read().strip()
+        # The ref can be packed
+        with open(os.path.join(GitDir, "packed-refs"), "r") as file:
+            for Line in file:
+                Parts = Line.split()
+                if len(Parts) == 2 and Parts[1] == Ref:
+                    return Parts[0]
+    except OSError:
+        pass
+    return ""
+
+
+def ListAddons(ModDir) -> list:
+    """Return the folder names of the addons in ModDir. Only the top level is listed."""
+    # Addons can be links to a folder elsewhere, for example during development
+    with os.scandir(ModDir) as Iterator:
+        return [Entry.name for Entry in Iterator if Entry.is_dir()]
+
+
+def ScanAddon(Path, Previous: dict = None) -> dict:
+    """
+    Return the entry of the addon in the folder Path, or None if the folder does not exist.
+    Values that did not change since the entry Previous are taken from it. See ScanModDir.
+    """
+    MTime = ReturnMTime(Path)
+    if MTime == 0:
+        return None
+    Entry = dict(Previous or {})
+    Entry["Path"] = Path
+    if Entry.get("MTime") != MTime:
+        Entry["MTime"] = MTime
+        Entry["Disabled"] = os.path.exists(os.path.join(Path, DISABLED_FILE))
+    XmlMTime = ReturnMTime(os.path.join(Path, "package.xml"))
+    if Entry.get("XmlMTime") != XmlMTime:
+        Entry["XmlMTime"] = XmlMTime
+        Entry["Version"] = ReadPackageVersion(Path)
+    # Fetching, pulling and committing write files in the .git folder, which changes its time
+    GitMTime = ReturnMTime(os.path.join(Path, ".git"))
+    if Entry.get("GitMTime") != GitMTime:
+        Entry["GitMTime"] = GitMTime
+        Entry["Head"] = ReadGitHead(Path) if GitMTime != 0 else ""
+    return Entry
+
+
+def ScanModDir(ModDir, Previous: dict = None, PreviousMTime: int = None) -> dict:
+    """
+    Return the addons in ModDir as {folder name: entry}, sorted by name. An entry is a dict with
+    "Path", "MTime", "Disabled", "Version", "XmlMTime", "Head" and "GitMTime".
+
+    Args:
+        ModDir: The Mod folder.
+        Previous (dict, optional): The addons of an earlier scan. Unchanged values are taken from it.
+        PreviousMTime (int, optional): The time of ModDir at the earlier scan. If it did not change,
+            ModDir is not listed again.
+    """
+    ModDir = os.path.normpath(os.fspath(ModDir))
+    if Previous is None:
+        Previous = {}
+
+    if PreviousMTime is not None and ReturnMTime(ModDir) == PreviousMTime:
+        Names = list(Previous)
+    else:
+        Names = ListAddons(ModDir)
+
+    Addons = {}
+    for Name in sorted(Names):
+        Entry = ScanAddon(os.path.join(ModDir, Name), Previous.get(Name))
+        # None if removed since the Mod folder was listed
+        if Entry is not None:
+            Addons[Name] = Entry
+    return Addons
+
+
+class AddonRegistry:
+    """The registry of the addons in a Mod folder. See the top of this module."""
+
+    def __init__(self, FileName):
+        self.FileName = os.fspath(FileName)
+        self.ModDir = ""
+        self.MTime = None
+        # The current addons, by folder name. See ScanModDir
+        self.Addons = {}
+        # The addons the user was last told about, by folder name, with True if they were enabled
+        self.Known = None
+        self.Changed = False
+        try:
+            with open(self.FileName, "r") as file:
+                Data = json.load(file)
+        except (OSError, ValueError):
+            Data = {}
+        if isinstance(Data, dict) and Data.get("Version") == REGISTRY_VERSION:
+            self.ModDir = Data.get("ModDir", "")
+            self.MTime = Data.get("MTime")
+            self.Addons = Data.get("Addons", {})
+            self.Known = Data.get("Known")
+
+    def Update(self, ModDir, Names=None) -> "AddonRegistry":
+        """
+        Bring the registry up to date with ModDir.
+        With Names, only these addons are read again, for example the ones a watcher reported.
+        The Mod folder is then only listed if its time changed, and only the added and removed addons are read.
+        """
+        ModDir = os.path.normpath(os.fspath(ModDir))
+        if ModDir != self.ModDir:
+            self.ModDir, self.MTime, self.Addons = ModDir, None, {}
+            Names = None
+        MTime = ReturnMTime(ModDir)
+        if Names is None:
+            Addons = ScanModDir(ModDir, self.Addons, self.MTime)
+        else:
+            Names = set(Names)
+            if MTime != self.MTime:
+                Names |= set(ListAddons(ModDir)) ^ set(self.Addons)
+            Addons = dict(self.Addons)
+            for Name in Names:
+                Entry = ScanAddon(os.path.join(ModDir, Name), self.Addons.get(Name))
+                if Entry is None:
+                    Addons.pop(Name, None)
+                else:
+                    Addons[Name] = Entry
+            Addons = dict(sorted(Addons.items()))
+        if Addons != self.Addons or MTime != self.MTime:
+            self.Addons, self.MTime = Addons, MTime
+            self.Changed = True
+        # The first time, the current addons are what the user knows
+        if self.Known is None:
+            self.Acknowledge()
+        return self
+
+    def Get(self, Name: str) -> dict:
+        """Return the entry of an addon by folder name, or None if it is not installed."""
+        return self.Addons.get(Name)
+
+    def IsEnabled(self, Name: str) -> bool:
+        Entry = self.Addons.get(Name)
+        return Entry is not None and Entry["Disabled"] is False
+
+    def ReturnChanges(self) -> dict:
+        """
+        Return the addons whose state changed since the user was last told, as {name: (was enabled, is enabled)}.
+        An addon that is not installed counts as not enabled.
+        """
+        Changes = {}
+        for Name in set(self.Known) | set(self.Addons):
+            Was = self.Known.get(Name, False)
+            Now = self.IsEnabled(Name)
+            if Was != Now:
+                Changes[Name] = (Was, Now)
+        return Changes
+
+    def NeedsToolbarReset(self) -> list:
+        """Return the toolbar addons that were disabled or removed since the user was last told."""
+        return sorted(
+            Name
+            for Name, (Was, Now) in self.ReturnChanges().items()
+            if Was is True
+            and Now is False
+            and any(Addon in Name for Addon in TOOLBAR_ADDONS)
+        )
+
+    def Acknowledge(self, Names=None):
+        """Record the current state of the addons Names, or of all addons, as known to the user."""
+        Known = dict(self.Known or {})
+        if Names is None:
+            Names = set(Known) | set(self.Addons)
+        for Name in Names:
+            if Name in self.Addons:
+                Known[Name] = self.IsEnabled(Name)
+            else:
+                Known.pop(Name, None)
+        if Known != self.Known:
+            self.Known = Known
+            self.Changed = True
+        return
+
+    def Save(self):
+        """Write the registry, if it changed."""
+        if self.Changed is False:
+            return
+        WriteJson(
+            self.FileName,
+            {
+                "Version": REGISTRY_VERSION,
+                "ModDir": self.ModDir,
+                "MTime": self.MTime,
+                "Addons": self.Addons,
+                "Known": self.Known,
+            },
+        )
+        self.Changed = False
+        return
+
+
+def ReturnRegistryPath(DataDir) -> str:
+    """Return the registry file in DataDir, the FreeCAD user folder."""
+    return os.path.join(os.fspath(DataDir), REGISTRY_FILE)
+
+
+def OpenRegistry(DataDir, AddonDir=None) -> AddonRegistry:
+    """
+    Return the registry in DataDir, the FreeCAD user folder.
+    The lists of older versions in AddonDir, the folder of this addon, are taken over and removed.
+    Open the registry this way once, in the addon check at startup. To only read it, use AddonRegistry.
+    """
+    if AddonDir is None:
+        AddonDir = os.path.dirname(os.path.abspath(__file__))
+    Registry = AddonRegistry(ReturnRegistryPath(DataDir))
+
+    # WBList.json held the full paths of the addons the user was last told about
+    OldList = os.path.join(AddonDir, "WBList.json")
+    if Registry.Known is None and os.path.exists(OldList):
+        try:
+            with open(OldList, "r") as file:
+                Registry.Known = {
+                    os.path.basename(os.path.normpath(Path)): True
+                    for Path in json.load(file)
+                }
+            Registry.Changed = True
+        except (OSError, ValueError, TypeError):
+            pass
+    if Registry.Changed is True:
+        # Keep what was taken over, before the old files are removed
+        Registry.Save()
+    for Name in LEGACY_FILES:
+        try:
+            os.remove(os.path.join(AddonDir, Name))
+        except OSError:
+            pass
+    return Registry
@@ -0,0 +1,570 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# This module holds the archive logic for the addon backup.
+# It has no dependency on FreeCAD, so it can also be run from the command line as a benchmark:
+#   python Backup_SaveAndRestore.py <directory>
+
+import os
+import glob
+import json
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from zipfile_SaveAndRestore import (
+    ZipFile,
+    BadZipFile,
+    ZIP_STORED,
+    ZIP_DEFLATED,
+    compress_file,
+)
+import Exclude_SaveAndRestore
+import Compression_SaveAndRestore
+
+# Files larger than this are streamed into the archive by the writer instead of being compressed in memory by a worker
+LARGE_FILE_LIMIT = 64 * 1024 * 1024
+# The members that are compressed ahead of the writer may together hold at most this many bytes in memory
+PENDING_BYTES_LIMIT = 256 * 1024 * 1024
+
+# Every addon archive carries a manifest with the state of the Mod folder at the time of the backup.
+# Each file is listed as [size, mtime in ns, CRC, id of the archive that holds the data].
+# Symbolic links are stored as links: their data is the link target and the link type is in the unix mode bits.
+# Files that are hardlinked to a file earlier in the backup are not stored again. They are listed under
+# "Hardlinks" with the name of that file.
+MANIFEST_NAME = ".SaveAndRestore/manifest.json"
+MANIFEST_VERSION = 1
+
+
+class Cancelled(Exception):
+    """Raised inside a running operation when it is cancelled."""
+
+
+class JobProgress:
+    """
+    Thread-safe progress counter for long running operations.
+    The operation reports with SetTotal() and Add(), the GUI reads it with Status() and stops it with Cancel().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.StartTime = time.perf_counter()
+        self.Text = ""
+        self.Files = 0
+        self.Bytes = 0
+        self.TotalFiles = 0
+        self.TotalBytes = 0
+
+    def Start(self):
+        """Restart the clock for MB/s and the time left, when the operation starts after it was queued."""
+        self.StartTime = time.perf_counter()
+        return
+
+    def SetText(self, Text: str):
+        self.Text = Text
+        return
+
+    def SetTotal(self, Files: int, Bytes: int):
+        with self._lock:
+            self.TotalFiles = Files
+            self.TotalBytes = Bytes
+        return
+
+    def Add(self, Files: int = 0, Bytes: int = 0):
+        """Add processed files and bytes. Raises Cancelled when the operation must stop."""
+        self.Check()
+        with self._lock:
+            self.Files += Files
+            self.Bytes += Bytes
+        return
+
+    def Check(self):
+        """Raise Cancelled when the operation must stop."""
+        if self._cancelled.is_set():
+            raise Cancelled()
+        return
+
+    def Cancel(self):
+        self._cancelled.set()
+        return
+
+    def IsCancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def Status(self) -> dict:
+        """Return the files, bytes, MB/s and the estimated seconds left (None if unknown)."""
+        with self._lock:
+            Files, Bytes = self.Files, self.Bytes
+            TotalFiles, TotalBytes = self.TotalFiles, self.TotalBytes
+        Seconds = max(time.perf_counter() - self.StartTime, 1e-9)
+        Rate = Bytes / Seconds
+        ETA = None
+        if TotalBytes > 0 and Rate > 0:
+            ETA = max(TotalBytes - Bytes, 0) / Rate
+        return {
+            "Text": self.Text,
+            "Files": Files,
+            "TotalFiles": TotalFiles,
+            "Bytes": Bytes,
+            "TotalBytes": TotalBytes,
+            "Seconds": Seconds,
+            "MBps": Rate / (1024 * 1024),
+            "ETA": ETA,
+        }
+
+
+def ReturnWorkerCount(Workers: int = 0) -> int:
+    """Return the number of worker threads to use. 0 or less means one per core."""
+    if Workers is None or Workers <= 0:
+        Workers = os.cpu_count() or 1
+    return Workers
+
+
+def ListFiles(SourceDir, Exclude=None, Statistics: dict = None) -> list:
+    """
+    Return a list of (full path, archive name, is folder, os.stat_result) for everything below SourceDir.
+    Every entry is stat'ed once. The stat result is passed on to the zip file, so it does not stat again.
+    Files and folders that match the ExcludeRules in Exclude are skipped and counted in Statistics.
+    """
+    return list(Exclude_SaveAndRestore.Walk(SourceDir, Exclude, Statistics))
+
+
+def BackupDirectory(
+    SourceDir,
+    ArchivePath,
+    Parallel: bool = True,
+    Workers: int = 0,
+    Compression=ZIP_DEFLATED,
+    CompressLevel=None,
+    Parent: str = "",
+    Progress: JobProgress = None,
+    Exclude: Exclude_SaveAndRestore.ExcludeRules = None,
+    Policy: str = "",
+    Sequential: bool = False,
+    StageLocally: bool = False,
+    Comment: bytes = b"",
+) -> dict:
+    """
+    Write all files and folders below SourceDir into a new zip archive.
+    If the backup fails or is cancelled, the partial archive is removed.
+
+    Args:
+        SourceDir: The folder to backup.
+        ArchivePath: The zip file to create.
+        Parallel (bool, optional): Compress the members on a pool of worker threads. Defaults to True.
+        Workers (int, optional): Number of workers. 0 means one per core. Defaults to 0.
+        Compression (optional): Compression method for the members. Defaults to ZIP_DEFLATED.
+        CompressLevel (optional): Compression level. Defaults to None.
+        Parent (str, optional): A previous addon archive. If set, only new or changed files are written
+            and the manifest refers to the parent chain for the rest. Defaults to "" (full backup).
+        Progress (JobProgress, optional): Receives the progress and can cancel the backup. Defaults to None.
+        Exclude (ExcludeRules, optional): Files and folders to skip. Defaults to None (nothing is skipped).
+        Policy (str, optional): "fast", "balanced" or "small". If set, the compression is chosen per file
+            and Compression and CompressLevel are ignored. Defaults to "" (Compression for every file).
+        Sequential (bool, optional): Write the archive strictly append-only, with data descriptors. Defaults to False.
+        StageLocally (bool, optional): Build the archive in the local temp folder and copy it to ArchivePath
+            in one go when it is complete. Defaults to False.
+        Comment (bytes, optional): The archive comment. Defaults to b"".
+
+    Returns:
+        dict: "Files" (written), "Unchanged", "Deleted", "Hardlinks" (not stored again),
+            "Bytes" (uncompressed, written), "SkippedFiles", "SkippedBytes", "SkippedFolders" (not entered),
+            "ArchiveBytes" and "Seconds".
+    """
+    StartTime = time.perf_counter()
+    if Progress is None:
+        Progress = JobProgress()
+    Statistics = {"Files": 0, "Bytes": 0, "Unchanged": 0, "Deleted": 0, "Hardlinks": 0}
+    Entries = ListFiles(SourceDir, Exclude, Statistics)
+
+    # Get the manifest of the previous backup. Without one, a full backup is made
+    ParentManifest = None
+    if Parent is not None and Parent != "":
+        ParentManifest = ReadManifest(Parent)
+
+    Manifest = CreateManifest(os.path.basename(ArchivePath))
+    # A restore leaves what the backup skipped alone, so it needs the same rules
+    if Exclude is not None:
+        Manifest["Exclude"] = Exclude.Patterns
+    if ParentManifest is not None:
+        Manifest["Parent"] = ParentManifest["Id"]
+
+    # Compare the files with the previous manifest and collect the ones to write
+    ToWrite = []
+    TotalBytes = 0
+    # The first name of every hardlinked file, by (device, inode)
+    Inodes = {}
+    for Entry in Entries:
+        FullPath, Name, IsFolder, st = Entry
+        if IsFolder:
+            Manifest["Folders"].append(Name)
+            # Folders are only stored in a full backup. They are restored from the manifest otherwise
+            if ParentManifest is None:
+                ToWrite.append(Entry)
+            continue
+
+        # Store the data of a hardlinked file once. Windows reports inode 0 on some file systems
+        if st.st_nlink > 1 and st.st_ino != 0 and not stat.S_ISLNK(st.st_mode):
+            Inode = (st.st_dev, st.st_ino)
+            if Inode in Inodes:
+                Manifest["Hardlinks"][Name] = Inodes[Inode]
+                Statistics["Hardlinks"] += 1
+                continue
+            Inodes[Inode] = Name
+
+        Previous = None
+        if ParentManifest is not None:
+            Previous = ParentManifest["Files"].get(Name)
+        if (
+            Previous is not None
+            and Previous[0] == st.st_size
+            and Previous[1] == st.st_mtime_ns
+        ):
+            # Unchanged: refer to the archive that already holds the data
+            Manifest["Files"][Name] = Previous
+            Manifest["Archives"][Previous[3]] = ParentManifest["Archives"][Previous[3]]
+            Statistics["Unchanged"] += 1
+        else:
+            Manifest["Files"][Name] = [st.st_size, st.st_mtime_ns, 0, Manifest["Id"]]
+            ToWrite.append(Entry)
+            TotalBytes += st.st_size
+    Progress.SetTotal(len(ToWrite), TotalBytes)
+
+    # Files in the previous backup that are gone now, are recorded as tombstones
+    if ParentManifest is not None:
+        for Name in ParentManifest["Files"]:
+            if Name not in Manifest["Files"] and Name not in Manifest["Hardlinks"]:
+                Manifest["Deleted"].append(Name)
+        Statistics["Deleted"] = len(Manifest["Deleted"])
+
+    # The file the archive is built in
+    WritePath = ArchivePath
+    if StageLocally is True:
+        WritePath = ReturnStagingPath()
+
+    try:
+        with ZipFile(
+            WritePath,
+            "w",
+            Compression,
+            compresslevel=CompressLevel,
+            sequential=Sequential,
+        ) as zipObj:
+            zipObj.comment = Comment
+            if Parallel is False:
+                for Entry in ToWrite:
+                    WriteMember(zipObj, Entry, Compression, CompressLevel, Policy)
+                    Statistics["Files"] += 1
+                    Statistics["Bytes"] += zipObj.filelist[-1].file_size
+                    Progress.Add(1, zipObj.filelist[-1].file_size)
+            else:
+                WriteParallel(
+                    zipObj,
+                    ToWrite,
+                    Statistics,
+                    Workers,
+                    Compression,
+                    CompressLevel,
+                    Progress,
+                    Policy,
+                )
+
+            # Add the CRC of the written files to the manifest and store it in the archive
+            for zinfo in zipObj.infolist():
+                if not zinfo.is_dir() and zinfo.filename in Manifest["Files"]:
+                    Manifest["Files"][zinfo.filename][2] = zinfo.CRC
+            zipObj.writestr(
+                MANIFEST_NAME,
+                json.dumps(Manifest, separators=(",", ":")),
+                compress_type=ZIP_DEFLATED,
+            )
+        if WritePath != ArchivePath:
+            MoveArchive(WritePath, ArchivePath)
+    except BaseException:
+        # Do not leave a partial archive behind
+        if os.path.exists(WritePath):
+            os.remove(WritePath)
+        raise
+
+    Statistics["ArchiveBytes"] = os.path.getsize(ArchivePath)
+    Statistics["Seconds"] = time.perf_counter() - StartTime
+    return Statistics
+
+
+def ReturnStagingPath() -> str:
+    """Return a new, empty file in the local temp folder to build an archive in."""
+    Handle, StagingPath = tempfile.mkstemp(prefix="SaveAndRestore-", suffix=".zip")
+    os.close(Handle)
+    return StagingPath
+
+
+def MoveArchive(StagingPath, ArchivePath):
+    """
+    Move a finished archive from the local temp folder to ArchivePath with one sequential copy.
+    The copy gets a temporary name first, so ArchivePath never holds a partial archive.
+    """
+    PartPath = str(ArchivePath) + ".part"
+    try:
+        shutil.copyfile(StagingPath, PartPath)
+        os.replace(PartPath, ArchivePath)
+    except BaseException:
+        if os.path.exists(PartPath):
+            os.remove(PartPath)
+        raise
+    os.remove(StagingPath)
+    return
+
+
+def CreateManifest(FileName: str) -> dict:
+    """Return an empty manifest for a new archive."""
+    Id = uuid.uuid4().hex
+    Manifest = {
+        "Version": MANIFEST_VERSION,
+        "Id": Id,
+        "Created": datetime.now().isoformat(timespec="seconds"),
+        "Parent": None,
+        # The archives that hold the data of the files, by id
+        "Archives": {Id: FileName},
+        "Folders": [],
+        "Files": {},
+        # name: name of the file in "Files" it is hardlinked to
+        "Hardlinks": {},
+        "Deleted": [],
+        # The exclusion patterns of the backup, see Exclude_SaveAndRestore
+        "Exclude": [],
+    }
+    return Manifest
+
+
+def ReadManifest(ArchivePath) -> dict:
+    """Return the manifest of an addon archive, or None if the archive has none."""
+    try:
+        with ZipFile(ArchivePath, "r") as zipObj:
+            if MANIFEST_NAME not in zipObj.NameToInfo:
+                return None
+            Manifest = json.loads(zipObj.read(MANIFEST_NAME))
+    except (OSError, BadZipFile, ValueError):
+        return None
+    if Manifest.get("Version", 0) > MANIFEST_VERSION:
+        return None
+    return Manifest
+
+
+def FindLatestBackup(Directory, Exclude: str = "") -> str:
+    """
+    Return the most recent addon archive with a manifest in Directory.
+    Returns "" if there is none.
+    """
+    Candidates = glob.glob(os.path.join(glob.escape(str(Directory)), "*.zip"))
+    Candidates.sort(key=os.path.getmtime, reverse=True)
+    for Candidate in Candidates:
+        if Exclude != "" and os.path.normcase(
+            os.path.abspath(Candidate)
+        ) == os.path.normcase(os.path.abspath(Exclude)):
+            continue
+        if ReadManifest(Candidate) is not None:
+            return Candidate
+    return ""
+
+
+def WriteParallel(
+    zipObj: ZipFile,
+    Entries: list,
+    Statistics: dict,
+    Workers=0,
+    Compression=ZIP_DEFLATED,
+    CompressLevel=None,
+    Progress: JobProgress = None,
+    Policy: str = "",
+):
+    """
+    Compress the entries from ListFiles on a worker pool and commit them to zipObj in their original order.
+    Only a limited number of compressed members, and a limited number of bytes, is kept in memory at the same time.
+    See BackupDirectory for Policy.
+    """
+    if Progress is None:
+        Progress = JobProgress()
+    Workers = ReturnWorkerCount(Workers)
+    # The number of members that may be compressed ahead of the writer
+    Window = Workers * 4
+
+    def Commit(Item):
+        Kind, Value = Item[:2]
+        if Kind == "future":
+            zinfo, data = Value.result()
+            zipObj.writeraw(zinfo, data)
+        else:
+            WriteMember(zipObj, Value, Compression, CompressLevel, Policy)
+        Statistics["Files"] += 1
+        Statistics["Bytes"] += zipObj.filelist[-1].file_size
+        Progress.Add(1, zipObj.filelist[-1].file_size)
+
+    with ThreadPoolExecutor(max_workers=Workers) as Pool:
+        Pending = deque()
+        PendingBytes = 0
+        for Entry in Entries:
+            # Folders and very large files are written directly by this thread
+            FullPath, Name, IsFolder, st = Entry
+            Size = 0 if IsFolder else st.st_size
+            if IsFolder or Size > LARGE_FILE_LIMIT:
+                Pending.append(("write", Entry, 0))
+            else:
+                # The size of the file bounds what its member holds in memory, also if it does not compress
+                Pending.append(
+                    (
+                        "future",
+                        Pool.submit(
+                            CompressMember, Entry, Compression, CompressLevel, Policy
+                        ),
+                        Size,
+                    )
+                )
+                PendingBytes += Size
+            # Write the finished members, so memory use stays bounded
+            while len(Pending) > Window or PendingBytes > PENDING_BYTES_LIMIT:
+                Item = Pending.popleft()
+                Commit(Item)
+                PendingBytes -= Item[2]
+        while len(Pending) > 0:
+            Commit(Pending.popleft())
+    return
+
+
+def CompressMember(
+    Entry: tuple, Compression=ZIP_DEFLATED, CompressLevel=None, Policy: str = ""
+) -> tuple:
+    """
+    Compress an entry from ListFiles for ZipFile.writeraw. Runs on a worker thread.
+    With a Policy, the method is chosen for the file. A file that grows when compressed is stored instead.
+    """
+    FullPath, Name, IsFolder, st = Entry
+    if Policy != "" and not IsFolder and not stat.S_ISLNK(st.st_mode):
+        Compression, CompressLevel = Compression_SaveAndRestore.ChooseCompression(
+            FullPath, st.st_size, Policy
+        )
+    zinfo, data = compress_file(FullPath, Name, Compression, CompressLevel, st=st)
+    if zinfo.compress_type != ZIP_STORED and len(data) >= zinfo.file_size > 0:
+        zinfo, data = compress_file(FullPath, Name, ZIP_STORED, st=st)
+    return zinfo, data
+
+
+def WriteMember(
+    zipObj: ZipFile,
+    Entry: tuple,
+    Compression=ZIP_DEFLATED,
+    CompressLevel=None,
+    Policy: str = "",
+):
+    """Write an entry from ListFiles with ZipFile.write. With a Policy, the method is chosen for the file."""
+    FullPath, Name, IsFolder, st = Entry
+    if Policy != "" and not IsFolder and not stat.S_ISLNK(st.st_mode):
+        Compression, CompressLevel = Compression_SaveAndRestore.ChooseCompression(
+            FullPath, st.st_size, Policy
+        )
+    zipObj.write(FullPath, Name, Compression, CompressLevel, st=st)
+    return
+
+
+def FormatStatistics(Statistics: dict) -> str:
+    """Return a one-line summary of the statistics returned by BackupDirectory."""
+    MegaBytes = Statistics["Bytes"] / (1024 * 1024)
+    Seconds = max(Statistics["Seconds"], 1e-9)
+    result = (
+        f"{Statistics['Files']} files, {MegaBytes:.1f} MB in {Seconds:.2f} s "
+        + f"({MegaBytes / Seconds:.1f} MB/s, archive {Statistics['ArchiveBytes'] / (1024 * 1024):.1f} MB)"
+    )
+    if Statistics.get("Unchanged", 0) > 0 or Statistics.get("Deleted", 0) > 0:
+        result += (
+            f", {Statistics['Unchanged']} unchanged, {Statistics['Deleted']} deleted"
+        )
+    if Statistics.get("Hardlinks", 0) > 0:
+        result += f", {Statistics['Hardlinks']} hardlinks"
+    if Statistics.get("SkippedFiles", 0) > 0:
+        result += (
+            f", skipped {Statistics['SkippedFiles']} files "
+            + f"({Statistics['SkippedBytes'] / (1024 * 1024):.1f} MB)"
+        )
+    if Statistics.get("SkippedFolders", 0) > 0:
+        result += f", skipped {Statistics['SkippedFolders']} folders"
+    return result
+
+
+def main(args=None):
+    import argparse
+    import tempfile
+
+    description = "Compare the single-threaded and the parallel addon backup, and the compression policies."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "directory", help="Folder to backup, for example FreeCAD's Mod folder"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of workers (default: one per core)",
+    )
+    args = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as TempDir:
+        Workers = ReturnWorkerCount(args.workers)
+        Runs = [
+            ("single-threaded, stored", False, ZIP_STORED, ""),
+            ("single-threaded, deflated", False, ZIP_DEFLATED, ""),
+            (f"parallel ({Workers} workers), deflated", True, ZIP_DEFLATED, ""),
+        ]
+        # The per-file compression policies
+        for Policy in Compression_SaveAndRestore.POLICIES:
+            Runs.append(
+                (f"parallel ({Workers} workers), {Policy}", True, ZIP_DEFLATED, Policy)
+            )
+        for Name, Parallel, Compression, Policy in Runs:
+            ArchivePath = os.path.join(TempDir, "benchmark.zip")
+            Statistics = BackupDirectory(
+                args.directory,
+                ArchivePath,
+                Parallel=Parallel,
+                Workers=args.workers,
+                Compression=Compression,
+                Policy=Policy,
+            )
+            # Make sure that the archive reads back
+            with ZipFile(ArchivePath, "r") as zipObj:
+                BadFile = zipObj.testzip()
+            if BadFile is not None:
+                print(f"{Name}: corrupt member {BadFile!r}")
+            print(f"{Name}: {FormatStatistics(Statistics)}")
+            os.remove(ArchivePath)
+
+
+if __name__ == "__main__":
+    main()
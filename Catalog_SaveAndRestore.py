@@ -0,0 +1,360 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# A catalog of the backups in a save directory, so they can be listed and searched without opening every archive.
+# The catalog is a SQLite database in the save directory. It records for every archive its kind, date,
+# FreeCAD version, size, the addons it holds with their version, and a fingerprint of its content.
+# Archives are registered when they are written. Archives the catalog has not seen yet, or that changed on disk,
+# are indexed when the catalog is refreshed: only their central directory is read, and the manifest of addon backups.
+# The catalog is only an index: when it is missing or broken, it is rebuilt from the archives.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import hashlib
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from zipfile_SaveAndRestore import ZipFile, BadZipFile
+import Backup_SaveAndRestore
+import Restore_SaveAndRestore
+import ConfigSnapshots_SaveAndRestore
+
+CATALOG_FILE = "SaveAndRestore Catalog.sqlite"
+CATALOG_VERSION = 2
+
+# Sub folders of the save directory that hold backups as well
+SUB_FOLDERS = [ConfigSnapshots_SaveAndRestore.SNAPSHOT_FOLDER]
+
+# The file names the dialog gives to new backups, by kind
+NAME_SUFFIXES = {
+    " - FreeCAD Settings.zip": "Settings",
+    " - FreeCAD Addons.zip": "Addons",
+}
+TIME_FORMAT = "%Y_%m_%d_%H_%M_%S"
+# The config files in a settings backup
+SETTINGS_MEMBERS = ["user.cfg", "system.cfg", "user.groups.cfg", "system.groups.cfg"]
+
+# The archive comment records the FreeCAD version that wrote the archive, e.g. "SaveAndRestore; FreeCAD 1.0.2"
+COMMENT_PREFIX = "SaveAndRestore; FreeCAD "
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Archives (
+    Path TEXT PRIMARY KEY,
+    Kind TEXT,
+    Created TEXT,
+    Size INTEGER,
+    MTime INTEGER,
+    FreeCADVersion TEXT,
+    Files INTEGER,
+    Bytes INTEGER,
+    Fingerprint TEXT,
+    Parent TEXT
+);
+CREATE TABLE IF NOT EXISTS Addons (
+    Path TEXT,
+    Addon TEXT,
+    Files INTEGER,
+    Bytes INTEGER,
+    Version TEXT,
+    Head TEXT,
+    PRIMARY KEY (Path, Addon)
+);
+CREATE INDEX IF NOT EXISTS AddonNames ON Addons (Addon);
+CREATE INDEX IF NOT EXISTS ArchiveDates ON Archives (Kind, Created);
+"""
+
+
+def ReturnComment(FreeCADVersion: str) -> bytes:
+    """Return the archive comment for an archive written by FreeCADVersion."""
+    return (COMMENT_PREFIX + FreeCADVersion).encode("utf-8")
+
+
+def ParseComment(Comment: bytes) -> str:
+    """Return the FreeCAD version in an archive comment, or "" if the archive was not written with one."""
+    Text = Comment.decode("utf-8", "replace")
+    if not Text.startswith(COMMENT_PREFIX):
+        return ""
+    return Text[len(COMMENT_PREFIX) :].strip()
+
+
+def ReturnCatalogDir(ArchivePath) -> str:
+    """Return the folder whose catalog lists ArchivePath."""
+    Folder = os.path.dirname(os.path.abspath(ArchivePath))
+    if os.path.basename(Folder) in SUB_FOLDERS:
+        Folder = os.path.dirname(Folder)
+    return Folder
+
+
+def Connect(Directory) -> sqlite3.Connection:
+    """
+    Open the catalog of Directory. A catalog that is corrupt or of an unknown version is replaced by a new one.
+    A catalog that is locked raises sqlite3.OperationalError, so what was recorded with Register is not lost.
+    """
+    CatalogPath = os.path.join(os.fspath(Directory), CATALOG_FILE)
+    for Attempt in range(2):
+        Connection = sqlite3.connect(CatalogPath, timeout=10)
+        try:
+            Version = Connection.execute("PRAGMA user_version").fetchone()[0]
+            if Version not in (0, CATALOG_VERSION):
+                raise sqlite3.DatabaseError(f"Unknown catalog version {Version}")
+            Connection.executescript(SCHEMA)
+            Connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            return Connection
+        except sqlite3.OperationalError:
+            # For example locked by another FreeCAD. The catalog is fine, so it is kept
+            Connection.close()
+            raise
+        except sqlite3.DatabaseError:
+            Connection.close()
+            if Attempt > 0:
+                raise
+            os.remove(CatalogPath)
+    return None
+
+
+def EmptyEntry() -> dict:
+    """Return the catalog entry of an archive that is not a backup."""
+    return {
+        "Kind": "",
+        "Created": "",
+        "FreeCADVersion": "",
+        "Files": 0,
+        "Bytes": 0,
+        "Fingerprint": "",
+        "Parent": None,
+        "Addons": {},
+        # {addon: (version, git commit)}, only known for archives registered with an addon registry
+        "Versions": {},
+    }
+
+
+def IndexArchive(ArchivePath) -> dict:
+    """
+    Return the catalog entry of an archive: {"Kind", "Created", "FreeCADVersion", "Files", "Bytes",
+    "Fingerprint", "Parent", "Addons": {addon: [files, bytes]}}. Kind is "" for archives that are not a backup.
+    Only the central directory is read, and for addon backups the manifest.
+    """
+    Name = os.path.basename(ArchivePath)
+    Entry = EmptyEntry()
+    with ZipFile(ArchivePath, "r") as zipObj:
+        Entry["FreeCADVersion"] = ParseComment(zipObj.comment)
+        Members = zipObj.infolist()
+        HasManifest = Backup_SaveAndRestore.MANIFEST_NAME in zipObj.NameToInfo
+
+    # The fingerprint changes with the content, not with the time the archive was written
+    Fingerprint = hashlib.sha256()
+    for info in sorted(Members, key=lambda info: info.filename):
+        if Restore_SaveAndRestore.IsMetadata(info.filename):
+            continue
+        Fingerprint.update(f"{info.filename}\0{info.CRC}\0{info.file_size}\n".encode())
+        if not info.is_dir():
+            Entry["Files"] += 1
+            Entry["Bytes"] += info.file_size
+    Entry["Fingerprint"] = Fingerprint.hexdigest()
+
+    for Suffix, Kind in NAME_SUFFIXES.items():
+        if Name.endswith(Suffix):
+            Entry["Kind"] = Kind
+            try:
+                Entry["Created"] = datetime.strptime(
+                    Name[: -len(Suffix)], TIME_FORMAT
+                ).isoformat(timespec="seconds")
+            except ValueError:
+                pass
+    if HasManifest:
+        Entry["Kind"] = "Addons"
+        Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+        if Manifest is not None:
+            Entry["Created"] = Manifest.get("Created", Entry["Created"])
+            Entry["Parent"] = Manifest.get("Parent")
+    elif Entry["Kind"] == "" and any(
+        info.filename in SETTINGS_MEMBERS for info in Members
+    ):
+        Entry["Kind"] = "Settings"
+    if Entry["Created"] == "":
+        Entry["Created"] = datetime.fromtimestamp(
+            os.path.getmtime(ArchivePath)
+        ).isoformat(timespec="seconds")
+    if Entry["Kind"] == "Addons":
+        Entry["Addons"] = Restore_SaveAndRestore.ListAddons(ArchivePath)
+    return Entry
+
+
+def WriteEntry(Connection, RelPath: str, st: os.stat_result, Entry: dict):
+    Connection.execute("DELETE FROM Addons WHERE Path = ?", (RelPath,))
+    Connection.execute(
+        "INSERT OR REPLACE INTO Archives VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            RelPath,
+            Entry["Kind"],
+            Entry["Created"],
+            st.st_size,
+            st.st_mtime_ns,
+            Entry["FreeCADVersion"],
+            Entry["Files"],
+            Entry["Bytes"],
+            Entry["Fingerprint"],
+            Entry["Parent"],
+        ),
+    )
+    Connection.executemany(
+        "INSERT INTO Addons VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (RelPath, Addon, *Counts, *Entry["Versions"].get(Addon, (None, None)))
+            for Addon, Counts in Entry["Addons"].items()
+        ],
+    )
+    return
+
+
+def ReturnRelPath(Directory, ArchivePath) -> str:
+    """Return the "/" separated path of an archive relative to the catalog folder, so the catalog can be moved."""
+    return os.path.relpath(os.path.abspath(ArchivePath), Directory).replace(os.sep, "/")
+
+
+def Register(ArchivePath, Registry=None):
+    """
+    Add a new archive to the catalog of its folder.
+    With an addon registry (see Addons_SaveAndRestore), the version and git commit of the addons are recorded as well.
+    An archive only gets them when it is registered: they are not in the archive itself.
+    """
+    Directory = ReturnCatalogDir(ArchivePath)
+    st = os.stat(ArchivePath)
+    Entry = IndexArchive(ArchivePath)
+    if Registry is not None:
+        for Addon in Entry["Addons"]:
+            Installed = Registry.Get(Addon)
+            if Installed is not None:
+                Entry["Versions"][Addon] = (Installed["Version"], Installed["Head"])
+    with closing(Connect(Directory)) as Connection, Connection:
+        WriteEntry(Connection, ReturnRelPath(Directory, ArchivePath), st, Entry)
+    return
+
+
+def ListArchives(Directory) -> dict:
+    """Return {relative path: full path} for the zip files in Directory and its backup sub folders."""
+    Archives = {}
+    for Folder in [""] + SUB_FOLDERS:
+        try:
+            with os.scandir(os.path.join(Directory, Folder)) as Iterator:
+                for Entry in Iterator:
+                    if Entry.name.lower().endswith(".zip") and Entry.is_file():
+                        Archives[(Folder + "/" if Folder else "") + Entry.name] = (
+                            Entry.path
+                        )
+        except OSError:
+            continue
+    return Archives
+
+
+def Refresh(Directory, Progress=None) -> int:
+    """
+    Bring the catalog of Directory up to date: index the archives that are new or changed, and forget the ones
+    that are gone. Unchanged archives are not opened. Returns the number of indexed archives.
+    """
+    Directory = os.path.abspath(os.fspath(Directory))
+    Archives = ListArchives(Directory)
+    with closing(Connect(Directory)) as Connection:
+        Known = {
+            Path: (Size, MTime)
+            for Path, Size, MTime in Connection.execute(
+                "SELECT Path, Size, MTime FROM Archives"
+            )
+        }
+        with Connection:
+            for Path in Known:
+                if Path not in Archives:
+                    Connection.execute("DELETE FROM Archives WHERE Path = ?", (Path,))
+                    Connection.execute("DELETE FROM Addons WHERE Path = ?", (Path,))
+
+        # Stat the archives, and index the ones whose size or time differs from the catalog
+        Changed = []
+        for RelPath, FullPath in Archives.items():
+            try:
+                st = os.stat(FullPath)
+            except OSError:
+                continue
+            if Known.get(RelPath) != (st.st_size, st.st_mtime_ns):
+                Changed.append((RelPath, FullPath, st))
+        if Progress is not None:
+            Progress.SetTotal(len(Changed), 0)
+        for RelPath, FullPath, st in Changed:
+            if Progress is not None:
+                Progress.Check()
+            try:
+                Entry = IndexArchive(FullPath)
+            except (OSError, BadZipFile, ValueError, KeyError):
+                # Remember broken archives as well, so they are not read again until they change
+                Entry = EmptyEntry()
+            with Connection:
+                WriteEntry(Connection, RelPath, st, Entry)
+            if Progress is not None:
+                Progress.Add(1, 0)
+    return len(Changed)
+
+
+def Search(Directory, Kind: str = "", Text: str = "") -> list:
+    """
+    Return the archives in the catalog of Directory, newest first, as dicts with the columns of the catalog,
+    the full "FullPath", the list "Addons" and the recorded "AddonVersions" by addon. Kind limits the result to "Settings" or "Addons".
+    Text matches the file name, the FreeCAD version and the addon names.
+    """
+    Directory = os.path.abspath(os.fspath(Directory))
+    Query = (
+        "SELECT Archives.*,"
+        " GROUP_CONCAT(Addons.Addon || '\t' || IFNULL(Addons.Version, ''), '\n') AS AddonList"
+        " FROM Archives LEFT JOIN Addons ON Archives.Path = Addons.Path"
+        " WHERE Archives.Kind != ''"
+    )
+    Arguments = []
+    if Kind != "":
+        Query += " AND Archives.Kind = ?"
+        Arguments.append(Kind)
+    if Text.strip() != "":
+        Pattern = f"%{Text.strip()}%"
+        Query += (
+            " AND (Archives.Path LIKE ? OR Archives.FreeCADVersion LIKE ?"
+            " OR Archives.Path IN (SELECT Path FROM Addons WHERE Addon LIKE ?))"
+        )
+        Arguments += [Pattern, Pattern, Pattern]
+    Query += " GROUP BY Archives.Path ORDER BY Archives.Created DESC"
+
+    with closing(Connect(Directory)) as Connection:
+        Connection.row_factory = sqlite3.Row
+        Rows = []
+        for Row in Connection.execute(Query, Arguments):
+            Entry = dict(Row)
+            AddonList = Entry.pop("AddonList")
+            Versions = dict(
+                Line.split("\t", 1) for Line in AddonList.split("\n") if AddonList
+            )
+            Entry["Addons"] = sorted(Versions)
+            Entry["AddonVersions"] = {
+                Addon: Version for Addon, Version in Versions.items() if Version != ""
+            }
+            Entry["FullPath"] = os.path.join(Directory, *Entry["Path"].split("/"))
+            Rows.append(Entry)
+    return Rows
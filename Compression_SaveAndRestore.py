@@ -0,0 +1,156 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Chooses the compression method and level for every member of an addon archive.
+# Files that are compressed already (images, archives, FreeCAD documents) are stored as they are.
+# Text files are always compressed. For other files, the first block is test-compressed.
+# The policy sets the balance between CPU time and archive size:
+#   "fast":      deflate at level 1.
+#   "balanced":  deflate at the default level.
+#   "small":     deflate at level 9, and lzma for large files. Note that not every zip tool can extract lzma members.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import zlib
+
+from zipfile_SaveAndRestore import ZIP_STORED, ZIP_DEFLATED, ZIP_LZMA
+
+POLICIES = ["fast", "balanced", "small"]
+
+# Method and level for compressible files, per policy
+POLICY_METHODS = {
+    "fast": (ZIP_DEFLATED, 1),
+    "balanced": (ZIP_DEFLATED, 6),
+    "small": (ZIP_DEFLATED, 9),
+}
+
+# With the "small" policy, files from this size on use lzma.
+# Starting an lzma stream is expensive, so for smaller files it costs much more time than it saves space.
+LZMA_MIN_SIZE = 256 * 1024
+
+# Files that are compressed already. Compressing them again costs CPU time and gains nothing
+COMPRESSED_EXTENSIONS = {
+    ".fcstd",
+    ".zip",
+    ".whl",
+    ".gz",
+    ".tgz",
+    ".bz2",
+    ".xz",
+    ".7z",
+    ".rar",
+    ".zst",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".ico",
+    ".mp3",
+    ".mp4",
+    ".ogg",
+    ".webm",
+    ".woff",
+    ".woff2",
+    ".3mf",
+    ".docx",
+    ".xlsx",
+}
+
+# Files that always compress well
+TEXT_EXTENSIONS = {
+    ".py",
+    ".fcmacro",
+    ".svg",
+    ".ui",
+    ".ts",
+    ".qrc",
+    ".xml",
+    ".json",
+    ".txt",
+    ".md",
+    ".rst",
+    ".csv",
+    ".cfg",
+    ".ini",
+    ".toml",
+    ".yml",
+    ".yaml",
+    ".html",
+    ".css",
+    ".js",
+    ".step",
+    ".stp",
+    ".iges",
+    ".igs",
+    ".stl",
+    ".obj",
+    ".dxf",
+}
+
+# Size of the block that is test-compressed
+SAMPLE_SIZE = 64 * 1024
+# A sample that compresses to more than this fraction of its size is considered incompressible
+SAMPLE_RATIO = 0.9
+# Files smaller than this are not worth compressing
+MIN_SIZE = 64
+
+
+def ChooseCompression(FullPath, Size: int, Policy: str = "balanced") -> tuple:
+    """
+    Return (compression method, compression level) for a file.
+
+    Args:
+        FullPath: The file.
+        Size (int): Size of the file in bytes.
+        Policy (str, optional): "fast", "balanced" or "small". Defaults to "balanced".
+    """
+    Method = POLICY_METHODS.get(Policy, POLICY_METHODS["balanced"])
+    if Policy == "small" and Size >= LZMA_MIN_SIZE:
+        Method = (ZIP_LZMA, None)
+    if Size < MIN_SIZE:
+        return ZIP_STORED, None
+
+    Extension = os.path.splitext(os.fspath(FullPath))[1].lower()
+    if Extension in COMPRESSED_EXTENSIONS:
+        return ZIP_STORED, None
+    if Extension in TEXT_EXTENSIONS:
+        return Method
+
+    if IsCompressible(FullPath) is False:
+        return ZIP_STORED, None
+    return Method
+
+
+def IsCompressible(FullPath) -> bool:
+    """Return False if the first block of a file does not compress. Unreadable files return True."""
+    try:
+        with open(FullPath, "rb") as file:
+            Sample = file.read(SAMPLE_SIZE)
+    except OSError:
+        return True
+    if len(Sample) == 0:
+        return False
+    return len(zlib.compress(Sample, 1)) <= len(Sample) * SAMPLE_RATIO
@@ -0,0 +1,260 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Rolling snapshots of the config files, user.cfg and system.cfg.
+# A snapshot is a settings archive like the ones that are saved from the dialog, so it can be restored the same way.
+# The snapshots are written to a folder in the save directory, but only when the content of the config files changed.
+# A check costs one stat per config file. Only when a file was written since the last check, the files are hashed,
+# and only when the hash differs from the latest snapshot, a new snapshot is written.
+# Old snapshots are pruned like a rotation scheme: the newest snapshot of each of the last hours, days and weeks is kept.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import json
+import hashlib
+import threading
+import uuid
+from datetime import datetime
+
+from zipfile_SaveAndRestore import ZipFile, ZIP_DEFLATED
+
+# Name of the snapshot folder inside the save directory
+SNAPSHOT_FOLDER = "SaveAndRestore Config Snapshots"
+# The snapshots have the same names as the settings archives that are saved from the dialog
+TIME_FORMAT = "%Y_%m_%d_%H_%M_%S"
+FILE_SUFFIX = " - FreeCAD Settings.zip"
+# The hash of the latest snapshot, and the size and modification time of the files it was taken from
+STATE_FILE = "state.json"
+
+# Number of hourly, daily and weekly snapshots to keep
+DEFAULT_RETENTION = (24, 14, 8)
+
+# The state of every snapshot folder, so an unchanged config file is only stat'ed
+_States = {}
+_Lock = threading.Lock()
+_Worker = None
+
+
+def ReturnSnapshotDir(SaveDirectory) -> str:
+    """Return the snapshot folder inside SaveDirectory."""
+    return os.path.join(os.fspath(SaveDirectory), SNAPSHOT_FOLDER)
+
+
+def ReturnSignature(Files) -> list:
+    """Return [name, size, modification time] for every file. Missing files have size and time -1."""
+    Signature = []
+    for File in Files:
+        try:
+            st = os.stat(File)
+            Signature.append([os.path.basename(File), st.st_size, st.st_mtime_ns])
+        except OSError:
+            Signature.append([os.path.basename(File), -1, -1])
+    return Signature
+
+
+def HashFiles(Files) -> str:
+    """Return the sha256 hash of the names and content of the files. Missing files are skipped."""
+    Hash = hashlib.sha256()
+    for File in Files:
+        try:
+            with open(File, "rb") as file:
+                Data = file.read()
+        except OSError:
+            continue
+        Hash.update(os.path.basename(File).encode("utf-8") + b"\0")
+        Hash.update(len(Data).to_bytes(8, "little"))
+        Hash.update(Data)
+    return Hash.hexdigest()
+
+
+def ReadState(SnapshotDir) -> dict:
+    """Return the state of SnapshotDir, from memory or from its state file."""
+    if SnapshotDir in _States:
+        return _States[SnapshotDir]
+    try:
+        with open(os.path.join(SnapshotDir, STATE_FILE), "r") as file:
+            State = json.load(file)
+    except (OSError, ValueError):
+        State = {}
+    _States[SnapshotDir] = State
+    return State
+
+
+def WriteState(SnapshotDir, State: dict):
+    _States[SnapshotDir] = State
+    os.makedirs(SnapshotDir, exist_ok=True)
+    FileName = os.path.join(SnapshotDir, STATE_FILE)
+    TempFile = f"{FileName}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(TempFile, "w") as outfile:
+        json.dump(State, outfile, indent=4)
+    os.replace(TempFile, FileName)
+    return
+
+
+def TakeSnapshot(
+    Files,
+    SnapshotDir,
+    Retention: tuple = DEFAULT_RETENTION,
+    Now: datetime = None,
+    Comment: bytes = b"",
+) -> str:
+    """
+    Write a snapshot of the config files Files to SnapshotDir, if their content changed since the latest snapshot.
+
+    Args:
+        Files: The config files.
+        SnapshotDir: The snapshot folder.
+        Retention (tuple, optional): Number of hourly, daily and weekly snapshots to keep.
+        Now (datetime, optional): Time of the snapshot. Defaults to the current time.
+        Comment (bytes, optional): The archive comment. Defaults to b"".
+
+    Returns:
+        str: The new snapshot, or None if the config files did not change.
+    """
+    SnapshotDir = os.fspath(SnapshotDir)
+    with _Lock:
+        State = ReadState(SnapshotDir)
+        Signature = ReturnSignature(Files)
+        if Signature == State.get("Signature"):
+            return None
+        Hash = HashFiles(Files)
+        if Hash == State.get("Hash"):
+            # Written, but not changed. Remember the new times, so the files are not hashed again
+            WriteState(SnapshotDir, {"Signature": Signature, "Hash": Hash})
+            return None
+
+        if Now is None:
+            Now = datetime.now()
+        os.makedirs(SnapshotDir, exist_ok=True)
+        FileName = os.path.join(SnapshotDir, Now.strftime(TIME_FORMAT) + FILE_SUFFIX)
+        TempFile = f"{FileName}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with ZipFile(TempFile, "w", ZIP_DEFLATED) as zipObj:
+                zipObj.comment = Comment
+                for File in Files:
+                    if os.path.exists(File):
+                        zipObj.write(File, os.path.basename(File))
+            os.replace(TempFile, FileName)
+        except BaseException:
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
+            raise
+        WriteState(SnapshotDir, {"Signature": Signature, "Hash": Hash})
+        Prune(SnapshotDir, *Retention)
+    return FileName
+
+
+def ListConfigSnapshots(SnapshotDir) -> list:
+    """Return (time, path) for the snapshots in SnapshotDir, newest first."""
+    Snapshots = []
+    try:
+        with os.scandir(SnapshotDir) as Iterator:
+            for Entry in Iterator:
+                if not Entry.name.endswith(FILE_SUFFIX):
+                    continue
+                try:
+                    Time = datetime.strptime(
+                        Entry.name[: -len(FILE_SUFFIX)], TIME_FORMAT
+                    )
+                except ValueError:
+                    continue
+                Snapshots.append((Time, Entry.path))
+    except FileNotFoundError:
+        pass
+    Snapshots.sort(reverse=True)
+    return Snapshots
+
+
+def SelectKept(Times, Hourly: int, Daily: int, Weekly: int) -> set:
+    """
+    Return the times to keep: the newest of every hour, day and week, for the newest Hourly hours,
+    Daily days and Weekly weeks that have a snapshot. The newest time is always kept.
+    """
+    Times = sorted(Times, reverse=True)
+    Kept = set(Times[:1])
+    Buckets = [
+        (Hourly, lambda Time: Time.replace(minute=0, second=0, microsecond=0)),
+        (Daily, lambda Time: Time.date()),
+        (Weekly, lambda Time: Time.isocalendar()[:2]),
+    ]
+    for Count, Key in Buckets:
+        Seen = set()
+        for Time in Times:
+            if len(Seen) >= Count:
+                break
+            if Key(Time) not in Seen:
+                Seen.add(Key(Time))
+                Kept.add(Time)
+    return Kept
+
+
+def Prune(
+    SnapshotDir,
+    Hourly: int = DEFAULT_RETENTION[0],
+    Daily: int = DEFAULT_RETENTION[1],
+    Weekly: int = DEFAULT_RETENTION[2],
+) -> int:
+    """Remove the snapshots that SelectKept does not keep. Returns the number of removed snapshots."""
+    Snapshots = ListConfigSnapshots(SnapshotDir)
+    Kept = SelectKept([Time for Time, Path in Snapshots], Hourly, Daily, Weekly)
+    Counter = 0
+    for Time, Path in Snapshots:
+        if Time in Kept:
+            continue
+        try:
+            os.remove(Path)
+            Counter += 1
+        except OSError:
+            continue
+    return Counter
+
+
+def SubmitSnapshot(
+    Files, SnapshotDir, Retention: tuple = DEFAULT_RETENTION, Comment: bytes = b""
+) -> bool:
+    """
+    Run TakeSnapshot on a background thread. Returns False if the previous snapshot is still being written.
+    Errors are printed, they never reach the caller.
+    """
+    global _Worker
+    if _Worker is not None and _Worker.is_alive():
+        return False
+
+    def Run():
+        try:
+            TakeSnapshot(Files, SnapshotDir, Retention, Comment=Comment)
+        except Exception as e:
+            print(f"Config snapshot failed: {e}")
+
+    _Worker = threading.Thread(target=Run, name="SaveAndRestore snapshot", daemon=True)
+    _Worker.start()
+    return True
+
+
+def WaitForSnapshot(Timeout: float = None):
+    """Wait until the snapshot on the background thread is written."""
+    if _Worker is not None:
+        _Worker.join(Timeout)
+    return
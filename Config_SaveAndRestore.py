@@ -0,0 +1,467 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Saves and restores single parameter groups of FreeCAD's config files, such as "BaseApp/Preferences/Mod/<Addon>".
+# A config file is XML: nested FCParamGroup elements below a group named "Root", with FCBool, FCInt, FCUInt,
+# FCFloat and FCText elements for the parameters. Config files can be several MB, so they are never loaded as a
+# whole: they are streamed with iterparse, and only the selected groups are kept in memory.
+# The selected groups are saved as a fragment: a config file with only these groups and the groups above them.
+# The root element of a fragment lists the selected groups, one per line, in the attribute "Groups".
+# Groups can be applied to the running FreeCAD as well: the parameters in the backup are compared with the current
+# ones and only the differences are set through the parameter API. See CompareParameters and ApplyChanges.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import math
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+import Restore_SaveAndRestore
+
+GROUP_TAG = "FCParamGroup"
+ROOT_TAG = "FCParameters"
+
+# Groups whose sub groups are listed as well by ListGroups, below the usual depth
+EXPANDED_GROUPS = ["BaseApp/Preferences/Mod"]
+# Depth to which ListGroups lists groups, "BaseApp/Preferences/General" has depth 3
+LIST_DEPTH = 3
+
+INDENT = "  "
+
+# The parameter elements, with the name of their type in the parameter API
+PARAMETER_TYPES = {
+    "FCBool": "Bool",
+    "FCInt": "Int",
+    "FCUInt": "Unsigned",
+    "FCFloat": "Float",
+    "FCText": "String",
+}
+
+# Groups that FreeCAD only reads at startup. A change below these groups is applied, but needs a restart
+RESTART_GROUPS = [
+    "BaseApp/Preferences/General",
+    "BaseApp/Preferences/MainWindow",
+    "BaseApp/Preferences/Themes",
+    "BaseApp/Preferences/OpenGL",
+    "BaseApp/Preferences/Bitmaps/Theme",
+    "BaseApp/Workbench",
+]
+
+
+def ReturnFragmentName(FileName: str) -> str:
+    """Return the archive name of the fragment of a config file, e.g. "user.groups.cfg" for "user.cfg"."""
+    Name, Extension = os.path.splitext(FileName)
+    return f"{Name}.groups{Extension}"
+
+
+def NormalizePath(Path: str) -> str:
+    """
+    Return a group path relative to the Root group, e.g. "BaseApp/Preferences/Mod/Draft".
+    Accepts the paths of App.ParamGet as well, e.g. "User parameter:BaseApp/Preferences/Mod/Draft".
+    """
+    Path = Path.split(":", 1)[-1].strip().strip("/")
+    if Path == "Root" or Path.startswith("Root/"):
+        Path = Path[5:]
+    return Path
+
+
+def ParentPath(Path: str) -> str:
+    """Return the path of the group above the group Path. Groups directly below Root return ""."""
+    return Path.rsplit("/", 1)[0] if "/" in Path else ""
+
+
+def SelectedRoots(Paths) -> list:
+    """Return the normalized Paths without the ones that lie below another selected path."""
+    Roots = []
+    for Path in sorted(set(NormalizePath(Path) for Path in Paths)):
+        if Path == "":
+            # The Root group is the whole file
+            return [""]
+        if len(Roots) > 0 and Path.startswith(Roots[-1] + "/"):
+            continue
+        Roots.append(Path)
+    return Roots
+
+
+def IterGroups(Source):
+    """
+    Stream the config file Source, a path or a binary file object.
+    Yields (event, element, group path), where the group path is None for elements that are not a group.
+    Root has the path "". Callers clear the elements they are done with, so memory use stays small.
+    """
+    # The group paths of the open elements. Root itself has path ""
+    Stack = []
+    for Event, Element in ET.iterparse(Source, events=("start", "end")):
+        if Event == "start":
+            Path = None
+            if Element.tag == GROUP_TAG:
+                Parent = Stack[-1] if len(Stack) > 0 else None
+                Name = Element.get("Name", "")
+                if Parent is None:
+                    Path = ""
+                elif Parent == "":
+                    Path = Name
+                else:
+                    Path = f"{Parent}/{Name}"
+            Stack.append(Path)
+            yield Event, Element, Path
+        else:
+            Path = Stack.pop()
+            yield Event, Element, Path
+    return
+
+
+def ListGroups(Source, Depth: int = LIST_DEPTH, Expand=EXPANDED_GROUPS) -> list:
+    """Return the paths of the groups in the config file Source, up to Depth and below the groups in Expand."""
+    Groups = []
+    for Event, Element, Path in IterGroups(Source):
+        if Event == "end":
+            Element.clear()
+            continue
+        if Path is None or Path == "":
+            continue
+        if Path.count("/") < Depth or ParentPath(Path) in Expand:
+            Groups.append(Path)
+    return Groups
+
+
+def ExtractGroups(Source, Paths, Target) -> list:
+    """
+    Write the groups Paths of the config file Source as a fragment to Target, a path or a binary file object.
+    Only the selected groups are kept in memory. Returns the paths that were found.
+    """
+    Roots = set(SelectedRoots(Paths))
+    # The selected groups, with their path
+    Found = []
+    # The selected group that is being read, and its depth below it
+    Capture = None
+    Depth = 0
+    for Event, Element, Path in IterGroups(Source):
+        if Capture is not None:
+            Depth += 1 if Event == "start" else -1
+            if Depth < 0:
+                Found.append((Path, Element))
+                Capture = None
+                Depth = 0
+            continue
+        if Event == "start":
+            if Path in Roots:
+                Capture = Element
+        else:
+            Element.clear()
+
+    # The fragment holds the selected groups, and empty groups above them
+    # Root is written by name, so an empty list can not be mistaken for it
+    Fragment = ET.Element(
+        ROOT_TAG, Groups="\n".join(Path or "Root" for Path in sorted(Roots))
+    )
+    Groups = {}
+    for Path, Element in Found:
+        Element.tail = None
+        if Path == "":
+            Fragment.append(Element)
+        else:
+            EnsureGroup(Fragment, Groups, ParentPath(Path)).append(Element)
+    WriteTree(Fragment, Target)
+    return [Path for Path, Element in Found]
+
+
+def EnsureGroup(Fragment, Groups: dict, Path: str):
+    """Return the group Path in Fragment, and create it and the groups above it if needed."""
+    if Path in Groups:
+        return Groups[Path]
+    if Path == "":
+        Group = ET.SubElement(Fragment, GROUP_TAG, Name="Root")
+    else:
+        Group = ET.SubElement(
+            EnsureGroup(Fragment, Groups, ParentPath(Path)),
+            GROUP_TAG,
+            Name=Path.rsplit("/", 1)[-1],
+        )
+    Groups[Path] = Group
+    return Group
+
+
+def FragmentGroups(Source) -> list:
+    """Return the groups that were selected when the fragment Source was written. See ExtractGroups."""
+    for Event, Element in ET.iterparse(Source, events=("start",)):
+        Paths = Element.get("Groups", "").split("\n")
+        return SelectedRoots(Path for Path in Paths if Path.strip() != "")
+    return []
+
+
+def ReadFragment(Source, Paths) -> dict:
+    """
+    Return {path: element} for the groups Paths in a fragment written by ExtractGroups.
+    Paths that are not in the fragment map to None.
+    """
+    Tree = ET.parse(Source)
+    Groups = {}
+    Stack = [(Tree.getroot(), None)]
+    while len(Stack) > 0:
+        Element, Path = Stack.pop()
+        for Child in Element:
+            if Child.tag != GROUP_TAG:
+                continue
+            Name = Child.get("Name", "")
+            ChildPath = (
+                "" if Path is None else (Name if Path == "" else f"{Path}/{Name}")
+            )
+            Groups[ChildPath] = Child
+            Stack.append((Child, ChildPath))
+    return {Path: Groups.get(Path) for Path in SelectedRoots(Paths)}
+
+
+def MergeGroups(Source, Fragment, Target, Paths) -> int:
+    """
+    Write the config file Source to Target, with the groups Paths taken from Fragment.
+    Source is streamed. Fragment is a fragment written by ExtractGroups, which is small.
+    A selected group that is not in Fragment did not exist when the fragment was saved, so it is removed.
+    Groups that are missing in Source are added. Returns the number of replaced, added or removed groups.
+    """
+    Replacements = ReadFragment(Fragment, Paths)
+    # The group paths that exist in Source, and the selected groups that are written already
+    Seen = set()
+    Done = set()
+    Skip = 0
+
+    def Write(Text: str):
+        Output.write(Text.encode("utf-8"))
+
+    def WriteElement(Element, Level: int):
+        Element.tail = None
+        if hasattr(ET, "indent"):
+            ET.indent(Element, INDENT, Level)
+        Write("\n" + INDENT * Level + ET.tostring(Element, encoding="unicode"))
+
+    def WriteMissing(Path: str, Level: int):
+        # Add the selected groups below Path whose branch does not exist in Source
+        for Selected, Element in Replacements.items():
+            if Selected in Done or Element is None:
+                continue
+            if Path != "" and not Selected.startswith(Path + "/"):
+                continue
+            Branch = Selected[len(Path) + 1 :] if Path != "" else Selected
+            Child = Branch.split("/", 1)[0]
+            ChildPath = Child if Path == "" else f"{Path}/{Child}"
+            if ChildPath in Seen:
+                continue
+            WriteElement(BuildBranch(Replacements, ChildPath, Done), Level)
+
+    Output = open(Target, "wb") if isinstance(Target, (str, os.PathLike)) else Target
+    try:
+        Write('<?xml version="1.0" encoding="UTF-8" standalone="no" ?>')
+        Level = 0
+        for Event, Element, Path in IterGroups(Source):
+            if Skip > 0:
+                Skip += 1 if Event == "start" else -1
+                if Event == "end":
+                    Element.clear()
+                continue
+            if Event == "start":
+                if Path is not None:
+                    Seen.add(Path)
+                    if Path in Replacements:
+                        Done.add(Path)
+                        if Replacements[Path] is not None:
+                            WriteElement(Replacements[Path], Level)
+                        Skip = 1
+                        continue
+                if Path is not None or Element.tag == ROOT_TAG:
+                    Write("\n" + INDENT * Level + StartTag(Element))
+                    Level += 1
+                continue
+            if Path is not None or Element.tag == ROOT_TAG:
+                if Path is not None:
+                    WriteMissing(Path, Level)
+                Level -= 1
+                Write("\n" + INDENT * Level + f"</{Element.tag}>")
+            else:
+                # A parameter. Its text is only complete at its end
+                Write("\n" + INDENT * Level + ParameterTag(Element))
+            Element.clear()
+        Write("\n")
+    finally:
+        if Output is not Target:
+            Output.close()
+    return len(Done)
+
+
+def BuildBranch(Replacements: dict, Path: str, Done: set):
+    """Return the group Path with the selected groups below it, for groups that are missing in the target."""
+    if Path in Replacements:
+        Done.add(Path)
+        return Replacements[Path]
+    Group = ET.Element(GROUP_TAG, Name=Path.rsplit("/", 1)[-1])
+    for Selected, Element in Replacements.items():
+        if Element is None or Selected in Done or not Selected.startswith(Path + "/"):
+            continue
+        Child = f"{Path}/{Selected[len(Path) + 1 :].split('/', 1)[0]}"
+        Group.append(BuildBranch(Replacements, Child, Done))
+    return Group
+
+
+def StartTag(Element) -> str:
+    Attributes = "".join(
+        f" {Name}={quoteattr(Value)}" for Name, Value in Element.attrib.items()
+    )
+    return f"<{Element.tag}{Attributes}>"
+
+
+def ParameterTag(Element) -> str:
+    """Return a parameter element as text. Much faster than ET.tostring, which matters for large config files."""
+    if not Element.text:
+        return StartTag(Element)[:-1] + "/>"
+    return f"{StartTag(Element)}{escape(Element.text)}</{Element.tag}>"
+
+
+def WriteTree(Root, Target):
+    """Write an element tree as a config file."""
+    if hasattr(ET, "indent"):
+        ET.indent(Root, INDENT)
+    ET.ElementTree(Root).write(
+        Target, encoding="UTF-8", xml_declaration=True, short_empty_elements=True
+    )
+    return
+
+
+def RestoreGroups(ConfigFile, Fragment, Paths) -> int:
+    """
+    Merge the groups Paths from Fragment into the config file ConfigFile.
+    The merged file is written next to ConfigFile and swapped in. The replaced file is kept as rollback point.
+    Returns the number of replaced, added or removed groups.
+    """
+    ConfigFile = os.path.normpath(os.fspath(ConfigFile))
+    StagingPath = Restore_SaveAndRestore.ReturnStagingPath(ConfigFile)
+    try:
+        with open(StagingPath, "wb") as Target:
+            Counter = MergeGroups(ConfigFile, Fragment, Target, Paths)
+            Target.flush()
+            os.fsync(Target.fileno())
+        Restore_SaveAndRestore.SwapIn(StagingPath, ConfigFile)
+    except BaseException:
+        Restore_SaveAndRestore.RemoveFile(StagingPath)
+        raise
+    return Counter
+
+
+def IsSelected(Path: str, Roots: list) -> bool:
+    """Return True if the group Path is one of Roots, from SelectedRoots, or lies below one of them."""
+    for Root in Roots:
+        if Root == "" or Path == Root or Path.startswith(Root + "/"):
+            return True
+    return False
+
+
+def ParseValue(Element):
+    """Return the value of a parameter element as the type the parameter API uses."""
+    if Element.tag == "FCText":
+        return Element.text or ""
+    Value = Element.get("Value", "")
+    if Element.tag == "FCBool":
+        return Value == "1"
+    if Element.tag == "FCFloat":
+        return float(Value)
+    return int(Value)
+
+
+def ReadParameters(Source, Paths=("",)) -> dict:
+    """
+    Return {group path: {(tag, name): value}} for the groups Paths of the config file Source, and the groups below them.
+    Source is a config file or a fragment, a path or a binary file object. It is streamed.
+    """
+    Roots = SelectedRoots(Paths)
+    Groups = {}
+    for Event, Element, Path in IterGroups(Source):
+        if Event != "end" or Path is None:
+            continue
+        if IsSelected(Path, Roots):
+            Groups[Path] = {
+                (Child.tag, Child.get("Name", "")): ParseValue(Child)
+                for Child in Element
+                if Child.tag in PARAMETER_TYPES
+            }
+        Element.clear()
+    return Groups
+
+
+def CompareParameters(Backup: dict, Current: dict, Paths=("",)) -> list:
+    """
+    Return the changes that turn the parameters Current into Backup, for the groups Paths. Both are read with
+    ReadParameters. A change is ("Set", path, tag, name, value), ("Remove", path, tag, name) or ("RemoveGroup", path).
+    """
+    Changes = []
+    for Path, Parameters in sorted(Backup.items()):
+        Existing = Current.get(Path, {})
+        for (Tag, Name), Value in Parameters.items():
+            if (Tag, Name) not in Existing or not SameValue(
+                Existing[(Tag, Name)], Value
+            ):
+                Changes.append(("Set", Path, Tag, Name, Value))
+        for Tag, Name in Existing:
+            if (Tag, Name) not in Parameters:
+                Changes.append(("Remove", Path, Tag, Name))
+
+    # Groups that were added since the backup. Only the topmost is removed, with everything below it
+    Roots = SelectedRoots(Paths)
+    for Path in sorted(Current):
+        if Path == "" or Path in Backup or not IsSelected(Path, Roots):
+            continue
+        Parent = ParentPath(Path)
+        if IsSelected(Parent, Roots) and Parent not in Backup:
+            continue
+        Changes.append(("RemoveGroup", Path))
+    return Changes
+
+
+def SameValue(Value1, Value2) -> bool:
+    # Floats are written with limited precision, so a value that was read back may differ in the last digits
+    if isinstance(Value1, float) and isinstance(Value2, float):
+        return math.isclose(Value1, Value2, rel_tol=1e-9, abs_tol=1e-12)
+    return Value1 == Value2
+
+
+def ApplyChanges(ParamGet, Prefix: str, Changes: list) -> list:
+    """
+    Apply changes from CompareParameters through the parameter API.
+    ParamGet is FreeCAD's App.ParamGet and Prefix is "User parameter" or "System parameter".
+    Returns the changed groups that only take effect after a restart, see RESTART_GROUPS.
+    """
+    Restart = []
+    for Change in Changes:
+        Kind, Path = Change[0], Change[1]
+        if Kind == "RemoveGroup":
+            ParamGet(f"{Prefix}:{ParentPath(Path)}").RemGroup(Path.rsplit("/", 1)[-1])
+        else:
+            Group = ParamGet(f"{Prefix}:{Path}")
+            Type = PARAMETER_TYPES[Change[2]]
+            if Kind == "Set":
+                getattr(Group, "Set" + Type)(Change[3], Change[4])
+            else:
+                getattr(Group, "Rem" + Type)(Change[3])
+        for Group in RESTART_GROUPS:
+            if (Path == Group or Path.startswith(Group + "/")) and Path not in Restart:
+                Restart.append(Path)
+    return Restart
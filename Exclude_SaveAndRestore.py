@@ -0,0 +1,222 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Exclusion rules for the addon backup.
+# The rules are gitignore-like patterns:
+#   - a pattern ending with "/" only matches folders. Everything below an excluded folder is skipped.
+#   - a pattern without "/" matches the name of a file or folder at any depth, e.g. "*.pyc".
+#   - other patterns match the path relative to the folder that defines the rule, e.g. "docs/*.pdf".
+#   - empty lines and lines starting with "#" are ignored.
+# Every addon can add its own rules with a ".saveandrestoreignore" file. These rules only apply below that addon.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import re
+import stat
+import fnmatch
+
+IGNORE_FILE = ".saveandrestoreignore"
+
+# Caches, version control data and virtual environments. They can be recreated and are often the bulk of an addon.
+DEFAULT_PATTERNS = [
+    "__pycache__/",
+    "*.pyc",
+    "*.pyo",
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    "*.egg-info/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".tox/",
+    "node_modules/",
+    ".DS_Store",
+    "Thumbs.db",
+]
+
+
+class ExcludeRules:
+    """A set of exclusion patterns. See the top of this module for the syntax."""
+
+    def __init__(self, Patterns=(), Base: str = ""):
+        # The patterns the rules were created with, to record them with a backup.
+        # The rules of ignore files are not in it: they are read again from the addons
+        self.Patterns = list(Patterns)
+        # Patterns without "/" are combined into one regular expression, for files and for folders
+        self._FileNames = []
+        self._FolderNames = []
+        # (base folder, pattern, folders only) for the patterns that match a path
+        self._Paths = []
+        self._Add(self.Patterns, Base)
+
+    def _Add(self, Patterns, Base: str):
+        for Pattern in Patterns:
+            Pattern = Pattern.strip()
+            if Pattern == "" or Pattern.startswith("#"):
+                continue
+            FolderOnly = Pattern.endswith("/")
+            Pattern = Pattern.rstrip("/")
+            if "/" in Pattern:
+                self._Paths.append((Base, Pattern.lstrip("/"), FolderOnly))
+            else:
+                self._FolderNames.append(Pattern)
+                if not FolderOnly:
+                    self._FileNames.append(Pattern)
+        self._FileRegex = self._Compile(self._FileNames)
+        self._FolderRegex = self._Compile(self._FolderNames)
+        return
+
+    @staticmethod
+    def _Compile(Patterns: list):
+        if len(Patterns) == 0:
+            return None
+        return re.compile("|".join(fnmatch.translate(Pattern) for Pattern in Patterns))
+
+    def Extend(self, Patterns, Base: str = "") -> "ExcludeRules":
+        """Return new rules with Patterns added. Path patterns are relative to the folder Base."""
+        Rules = ExcludeRules()
+        Rules.Patterns = list(self.Patterns)
+        Rules._FileNames = list(self._FileNames)
+        Rules._FolderNames = list(self._FolderNames)
+        Rules._Paths = list(self._Paths)
+        Rules._Add(Patterns, Base)
+        return Rules
+
+    def IsEmpty(self) -> bool:
+        return len(self._FolderNames) == 0 and len(self._Paths) == 0
+
+    def Match(self, RelPath: str, IsFolder: bool = False) -> bool:
+        """Return True if RelPath, a "/" separated path relative to the backup folder, is excluded."""
+        Name = RelPath.rsplit("/", 1)[-1]
+        Regex = self._FolderRegex if IsFolder else self._FileRegex
+        if Regex is not None and Regex.match(Name):
+            return True
+        for Base, Pattern, FolderOnly in self._Paths:
+            if FolderOnly and not IsFolder:
+                continue
+            if Base != "":
+                if not RelPath.startswith(Base + "/"):
+                    continue
+                if fnmatch.fnmatchcase(RelPath[len(Base) + 1 :], Pattern):
+                    return True
+            elif fnmatch.fnmatchcase(RelPath, Pattern):
+                return True
+        return False
+
+
+def CreateRules(UseDefaults: bool = True, Patterns=()) -> ExcludeRules:
+    """Return the rules for a backup: the default patterns if UseDefaults is True, and Patterns."""
+    AllPatterns = list(Patterns)
+    if UseDefaults is True:
+        AllPatterns = DEFAULT_PATTERNS + AllPatterns
+    return ExcludeRules(AllPatterns)
+
+
+def SplitPatterns(Text: str) -> list:
+    """Return the patterns in a ";" separated string, as stored in the preferences."""
+    return [Pattern.strip() for Pattern in Text.split(";") if Pattern.strip() != ""]
+
+
+def ReadIgnoreFile(FileName) -> list:
+    """Return the patterns in an ignore file. An unreadable file gives no patterns."""
+    try:
+        with open(FileName, "r", encoding="utf-8") as file:
+            return file.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+
+
+def Walk(
+    SourceDir,
+    Rules: ExcludeRules = None,
+    Statistics: dict = None,
+    Prefix: str = "",
+    IgnoreFiles: bool = True,
+):
+    """
+    Yield (full path, "/" separated relative path, is folder, os.stat_result) for everything below SourceDir
+    that is not excluded. The walk uses os.scandir, so every folder is listed once and every entry is stat'ed once.
+    Excluded folders are pruned: the walk does not enter them.
+    Symbolic links are not followed: they are yielded with their own stat result (S_ISLNK is set) and are never
+    entered, also when they point to a folder. Broken links are yielded as well.
+    The skipped files and bytes are added to Statistics as "SkippedFiles" and "SkippedBytes", the pruned folders
+    as "SkippedFolders". What is inside a pruned folder is not counted: not listing it is the point of pruning.
+    Entries that can not be stat'ed are skipped as well.
+    Prefix is put before the relative paths, for a walk of a sub folder of the folder the rules are for,
+    e.g. "Addon/". With IgnoreFiles False, ignore files are not read, so only Rules apply.
+    """
+    SourceDir = os.fspath(SourceDir)
+    if Rules is None:
+        Rules = ExcludeRules()
+    if Statistics is None:
+        Statistics = {}
+    Statistics.setdefault("SkippedFiles", 0)
+    Statistics.setdefault("SkippedBytes", 0)
+    Statistics.setdefault("SkippedFolders", 0)
+
+    # The folders that are still to be walked, with their relative path and their rules
+    Stack = [(SourceDir, Prefix, Rules)]
+    while len(Stack) > 0:
+        Folder, Prefix, FolderRules = Stack.pop()
+        try:
+            with os.scandir(Folder) as Iterator:
+                Entries = list(Iterator)
+        except OSError:
+            continue
+
+        # Ignore files add rules for their own folder
+        if IgnoreFiles and any(Entry.name == IGNORE_FILE for Entry in Entries):
+            FolderRules = FolderRules.Extend(
+                ReadIgnoreFile(os.path.join(Folder, IGNORE_FILE)), Prefix.rstrip("/")
+            )
+
+        SubFolders = []
+        for Entry in Entries:
+            RelPath = Prefix + Entry.name
+            try:
+                # On POSIX, scandir already knows the type, so this lstat is the only system call
+                st = Entry.stat(follow_symlinks=False)
+                IsFolder = stat.S_ISDIR(st.st_mode)
+                if FolderRules.Match(RelPath, IsFolder):
+                    if IsFolder:
+                        Statistics["SkippedFolders"] += 1
+                    else:
+                        Statistics["SkippedFiles"] += 1
+                        Statistics["SkippedBytes"] += st.st_size
+                    continue
+            except OSError:
+                Statistics["SkippedFiles"] += 1
+                continue
+
+            yield Entry.path, RelPath, IsFolder, st
+            if IsFolder:
+                SubFolders.append((Entry.path, RelPath + "/", FolderRules))
+
+        # Walk the sub folders in the order they were listed
+        Stack.extend(reversed(SubFolders))
+    return
@@ -30,7 +30,11 @@ import shutil
 import sys
 import platform
 
-import SaveAndRestore
+# Import the timing first, so the import of SaveAndRestore can be timed
+import Timing_SaveAndRestore
+
+with Timing_SaveAndRestore.Span("import SaveAndRestore"):
+    import SaveAndRestore
 
 
 def QT_TRANSLATE_NOOP(context, text):
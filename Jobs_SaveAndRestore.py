@@ -0,0 +1,225 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Runs the long operations of the dialog on a background thread, so FreeCAD stays responsive.
+# The jobs run one after the other on a private thread pool with a single thread.
+# A timer on the GUI thread reads the progress of the running job and hands the result
+# of finished jobs to their callbacks. All callbacks therefore run on the GUI thread.
+
+import threading
+import traceback
+from collections import deque
+
+import FreeCAD as App
+from PySide.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+import Standard_Functions_SaveAndRestore as Standard_Functions
+from Backup_SaveAndRestore import JobProgress, Cancelled
+
+# Define the translation
+translate = App.Qt.translate
+
+# Interval in ms for the progress updates
+POLL_INTERVAL = 200
+
+_JobQueue = None
+
+
+class Job(QRunnable):
+    """
+    A single operation for the job queue.
+    Function is called on the worker thread as Function(Progress) and must report through Progress.
+    """
+
+    def __init__(
+        self, Name: str, Function, OnFinished=None, Cleanup=None, Cancellable=True
+    ):
+        """
+        Args:
+            Name (str): Name of the job, shown with the progress.
+            Function: The operation. Called as Function(Progress) on the worker thread.
+            OnFinished (optional): Called with the result of Function on the GUI thread.
+            Cleanup (optional): Called on the worker thread when the job fails or is cancelled.
+            Cancellable (optional): False for jobs that CancelAll must not stop, like the addon checks
+                at startup. Defaults to True.
+        """
+        super().__init__()
+        # The queue keeps the job until its result is delivered
+        self.setAutoDelete(False)
+        self.Name = Name
+        self.Function = Function
+        self.OnFinished = OnFinished
+        self.Cleanup = Cleanup
+        self.Cancellable = Cancellable
+        self.Progress = JobProgress()
+        self.Progress.SetText(Name)
+        self.State = "Queued"
+        self.Result = None
+        self.Error = ""
+        self.Done = threading.Event()
+
+    def run(self):
+        try:
+            # A job can be cancelled before it was started
+            self.Progress.Check()
+            # The time in the queue does not count for the speed and the time left
+            self.Progress.Start()
+            self.State = "Running"
+            self.Result = self.Function(self.Progress)
+            self.State = "Finished"
+        except Cancelled:
+            self.RunCleanup()
+            self.State = "Cancelled"
+        except Exception as e:
+            self.Error = f"{e}\n{traceback.format_exc()}"
+            self.RunCleanup()
+            self.State = "Failed"
+        self.Done.set()
+        return
+
+    def RunCleanup(self):
+        if self.Cleanup is not None:
+            try:
+                self.Cleanup()
+            except Exception as e:
+                self.Error = self.Error + f"\nCleanup failed: {e}"
+        return
+
+    def Deliver(self):
+        """Report the outcome of the job. Runs on the GUI thread."""
+        if self.State == "Finished":
+            if self.OnFinished is not None:
+                self.OnFinished(self.Result)
+        elif self.State == "Cancelled":
+            Standard_Functions.Print(
+                translate("FreeCAD SaveAndRestore", "{} cancelled").format(self.Name),
+                "Warning",
+            )
+        elif self.State == "Failed":
+            Standard_Functions.Print(
+                translate("FreeCAD SaveAndRestore", "{} failed: {}").format(
+                    self.Name, self.Error
+                ),
+                "Error",
+            )
+        return
+
+
+class JobQueue(QObject):
+    """Runs jobs one after the other on a background thread and reports their progress."""
+
+    # Emitted on the GUI thread with the status of the running job (see JobProgress.Status)
+    # and with None when the queue is empty.
+    progress = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # A single thread, so jobs never run at the same time on the same files
+        self.Pool = QThreadPool(self)
+        self.Pool.setMaxThreadCount(1)
+        self.Jobs = deque()
+
+        self.Timer = QTimer(self)
+        self.Timer.setInterval(POLL_INTERVAL)
+        self.Timer.timeout.connect(self.Poll)
+
+    def Submit(
+        self, Name: str, Function, OnFinished=None, Cleanup=None, Cancellable=True
+    ) -> Job:
+        """Add a job to the queue. See Job for the arguments."""
+        NewJob = Job(Name, Function, OnFinished, Cleanup, Cancellable)
+        self.Jobs.append(NewJob)
+        self.Pool.start(NewJob)
+        if not self.Timer.isActive():
+            self.Timer.start()
+        if len(self.Jobs) > 1:
+            Standard_Functions.Print(
+                translate("FreeCAD SaveAndRestore", "{} queued").format(Name), "Log"
+            )
+        self.Poll()
+        return NewJob
+
+    def Poll(self):
+        # Deliver the finished jobs in the order they were submitted
+        while len(self.Jobs) > 0 and self.Jobs[0].Done.is_set():
+            self.Jobs.popleft().Deliver()
+
+        if len(self.Jobs) == 0:
+            self.Timer.stop()
+            self.progress.emit(None)
+            return
+
+        Status = self.Jobs[0].Progress.Status()
+        Status["Queued"] = len(self.Jobs) - 1
+        self.progress.emit(Status)
+        return
+
+    def CancelAll(self):
+        """Cancel the running job and the queued jobs, except the jobs that are not cancellable."""
+        for QueuedJob in self.Jobs:
+            if QueuedJob.Cancellable is True:
+                QueuedJob.Progress.Cancel()
+        return
+
+    def IsBusy(self) -> bool:
+        return len(self.Jobs) > 0
+
+
+def ReturnJobQueue() -> JobQueue:
+    """Return the job queue that is shared by all dialogs."""
+    global _JobQueue
+    if _JobQueue is None:
+        _JobQueue = JobQueue()
+    return _JobQueue
+
+
+def FormatStatus(Status: dict) -> str:
+    """Return a line of text for the status of a running job."""
+    if Status is None:
+        return ""
+    MB = 1024 * 1024
+    Text = f"{Status['Text']}: {Status['Files']}"
+    if Status["TotalFiles"] > 0:
+        Text = Text + f"/{Status['TotalFiles']}"
+    Text = Text + f" files, {Status['Bytes'] / MB:.1f}"
+    if Status["TotalBytes"] > 0:
+        Text = Text + f"/{Status['TotalBytes'] / MB:.1f}"
+    Text = Text + f" MB, {Status['MBps']:.1f} MB/s"
+    if Status["ETA"] is not None:
+        Text = Text + f", {Status['ETA']:.0f} s left"
+    if Status.get("Queued", 0) > 0:
+        Text = Text + f" ({Status['Queued']} queued)"
+    return Text
+
+
+def ReturnPercentage(Status: dict) -> int:
+    """Return the progress of a job in percent, by bytes if the total is known, else by files."""
+    if Status is None:
+        return 0
+    if Status["TotalBytes"] > 0:
+        return min(int(100 * Status["Bytes"] / Status["TotalBytes"]), 100)
+    if Status["TotalFiles"] > 0:
+        return min(int(100 * Status["Files"] / Status["TotalFiles"]), 100)
+    return 0
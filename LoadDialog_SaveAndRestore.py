@@ -26,15 +26,36 @@ SOFTWARE.
 import FreeCAD as App
 import FreeCADGui as Gui
 import os
+import io
 from stat import S_IREAD, S_IRGRP, S_IROTH
 from PySide.QtCore import Qt, SIGNAL, QProcess
-from PySide.QtWidgets import QApplication, QLabel, QToolBar, QMenu
+from PySide.QtWidgets import (
+    QApplication,
+    QLabel,
+    QToolBar,
+    QMenu,
+    QDialog,
+    QDialogButtonBox,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+    QLineEdit,
+    QPushButton,
+)
 from PySide.QtGui import QGuiApplication, QAction, QIcon, QPixmap
 import sys
 from datetime import datetime
 import Standard_Functions_SaveAndRestore as Standard_Functions
 import zipfile_SaveAndRestore
 from zipfile_SaveAndRestore import ZipFile
+import Backup_SaveAndRestore
+import Restore_SaveAndRestore
+import Store_SaveAndRestore
+import Jobs_SaveAndRestore
+import Exclude_SaveAndRestore
+import Config_SaveAndRestore
+import Catalog_SaveAndRestore
+import Addons_SaveAndRestore
 import Parameters_SaveAndRestore
 import StyleMapping_SaveAndRestore
 import platform
@@ -126,6 +147,38 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
             on_RestoreMod_clicked,
         )   
 
+        # Connect the snapshot export function
+        def on_ExportSnapshot_clicked():
+            self.ExportSnapshot()
+
+        self.form.ExportSnapshot.connect(
+            self.form.ExportSnapshot,
+            SIGNAL("clicked()"),
+            on_ExportSnapshot_clicked,
+        )
+        # The export is only useful when the snapshot store is used
+        self.form.ExportSnapshot.setVisible(
+            Parameters_SaveAndRestore.BACKUP_BACKEND == "Store"
+        )
+
+        # Run the long operations on the background job queue and show their progress.
+        # The queue is shared, so jobs from a previous dialog are shown as well.
+        self.JobQueue = Jobs_SaveAndRestore.ReturnJobQueue()
+        self.JobQueue.progress.connect(self.ShowProgress)
+        # A closed dialog must not get the progress anymore. The close event of a dialog rejects it,
+        # which emits finished
+        self.form.finished.connect(self.DisconnectJobQueue)
+
+        # Connect the cancel button
+        def on_CancelJob_clicked():
+            self.JobQueue.CancelAll()
+
+        self.form.CancelJob.connect(
+            self.form.CancelJob,
+            SIGNAL("clicked()"),
+            on_CancelJob_clicked,
+        )
+
         # Connect the restore ToolBars function
         def on_EnableToolbars_clicked():
             # Hide the dialog
@@ -187,6 +240,69 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
 
         return
 
+    def ShowProgress(self, Status):
+        # Show the progress of the running job in the dialog and in the status bar
+        Text = Jobs_SaveAndRestore.FormatStatus(Status)
+        self.form.ProgressLabel.setText(Text)
+        self.form.ProgressBar.setValue(Jobs_SaveAndRestore.ReturnPercentage(Status))
+        self.form.CancelJob.setEnabled(Status is not None)
+        if Status is None:
+            mw.statusBar().clearMessage()
+        else:
+            mw.statusBar().showMessage(Text)
+        return
+
+    def DisconnectJobQueue(self):
+        # The jobs keep running, and are shown by the next dialog
+        try:
+            self.JobQueue.progress.disconnect(self.ShowProgress)
+        except (RuntimeError, TypeError):
+            # Already disconnected
+            pass
+        return
+
+    def ReturnExcludeRules(self):
+        # The exclusion rules for the addon backup, from the preferences
+        return Exclude_SaveAndRestore.CreateRules(
+            Parameters_SaveAndRestore.USE_DEFAULT_EXCLUDES,
+            Exclude_SaveAndRestore.SplitPatterns(
+                Parameters_SaveAndRestore.EXCLUDE_PATTERNS
+            ),
+        )
+
+    def ReturnRestoreRules(self, Fullname):
+        # The exclusion rules the addon backup Fullname was made with. What they match was not backed up,
+        # so a restore must leave it alone. Backups of older versions did not record them: use the preferences
+        Rules = None
+        if Fullname.lower().endswith(".json"):
+            Patterns = Store_SaveAndRestore.ReadSnapshot(Fullname).get("Exclude")
+            if Patterns is not None:
+                Rules = Exclude_SaveAndRestore.ExcludeRules(Patterns)
+        else:
+            Rules = Restore_SaveAndRestore.ReadExcludeRules(Fullname)
+        if Rules is None:
+            Rules = self.ReturnExcludeRules()
+        return Rules
+
+    def RemoveFile(self, FileName):
+        # Used to remove partial archives of cancelled or failed jobs
+        if FileName is not None and os.path.exists(FileName):
+            os.remove(FileName)
+        return
+
+    def ReturnArchiveComment(self) -> bytes:
+        # The archive comment records the FreeCAD version, for the backup catalog
+        return Catalog_SaveAndRestore.ReturnComment(".".join(App.Version()[:3]))
+
+    def RegisterBackup(self, Fullname, Registry=None):
+        # Runs on the background thread. Adds a new archive to the backup catalog.
+        # The archive is fine without it: the catalog indexes it when it is refreshed
+        try:
+            Catalog_SaveAndRestore.Register(Fullname, Registry)
+        except Exception as e:
+            Standard_Functions.Print(f"Backup catalog not updated: {e}", "Log")
+        return
+
     def SaveSettings(self):
         # Define the paths for the config files
         UserConfig = App.getUserConfigDir() + "user.cfg"
@@ -218,27 +334,89 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
                 SaveAs=True,
             )
             if Fullname is not None and Fullname != "":
-                # Create the zipfile with the config files
-                # if not platform.system() == "Darwin":
-                with ZipFile(Fullname, "w") as zipObj:
-                    for File in Files:
-                        zipObj.write(File, File.split(os.sep)[-1])
-                # if platform.system() == "Darwin":
-                # for File in Files:
-                #     self.WriteZip_MacOS(Fullname, File)
+                # Create the zipfile with the config files on the background thread.
+                # With Groups, only these parameter groups of user.cfg are saved, as a fragment
+                Comment = self.ReturnArchiveComment()
 
-            # Write the path to preferences
-            Parameters_SaveAndRestore.Settings.SetStringSetting(
-                "SaveDirectory", os.path.dirname(Fullname)
-            )
-            Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
+                def WriteSettings(Progress, Groups=None):
+                    Progress.SetTotal(
+                        len(Files), sum(os.path.getsize(File) for File in Files)
+                    )
+                    with ZipFile(
+                        Fullname,
+                        "w",
+                        sequential=Parameters_SaveAndRestore.SEQUENTIAL_WRITE,
+                    ) as zipObj:
+                        zipObj.comment = Comment
+                        for File in Files:
+                            Progress.Check()
+                            if File == UserConfig and Groups is not None:
+                                with zipObj.open(
+                                    Config_SaveAndRestore.ReturnFragmentName(
+                                        "user.cfg"
+                                    ),
+                                    "w",
+                                ) as Target:
+                                    Config_SaveAndRestore.ExtractGroups(
+                                        File, Groups, Target
+                                    )
+                            else:
+                                zipObj.write(File, File.split(os.sep)[-1])
+                            Progress.Add(1, os.path.getsize(File))
+                    self.RegisterBackup(Fullname)
+                    return
 
-            print(
-                translate(
-                    "FreeCAD SaveAndRestore",
-                    f'Settings saved as "{FileName}" to "{os.path.dirname(Fullname)}"',
-                )
-            )
+                def OnFinished(Result):
+                    # Write the path to preferences
+                    Parameters_SaveAndRestore.Settings.SetStringSetting(
+                        "SaveDirectory", os.path.dirname(Fullname)
+                    )
+                    Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
+
+                    print(
+                        translate(
+                            "FreeCAD SaveAndRestore",
+                            f'Settings saved as "{FileName}" to "{os.path.dirname(Fullname)}"',
+                        )
+                    )
+                    return
+
+                def SubmitSave(Groups=None):
+                    self.JobQueue.Submit(
+                        translate("FreeCAD SaveAndRestore", "Save settings"),
+                        lambda Progress: WriteSettings(Progress, Groups),
+                        OnFinished=OnFinished,
+                        Cleanup=lambda: self.RemoveFile(Fullname),
+                    )
+                    return
+
+                # Let the user choose the parameter groups to save
+                def OnListed(Groups):
+                    if Groups is None:
+                        return
+                    Selected = self.SelectGroups(
+                        Groups,
+                        translate("FreeCAD SaveAndRestore", "Save settings"),
+                    )
+                    if Selected is None or len(Selected) == 0:
+                        return
+                    # With every group selected, user.cfg is saved as a whole
+                    SubmitSave(None if len(Selected) == len(Groups) else Selected)
+                    return
+
+                if (
+                    Parameters_SaveAndRestore.SELECT_PARAMETER_GROUPS is True
+                    and UserConfig in Files
+                ):
+                    # Write the current parameters to user.cfg first
+                    App.saveParameter()
+                    self.JobQueue.Submit(
+                        translate("FreeCAD SaveAndRestore", "Read settings"),
+                        lambda Progress: self.ListParameterGroups(UserConfig),
+                        OnFinished=OnListed,
+                    )
+                else:
+                    SubmitSave()
         else:
             Standard_Functions.Mbox(
                 translate(
@@ -261,175 +439,321 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
         if self.form.IncludeSystem_Restore.checkState() == Qt.CheckState.Checked:
             Files.append(SystemConfig)
 
-        # If at least one config file is checked, select the zipfile with the config files via a file open dialog
+        # If at least one config file is checked, select the zipfile with the config files
         if len(Files) > 0:
-            Fullname = Standard_Functions.GetFileDialog(
-                Filter="Archive (*.zip)",
-                parent=self.form,
-                DefaultPath=Parameters_SaveAndRestore.SAVE_DIRECTORY,
-                SaveAs=False,
+            self.ChooseBackup(
+                "Settings", lambda Fullname: self.RestoreSettingsFrom(Fullname, Files)
             )
-            if Fullname != "" and Fullname is not None:
-                self.form.hide()
-                answer = Standard_Functions.RestartDialog(
-                    translate(
-                        "FreeCAD SaveAndRestore",
-                        "Do you really restore these settings?",
-                    ),
-                    True,
-                    translate("FreeCAD SaveAndRestore", "Restore and restart"),
-                    translate("FreeCAD SaveAndRestore", "Cancel"),
+        else:
+            Standard_Functions.Mbox(
+                translate(
+                    "FreeCAD SaveAndRestore",
+                    "Please select at least one config file!",
+                    "Warning",
                 )
-                if answer == "no":
+            )
+        return
+
+    def RestoreSettingsFrom(self, Fullname, Files):
+        # Restore the config files Files from the settings archive Fullname
+        UserConfig = "user.cfg"
+        if (
+            Parameters_SaveAndRestore.SELECT_PARAMETER_GROUPS is True
+            and UserConfig in Files
+        ):
+            # Let the user choose the parameter groups to restore, from the backup
+            def OnListed(Groups):
+                if Groups is None:
                     return
-                if answer == "yes":
-                    # Set the wait cursor
-                    QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+                Selected = self.SelectGroups(
+                    Groups,
+                    translate("FreeCAD SaveAndRestore", "Restore settings"),
+                )
+                if Selected is None or len(Selected) == 0:
+                    return
+                # With every group selected, the backup is restored as it was saved
+                if len(Selected) == len(Groups):
+                    Selected = None
+                self.ConfirmRestoreSettings(Fullname, Files, Selected)
+                return
 
-                    # Extract the zipfile and place the config files
-                    if Fullname is not None and Fullname != "":
-                        if not platform.system() == "Darwin":
-                            # loading the temp.zip and creating a zip object
-                            with ZipFile(Fullname, "r") as zipObj:
-                                # Extracting all the members of the zip
-                                # into a specific location.
-                                counter = 0
-                                for File in Files:
-                                    # Delete the files first to be sure that the file will be from the zipfile.
-                                    if platform.system() == "Windows":
-                                        subprocess.run(
-                                            os.path.join(
-                                                os.path.dirname(__file__),
-                                                "DeleteFile.bat",
-                                            )
-                                            + " "
-                                            + App.getUserConfigDir()
-                                            + File
-                                        )
-                                    if (
-                                        platform.system() == "Linux"
-                                        or platform.system() == "Darwin"
-                                    ):
-                                        subprocess.run(
-                                            [
-                                                "bash",
-                                                os.path.join(
-                                                    os.path.dirname(__file__),
-                                                    "DeleteFile.sh",
-                                                ),
-                                                App.getUserConfigDir() + File,
-                                            ]
-                                        )
-
-                                    # Extract the file from the zip file into the config directory
-                                    try:
-                                        for info in zipObj.infolist():
-                                            if File in info.filename:
-                                                zipObj.extract(
-                                                    info, App.getUserConfigDir()
-                                                )
-
-                                        # Set the file to read only to prevent from FreeCAD from overwrite the file after shutdown
-                                        os.chmod(App.getUserConfigDir() + File, S_IREAD)
-                                    except Exception as e:
-                                        print(e)
-                                        counter = counter + 1
-                                        Standard_Functions.Print(
-                                            f"{File} not present in archive", "Warning"
-                                        )
-                                        continue
-                                if counter == len(Files):
-                                    Standard_Functions.Print(
-                                        "There were no files to restore.", "Error"
-                                    )
-                                    # Return to the normal cursor
-                                    QApplication.setOverrideCursor(
-                                        Qt.CursorShape.ArrowCursor
-                                    )
-                                    return
-
-                        if platform.system() == "Darwin":
-                            counter = 0
-                            for File in Files:
-                                self.extract_with_permission(
-                                    ZipFile(Fullname),
-                                    os.path.basename(File),
-                                    os.path.dirname(Fullname),
-                                )
-                                time.sleep(1)
-                                try:
-                                    # Delete the current files
-                                    subprocess.run(
-                                        [
-                                            "bash",
-                                            "DeleteFile.sh",
-                                            App.getUserConfigDir() + File,
-                                        ]
-                                    )
+            self.JobQueue.Submit(
+                translate("FreeCAD SaveAndRestore", "Read backup"),
+                lambda Progress: self.ListArchiveGroups(Fullname),
+                OnFinished=OnListed,
+            )
+        else:
+            self.ConfirmRestoreSettings(Fullname, Files)
+        return
 
-                                    # Move the extracted files to the config location
-                                    shutil.move(
-                                        os.path.join(
-                                            os.path.dirname(Fullname),
-                                            os.path.basename(File),
-                                        ),
-                                        App.getUserConfigDir() + File,
-                                    )
-                                    time.sleep(1)
-                                    # Set the file to read only to prevent from FreeCAD from overwrite the file after shutdown
-                                    # os.chmod(App.getUserConfigDir() + File, S_IREAD)
-
-                                except Exception as e:
-                                    print(e)
-                                    counter = counter + 1
-                                    Standard_Functions.Print(
-                                        f"{File} not present in archive", "Warning"
-                                    )
-                                    continue
-                            if counter == len(Files):
-                                Standard_Functions.Print(
-                                    "There were no files to restore.", "Error"
-                                )
-                                # Return to the normal cursor
-                                QApplication.setOverrideCursor(
-                                    Qt.CursorShape.ArrowCursor
-                                )
-                                return
+    def ConfirmRestoreSettings(self, Fullname, Files, Groups=None):
+        # Ask to restore and restart, and restore the config files on the background thread.
+        # With Groups, only these parameter groups of user.cfg are restored
+        if Parameters_SaveAndRestore.LIVE_RESTORE is True:
+            self.ApplySettings(Fullname, Files, Groups)
+            return
 
-                        # Write the path to preferences
-                        Parameters_SaveAndRestore.Settings.SetStringSetting(
-                            "SaveDirectory", os.path.dirname(Fullname)
-                        )
-                        Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(
-                            Fullname
-                        )
+        self.form.hide()
+        answer = Standard_Functions.RestartDialog(
+            translate(
+                "FreeCAD SaveAndRestore",
+                "Do you really restore these settings?",
+            ),
+            True,
+            translate("FreeCAD SaveAndRestore", "Restore and restart"),
+            translate("FreeCAD SaveAndRestore", "Cancel"),
+        )
+        if answer == "no":
+            return
+        if answer == "yes":
+            # Show the dialog again for the progress
+            self.form.show()
 
-                        # print a message
-                        print(
-                            translate(
-                                "FreeCAD SaveAndRestore",
-                                f'Settings restored from "{Fullname}"',
-                            )
-                        )
+            def OnFinished(Restored):
+                if Restored is False:
+                    return
 
-                        # Return to the normal cursor
-                        QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
+                # Write the path to preferences
+                Parameters_SaveAndRestore.Settings.SetStringSetting(
+                    "SaveDirectory", os.path.dirname(Fullname)
+                )
+                Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
 
-                        # Restart FreeCAD
-                        Standard_Functions.restart_freecad()
-            else:
-                Standard_Functions.Mbox(
+                # print a message
+                print(
                     translate(
                         "FreeCAD SaveAndRestore",
-                        "Please select at least one config file!",
-                        "Warning",
+                        f'Settings restored from "{Fullname}"',
                     )
                 )
 
-            # Return to the normal cursor
-            QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
+                # Restart FreeCAD
+                Standard_Functions.restart_freecad()
+                return
+
+            # Extract the zipfile and place the config files on the background thread
+            self.JobQueue.Submit(
+                translate("FreeCAD SaveAndRestore", "Restore settings"),
+                lambda Progress: self.RestoreSettingsFiles(
+                    Fullname, Files, Progress, Groups
+                ),
+                OnFinished=OnFinished,
+            )
+        return
+
+    def ApplySettings(self, Fullname, Files, Groups=None):
+        # Restore the settings in the running FreeCAD. The backup is compared with the current settings on the
+        # background thread, and only the differences are applied through the parameter API.
+        # FreeCAD is only restarted for the groups that it reads at startup.
+        answer = Standard_Functions.Mbox(
+            translate(
+                "FreeCAD SaveAndRestore", "Do you really restore these settings?"
+            ),
+            "FreeCAD SaveAndRestore",
+            1,
+            "Question",
+        )
+        if answer != "yes":
             return
 
+        # Write the current parameters to the config files, so they can be compared with the backup
+        App.saveParameter("User parameter")
+        App.saveParameter("System parameter")
+
+        def OnFinished(Changes):
+            if Changes is None:
+                return
+            Restart = []
+            Counter = 0
+            for File, FileChanges in Changes.items():
+                Prefix = (
+                    "System parameter" if File == "system.cfg" else "User parameter"
+                )
+                Restart.extend(
+                    Config_SaveAndRestore.ApplyChanges(
+                        App.ParamGet, Prefix, FileChanges
+                    )
+                )
+                Counter = Counter + len(FileChanges)
+            App.saveParameter("User parameter")
+            App.saveParameter("System parameter")
+
+            # Write the path to preferences
+            Parameters_SaveAndRestore.Settings.SetStringSetting(
+                "SaveDirectory", os.path.dirname(Fullname)
+            )
+            Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
+
+            print(
+                translate(
+                    "FreeCAD SaveAndRestore",
+                    'Settings restored from "{}", {} parameters changed',
+                ).format(Fullname, Counter)
+            )
+
+            if len(Restart) > 0:
+                answer = Standard_Functions.RestartDialog(
+                    translate(
+                        "FreeCAD SaveAndRestore",
+                        "These settings take effect after a restart:",
+                    )
+                    + "\n\n"
+                    + "\n".join(Restart),
+                    True,
+                )
+                if answer == "yes":
+                    Standard_Functions.restart_freecad()
+            return
+
+        self.JobQueue.Submit(
+            translate("FreeCAD SaveAndRestore", "Compare settings"),
+            lambda Progress: self.CompareSettings(Fullname, Files, Progress, Groups),
+            OnFinished=OnFinished,
+        )
+        return
+
+    def CompareSettings(self, Fullname, Files, Progress, Groups=None) -> dict:
+        # Runs on the background thread. Returns {config file: changes} to restore the backup,
+        # or None if there was nothing to restore. With Groups, only these parameter groups of user.cfg are compared.
+        Progress.SetTotal(len(Files), 0)
+        Changes = {}
+        with ZipFile(Fullname, "r") as zipObj:
+            Names = zipObj.namelist()
+            for File in Files:
+                Progress.Check()
+                Member = File
+                Paths = Groups if File == "user.cfg" and Groups is not None else [""]
+                if File not in Names:
+                    # A backup of selected groups only
+                    Member = Config_SaveAndRestore.ReturnFragmentName(File)
+                    if Member not in Names:
+                        Standard_Functions.Print(
+                            f"{File} not present in archive", "Warning"
+                        )
+                        continue
+                    if Paths == [""]:
+                        with zipObj.open(Member) as Source:
+                            Paths = Config_SaveAndRestore.FragmentGroups(Source)
+                with zipObj.open(Member) as Source:
+                    Backup = Config_SaveAndRestore.ReadParameters(Source, Paths)
+                Current = Config_SaveAndRestore.ReadParameters(
+                    App.getUserConfigDir() + File, Paths
+                )
+                Changes[File] = Config_SaveAndRestore.CompareParameters(
+                    Backup, Current, Paths
+                )
+                Progress.Add(1, 0)
+        if len(Changes) == 0:
+            Standard_Functions.Print("There were no files to restore.", "Error")
+            return None
+        return Changes
+
+    def ListParameterGroups(self, FileName) -> list:
+        # Runs on the background thread. Returns None if the config file could not be read.
+        try:
+            return Config_SaveAndRestore.ListGroups(FileName)
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{FileName} could not be read", "Warning")
+            return None
+
+    def ListArchiveGroups(self, Fullname) -> list:
+        # Runs on the background thread. Returns the parameter groups of user.cfg in a settings backup,
+        # or None if the backup could not be read. A backup of selected groups only lists these groups.
+        FragmentName = Config_SaveAndRestore.ReturnFragmentName("user.cfg")
+        try:
+            with ZipFile(Fullname, "r") as zipObj:
+                Names = zipObj.namelist()
+                if "user.cfg" in Names:
+                    with zipObj.open("user.cfg") as Source:
+                        return Config_SaveAndRestore.ListGroups(Source)
+                if FragmentName in Names:
+                    with zipObj.open(FragmentName) as Source:
+                        return Config_SaveAndRestore.FragmentGroups(Source)
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{Fullname} could not be read", "Warning")
+            return None
+        Standard_Functions.Print("user.cfg not present in archive", "Warning")
+        return None
+
+    def RestoreSettingsFiles(self, Fullname, Files, Progress, Groups=None) -> bool:
+        # Runs on the background thread. Returns False if there was nothing to restore.
+        # Every config file is extracted next to the current one and then swapped in,
+        # so a failed restore never leaves a half written config file behind.
+        # The replaced config file is kept with the suffix ".previous" as rollback point.
+        # With Groups, or for a backup of selected groups, only these parameter groups of user.cfg are restored.
+        Progress.SetTotal(len(Files), 0)
+        counter = 0
+        with ZipFile(Fullname, "r") as zipObj:
+            for File in Files:
+                Progress.Check()
+                Target = App.getUserConfigDir() + File
+                try:
+                    if File == "user.cfg" and self.RestoreParameterGroups(
+                        zipObj, Target, Groups
+                    ):
+                        Progress.Add(1, 0)
+                        if not platform.system() == "Darwin":
+                            os.chmod(Target, S_IREAD)
+                        continue
+                    Members = [
+                        info for info in zipObj.infolist() if File in info.filename
+                    ]
+                    if len(Members) == 0:
+                        raise KeyError(
+                            f"There is no item named {File!r} in the archive"
+                        )
+                    Restore_SaveAndRestore.RestoreFile(
+                        zipObj,
+                        Members[-1],
+                        Target,
+                        KeepPermissions=platform.system() == "Darwin",
+                    )
+                    Progress.Add(1, Members[-1].file_size)
+
+                    # Set the file to read only to prevent from FreeCAD from overwrite the file after shutdown
+                    if not platform.system() == "Darwin":
+                        os.chmod(Target, S_IREAD)
+                except Exception as e:
+                    print(e)
+                    counter = counter + 1
+                    Standard_Functions.Print(
+                        f"{File} not present in archive", "Warning"
+                    )
+                    continue
+        if counter == len(Files):
+            Standard_Functions.Print("There were no files to restore.", "Error")
+            return False
+        return True
+
+    def RestoreParameterGroups(self, zipObj, Target, Groups=None) -> bool:
+        # Runs on the background thread. Merges parameter groups from the backup into the config file Target.
+        # Returns False if the whole config file is to be restored instead.
+        FragmentName = Config_SaveAndRestore.ReturnFragmentName("user.cfg")
+        Names = zipObj.namelist()
+        if "user.cfg" in Names:
+            if Groups is None:
+                return False
+            # Take the selected groups from the full config file
+            Fragment = io.BytesIO()
+            with zipObj.open("user.cfg") as Source:
+                Config_SaveAndRestore.ExtractGroups(Source, Groups, Fragment)
+            Fragment.seek(0)
+        elif FragmentName in Names:
+            with zipObj.open(FragmentName) as Source:
+                Fragment = io.BytesIO(Source.read())
+            if Groups is None:
+                Groups = Config_SaveAndRestore.FragmentGroups(Fragment)
+                Fragment.seek(0)
+        else:
+            return False
+        # A read only config file can not be replaced on Windows
+        if os.path.exists(Target):
+            os.chmod(Target, os.stat(Target).st_mode | stat.S_IWRITE)
+        Config_SaveAndRestore.RestoreGroups(Target, Fragment, Groups)
+        return True
+
     def ClearSettings(self):
         # Define the paths for the config files
         UserConfig = App.getUserConfigDir() + "user.cfg"
@@ -453,41 +777,49 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
                 translate("FreeCAD SaveAndRestore", "Cancel"),
             )
             if answer == "yes":
-                # Set the wait cursor
-                QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-                # Remove the file(s)
-                for File in Files:
-                    if platform.system() == "Windows":
-                        subprocess.run(
-                            os.path.join(os.path.dirname(__file__), "DeleteFile.bat")
-                            + " "
-                            + File
-                        )
-                    if platform.system() == "Linux" or platform.system() == "Darwin":
-                        subprocess.run(
-                            [
-                                "bash",
+                # Remove the file(s) on the background thread
+                def ClearFiles(Progress):
+                    Progress.SetTotal(len(Files), 0)
+                    for File in Files:
+                        Progress.Check()
+                        if platform.system() == "Windows":
+                            subprocess.run(
                                 os.path.join(
-                                    os.path.dirname(__file__), "DeleteFile.sh"
-                                ),
-                                File,
-                            ]
-                        )
+                                    os.path.dirname(__file__), "DeleteFile.bat"
+                                )
+                                + " "
+                                + File
+                            )
+                        if (
+                            platform.system() == "Linux"
+                            or platform.system() == "Darwin"
+                        ):
+                            subprocess.run(
+                                [
+                                    "bash",
+                                    os.path.join(
+                                        os.path.dirname(__file__), "DeleteFile.sh"
+                                    ),
+                                    File,
+                                ]
+                            )
 
-                    # Create empty files, which will be filled at startup
-                    with open(File, "w") as file:
-                        pass
+                        # Create empty files, which will be filled at startup
+                        with open(File, "w") as file:
+                            pass
 
-                    # Set the file to read only to prevent from FreeCAD from overwrite the file after shutdown
-                    os.chmod(File, S_IREAD)
-
-                # Return to the normal cursor
-                QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
+                        # Set the file to read only to prevent from FreeCAD from overwrite the file after shutdown
+                        os.chmod(File, S_IREAD)
+                        Progress.Add(1)
+                    return
 
                 # Restart FreeCAD
-                Standard_Functions.restart_freecad()
+                self.JobQueue.Submit(
+                    translate("FreeCAD SaveAndRestore", "Clear settings"),
+                    ClearFiles,
+                    OnFinished=lambda Result: Standard_Functions.restart_freecad(),
+                )
         else:
-            QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
             Standard_Functions.Mbox(
                 translate(
                     "FreeCAD SaveAndRestore",
@@ -505,6 +837,11 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
         now = datetime.now()
         Prefix = now.strftime("%Y_%m_%d_%H_%M_%S")
 
+        # With the snapshot store, the snapshot is added to the store in the save directory
+        if Parameters_SaveAndRestore.BACKUP_BACKEND == "Store":
+            self.BackupModToStore(ModDir, f"{Prefix} - FreeCAD Addons.json")
+            return
+
         # Define the filename
         FileName = f"{Prefix} - FreeCAD Addons.zip"
 
@@ -518,41 +855,219 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
             SaveAs=True,
         )
         if Fullname is not None and Fullname != "":
-            # Create the zipfile with the config files
-            # if not platform.system() == "Darwin":            
-            with ZipFile(Fullname, "w") as zipObj:
-                # for DirName, SubDirs, Files in os.walk(ModDir):
-                    # for File in Files:
-                    #     zipObj.write(DirName, ModDir.split(os.sep)[-1])
-                for entry in ModDir.rglob("*"):
-                    zipObj.write(entry, entry.relative_to(ModDir))
-            # if platform.system() == "Darwin":
-            # for File in Files:
-            #     self.WriteZip_MacOS(Fullname, File)
-
-        # Write the path to preferences
-        Parameters_SaveAndRestore.Settings.SetStringSetting(
-            "SaveDirectory", os.path.dirname(Fullname)
-        )
-        Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
-
-        print(
-            translate(
-                "FreeCAD SaveAndRestore",
-                f'Settings saved as "{FileName}" to "{os.path.dirname(Fullname)}"',
+            # In incremental mode, build on top of the latest addon backup in the same folder
+            Parent = ""
+            if Parameters_SaveAndRestore.INCREMENTAL_BACKUP is True:
+                Parent = Backup_SaveAndRestore.FindLatestBackup(
+                    os.path.dirname(Fullname), Exclude=Fullname
+                )
+                if Parent != "":
+                    print(
+                        translate(
+                            "FreeCAD SaveAndRestore",
+                            'Incremental backup on top of "{}"',
+                        ).format(os.path.basename(Parent))
+                    )
+
+            # Create the zipfile with the addons on the background thread.
+            # In parallel mode, the files are compressed on all cores.
+            # The compression policy chooses per file whether and how it is compressed.
+            # A cancelled or failed backup removes its partial archive.
+            Exclude = self.ReturnExcludeRules()
+            Comment = self.ReturnArchiveComment()
+
+            def WriteArchive(Progress):
+                if Parameters_SaveAndRestore.PARALLEL_BACKUP is True:
+                    return Backup_SaveAndRestore.BackupDirectory(
+                        ModDir,
+                        Fullname,
+                        Parallel=True,
+                        Workers=Parameters_SaveAndRestore.WORKER_THREADS,
+                        Compression=zipfile_SaveAndRestore.ZIP_DEFLATED,
+                        Parent=Parent,
+                        Progress=Progress,
+                        Exclude=Exclude,
+                        Policy=Parameters_SaveAndRestore.COMPRESSION_POLICY,
+                        Sequential=Parameters_SaveAndRestore.SEQUENTIAL_WRITE,
+                        StageLocally=Parameters_SaveAndRestore.STAGE_ARCHIVE_LOCALLY,
+                        Comment=Comment,
+                    )
+                return Backup_SaveAndRestore.BackupDirectory(
+                    ModDir,
+                    Fullname,
+                    Parallel=False,
+                    Compression=zipfile_SaveAndRestore.ZIP_STORED,
+                    Parent=Parent,
+                    Progress=Progress,
+                    Exclude=Exclude,
+                    Policy=Parameters_SaveAndRestore.COMPRESSION_POLICY,
+                    Sequential=Parameters_SaveAndRestore.SEQUENTIAL_WRITE,
+                    StageLocally=Parameters_SaveAndRestore.STAGE_ARCHIVE_LOCALLY,
+                    Comment=Comment,
+                )
+
+            def WriteBackup(Progress):
+                Statistics = WriteArchive(Progress)
+                # The registry gives the catalog the versions of the addons. It is only read here:
+                # the addon check at startup owns the file
+                try:
+                    Registry = Addons_SaveAndRestore.AddonRegistry(
+                        Addons_SaveAndRestore.ReturnRegistryPath(
+                            App.getUserAppDataDir()
+                        )
+                    ).Update(ModDir)
+                except OSError:
+                    Registry = None
+                self.RegisterBackup(Fullname, Registry)
+                return Statistics
+
+            def OnFinished(Statistics):
+                # Write the path to preferences
+                Parameters_SaveAndRestore.Settings.SetStringSetting(
+                    "SaveDirectory", os.path.dirname(Fullname)
+                )
+                Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(Fullname)
+
+                print(
+                    translate(
+                        "FreeCAD SaveAndRestore",
+                        'Addons saved as "{}" to "{}"',
+                    ).format(os.path.basename(Fullname), os.path.dirname(Fullname))
+                )
+                Standard_Functions.Print(
+                    f"Addon backup: {Backup_SaveAndRestore.FormatStatistics(Statistics)}",
+                    "Log",
+                )
+                return
+
+            self.JobQueue.Submit(
+                translate("FreeCAD SaveAndRestore", "Addon backup"),
+                WriteBackup,
+                OnFinished=OnFinished,
             )
-        )
         return
     
-    def RestoreMod(self):
-        ModDir = os.path.join(App.getUserAppDataDir(), "Mod")
-        
+    def BackupModToStore(self, ModDir, FileName):
+        StoreDir = Store_SaveAndRestore.ReturnStoreDir(
+            Parameters_SaveAndRestore.SAVE_DIRECTORY
+        )
+
+        Exclude = self.ReturnExcludeRules()
+
+        def OnFinished(Result):
+            SnapshotPath, Statistics = Result
+            print(
+                translate(
+                    "FreeCAD SaveAndRestore",
+                    'Addons saved as snapshot "{}" to "{}"',
+                ).format(FileName, StoreDir)
+            )
+            Standard_Functions.Print(
+                f"Addon snapshot: {Statistics['Files']} files, "
+                + f"{Statistics['NewObjects']} new objects ({Statistics['StoredBytes'] / (1024 * 1024):.1f} MB added to the store) "
+                + f"in {Statistics['Seconds']:.2f} s, "
+                + f"skipped {Statistics['SkippedFiles']} files ({Statistics['SkippedBytes'] / (1024 * 1024):.1f} MB) "
+                + f"and {Statistics['SkippedFolders']} folders",
+                "Log",
+            )
+            return
+
+        # Add the snapshot on the background thread
+        self.JobQueue.Submit(
+            translate("FreeCAD SaveAndRestore", "Addon snapshot"),
+            lambda Progress: Store_SaveAndRestore.CreateSnapshot(
+                ModDir,
+                StoreDir,
+                FileName,
+                Workers=Parameters_SaveAndRestore.WORKER_THREADS,
+                Keep=Parameters_SaveAndRestore.KEEP_SNAPSHOTS,
+                Progress=Progress,
+                Exclude=Exclude,
+            ),
+            OnFinished=OnFinished,
+        )
+        return
+
+    def ExportSnapshot(self):
+        StoreDir = Store_SaveAndRestore.ReturnStoreDir(
+            Parameters_SaveAndRestore.SAVE_DIRECTORY
+        )
+
+        # Select the snapshot
+        SnapshotPath = Standard_Functions.GetFileDialog(
+            Filter="Snapshot (*.json)",
+            parent=self.form,
+            DefaultPath=os.path.join(StoreDir, "snapshots"),
+            SaveAs=False,
+        )
+        if SnapshotPath is None or SnapshotPath == "":
+            return
+
+        # Get the zip file to write
+        FileName = os.path.splitext(os.path.basename(SnapshotPath))[0] + ".zip"
         Fullname = Standard_Functions.GetFileDialog(
             Filter="Archive (*.zip)",
             parent=self.form,
-            DefaultPath=Parameters_SaveAndRestore.SAVE_DIRECTORY,
-            SaveAs=False,
+            DefaultPath=os.path.join(
+                Parameters_SaveAndRestore.SAVE_DIRECTORY, FileName
+            ),
+            SaveAs=True,
         )
+        if Fullname is None or Fullname == "":
+            return
+
+        def OnFinished(Result):
+            print(
+                translate(
+                    "FreeCAD SaveAndRestore",
+                    'Snapshot exported as "{}" to "{}"',
+                ).format(os.path.basename(Fullname), os.path.dirname(Fullname))
+            )
+            return
+
+        # Export the snapshot on the background thread
+        self.JobQueue.Submit(
+            translate("FreeCAD SaveAndRestore", "Snapshot export"),
+            lambda Progress: Store_SaveAndRestore.ExportSnapshot(
+                SnapshotPath,
+                Fullname,
+                Progress=Progress,
+                Sequential=Parameters_SaveAndRestore.SEQUENTIAL_WRITE,
+                StageLocally=Parameters_SaveAndRestore.STAGE_ARCHIVE_LOCALLY,
+            ),
+            OnFinished=OnFinished,
+        )
+        return
+
+    def RestoreMod(self):
+        # Snapshots from the snapshot store can be restored as well
+        DefaultPath = Parameters_SaveAndRestore.SAVE_DIRECTORY
+        Filter = "Archive (*.zip);;Snapshot (*.json)"
+        if Parameters_SaveAndRestore.BACKUP_BACKEND == "Store":
+            DefaultPath = os.path.join(
+                Store_SaveAndRestore.ReturnStoreDir(DefaultPath), "snapshots"
+            )
+            Filter = "Snapshot (*.json);;Archive (*.zip)"
+
+        # The catalog only lists archives, snapshots are picked with the file open dialog
+        if Parameters_SaveAndRestore.BACKUP_BACKEND == "Store":
+            Fullname = Standard_Functions.GetFileDialog(
+                Filter=Filter,
+                parent=self.form,
+                DefaultPath=DefaultPath,
+                SaveAs=False,
+            )
+            if Fullname != "" and Fullname is not None:
+                self.RestoreModFrom(Fullname)
+            return
+
+        self.ChooseBackup("Addons", self.RestoreModFrom, Filter, DefaultPath)
+        return
+
+    def RestoreModFrom(self, Fullname):
+        # Restore the addons from the archive or snapshot Fullname
+        ModDir = os.path.join(App.getUserAppDataDir(), "Mod")
+
         if Fullname != "" and Fullname is not None:
             self.form.hide()
             yesText = translate("FreeCAD SaveAndRestore", "Restore and restart")
@@ -570,72 +1085,34 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
             if answer == "no":
                 return
             if answer == "yes":
-                # Set the wait cursor
-                QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-                
-                # Remove the current mod folder and create a new one
-                if os.path.exists(ModDir):                   
-                    for item in os.listdir(ModDir):
-                        dirName = item.replace("/", "")
-                        dir = os.path.join(ModDir, dirName)
-                        if dirName not in os.path.join(os.path.dirname(__file__)) and dirName not in ModDir:
-                            if os.path.isdir(dir):
-                                self.rmtree(dir)
-                            if os.path.isfile(dir):
-                                os.remove(dir)
-
-                # Extract the zipfile and place the config files
-                if Fullname is not None and Fullname != "":
-                    if not platform.system() == "Darwin":
-                        # loading the temp.zip and creating a zip object
-                        with ZipFile(Fullname, "r") as zipObj:
-                            # Extract the file from the zip file into the config directory
-                            try:
-                                members = [m for m in zipObj.namelist() if not m.startswith("SaveAndRestore")]
-                                zipObj.extractall(ModDir, members=members)
-                            except Exception as e:
-                                print(e)
-                                Standard_Functions.Print(
-                                    f"{ModDir} not present in archive", "Warning"
-                                )
-                                # Return to the normal cursor
-                                QApplication.setOverrideCursor(
-                                    Qt.CursorShape.ArrowCursor
-                                )
-                                return
+                # Make sure that every archive of an incremental backup is present, before anything is removed
+                try:
+                    Restore_SaveAndRestore.CheckArchive(Fullname)
+                except FileNotFoundError as e:
+                    Standard_Functions.Print(str(e), "Error")
+                    return
 
-                    if platform.system() == "Darwin":
-                        # Extract the file from the zip file into the config directory
-                        with ZipFile(Fullname, "r") as zipObj:
-                            ZIP_SYSTEM=3
-                            try:                                
-                                for info in zipObj.infolist():
-                                    if "SaveAndRestore" not in info.filename:
-                                        extracted_path = zipObj.extract(info, ModDir)
-
-                                        if info.create_system == ZIP_SYSTEM:
-                                            unix_attributes = info.external_attr >> 16
-                                        if unix_attributes:
-                                            os.chmod(extracted_path, unix_attributes)
-                                                        
-                            except Exception as e:
-                                print(e)
-                                Standard_Functions.Print(
-                                    f"{ModDir} not present in archive", "Warning"
-                                )
-                                # Return to the normal cursor
-                                QApplication.setOverrideCursor(
-                                    Qt.CursorShape.ArrowCursor
-                                )
-                                return
+                # Show the dialog again for the progress
+                self.form.show()
 
-                    # Write the path to preferences
+                # Set by the restore when it falls back to restoring in place, without rollback point
+                State = {"InPlace": False}
+
+                def OnFinished(Restored):
+                    if Restored is False:
+                        ReportFailure()
+                        return
+
+                    # Write the path to preferences. For a snapshot, this is the folder that holds the store
+                    SaveDirectory = os.path.dirname(Fullname)
+                    if Fullname.lower().endswith(".json"):
+                        SaveDirectory = os.path.dirname(
+                            Store_SaveAndRestore.ReturnStoreDirFromSnapshot(Fullname)
+                        )
                     Parameters_SaveAndRestore.Settings.SetStringSetting(
-                        "SaveDirectory", os.path.dirname(Fullname)
-                    )
-                    Parameters_SaveAndRestore.SAVE_DIRECTORY = os.path.dirname(
-                        Fullname
+                        "SaveDirectory", SaveDirectory
                     )
+                    Parameters_SaveAndRestore.SAVE_DIRECTORY = SaveDirectory
 
                     # print a message
                     print(
@@ -645,19 +1122,431 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
                         )
                     )
 
-                    # Return to the normal cursor
-                    QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
-
                     # Restart FreeCAD
                     if platform.system() != "Darwin":
                         Standard_Functions.restart_freecad()
                     if platform.system() == "Darwin":
                         Standard_Functions.Mbox(translate("FreeCAD SaveAndResore", "Please restart FreeCAD"))
-        
-        # Return to the normal cursor
-        QApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
+                    return
+
+                def ReportFailure():
+                    # A staged restore is rolled back and leaves the addons as they were.
+                    # Only a restore in place can have stopped halfway
+                    if State["InPlace"] is True:
+                        Message = translate(
+                            "FreeCAD SaveAndRestore",
+                            "The addon directory is incomplete. Please restore it again.",
+                        )
+                    else:
+                        Message = translate(
+                            "FreeCAD SaveAndRestore",
+                            "The addon restore failed. Nothing was changed.",
+                        )
+                    Standard_Functions.Print(Message, "Warning")
+                    return
+
+                def Cleanup():
+                    ReportFailure()
+                    return
+
+                # A snapshot replaces the current addons on the background thread
+                if Fullname.lower().endswith(".json"):
+                    self.JobQueue.Submit(
+                        translate("FreeCAD SaveAndRestore", "Addon restore"),
+                        lambda Progress: self.RestoreModFiles(
+                            Fullname, ModDir, Progress, State
+                        ),
+                        OnFinished=OnFinished,
+                        Cleanup=Cleanup,
+                    )
+                    return
+
+                # An archive is compared with the current addons first. Only the files that differ are changed
+                def OnCompared(Plan):
+                    if Plan is None:
+                        return
+                    Summary = Restore_SaveAndRestore.FormatPlan(Plan)
+                    Standard_Functions.Print(Summary, "Log")
+                    if (
+                        len(Plan["Create"]) + len(Plan["Update"]) + len(Plan["Delete"])
+                        == 0
+                    ):
+                        Standard_Functions.Print(
+                            translate(
+                                "FreeCAD SaveAndRestore",
+                                "The addons already match the backup. Nothing is restored.",
+                            ),
+                            "Log",
+                        )
+                        return
+                    answer = Standard_Functions.Mbox(
+                        translate("FreeCAD SaveAndRestore", "Restore the addons?")
+                        + "\n"
+                        + Summary,
+                        "FreeCAD SaveAndRestore",
+                        2,
+                        "Question",
+                    )
+                    if answer != "ok":
+                        return
+                    self.JobQueue.Submit(
+                        translate("FreeCAD SaveAndRestore", "Addon restore"),
+                        lambda Progress: self.RestoreModPlan(
+                            Plan, ModDir, Progress, State
+                        ),
+                        OnFinished=OnFinished,
+                        Cleanup=Cleanup,
+                    )
+                    return
+
+                # Let the user choose the addons to restore, from the index of the archive
+                def OnListed(Index):
+                    if Index is None:
+                        return
+                    Addons = self.SelectAddons(Index)
+                    if Addons is None or len(Addons) == 0:
+                        return
+                    # With every addon selected, addons that are not in the backup are removed as well
+                    if len(Addons) == len(Index):
+                        Addons = None
+                    self.JobQueue.Submit(
+                        translate("FreeCAD SaveAndRestore", "Compare addons"),
+                        lambda Progress: self.CompareModFiles(
+                            Fullname, ModDir, Progress, Addons
+                        ),
+                        OnFinished=OnCompared,
+                    )
+                    return
+
+                self.JobQueue.Submit(
+                    translate("FreeCAD SaveAndRestore", "Read backup"),
+                    lambda Progress: self.ListModAddons(Fullname),
+                    OnFinished=OnListed,
+                )
+        return
+
+    def ListModAddons(self, Fullname) -> dict:
+        # Runs on the background thread. Returns None if the backup could not be read.
+        try:
+            Index = Restore_SaveAndRestore.ListAddons(Fullname)
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{Fullname} could not be read", "Warning")
+            return None
+        # The addon itself is never restored
+        return {
+            Addon: Counts
+            for Addon, Counts in Index.items()
+            if not Addon.startswith("SaveAndRestore")
+        }
+
+    def SelectAddons(self, Index: dict) -> list:
+        # Show the addons in the backup, all checked. Returns the checked addons, or None if cancelled.
+        Items = []
+        for Addon in sorted(Index, key=str.lower):
+            Files, Bytes = Index[Addon]
+            Items.append(
+                (f"{Addon} ({Files} files, {Bytes / (1024 * 1024):.1f} MB)", Addon)
+            )
+        return self.SelectItems(
+            translate("FreeCAD SaveAndRestore", "Restore addons"),
+            translate("FreeCAD SaveAndRestore", "Select the addons to restore:"),
+            Items,
+        )
+
+    def SelectGroups(self, Groups: list, Title: str) -> list:
+        # Show the parameter groups, all checked. Returns the checked groups, or None if cancelled.
+        return self.SelectItems(
+            Title,
+            translate("FreeCAD SaveAndRestore", "Select the parameter groups:"),
+            [(Group if Group != "" else "Root", Group) for Group in Groups],
+        )
+
+    def SelectItems(self, Title: str, Label: str, Items: list) -> list:
+        # Show a list of (text, data) items, all checked.
+        # Returns the data of the checked items, or None if cancelled.
+        Dialog = QDialog(self.form)
+        Dialog.setWindowTitle(Title)
+        Layout = QVBoxLayout(Dialog)
+        Layout.addWidget(QLabel(Label))
+        ItemList = QListWidget(Dialog)
+        for Text, Data in Items:
+            Item = QListWidgetItem(Text, ItemList)
+            Item.setData(Qt.ItemDataRole.UserRole, Data)
+            Item.setFlags(Item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            Item.setCheckState(Qt.CheckState.Checked)
+        Layout.addWidget(ItemList)
+        Buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel,
+            parent=Dialog,
+        )
+        Buttons.accepted.connect(Dialog.accept)
+        Buttons.rejected.connect(Dialog.reject)
+        Layout.addWidget(Buttons)
+
+        if Dialog.exec() != QDialog.DialogCode.Accepted:
+            return None
+        Selected = []
+        for i in range(ItemList.count()):
+            Item = ItemList.item(i)
+            if Item.checkState() == Qt.CheckState.Checked:
+                Selected.append(Item.data(Qt.ItemDataRole.UserRole))
+        return Selected
+
+    def ChooseBackup(
+        self, Kind: str, OnChosen, Filter="Archive (*.zip)", DefaultPath=None
+    ):
+        # Let the user pick a backup of Kind, "Settings" or "Addons", and call OnChosen with it.
+        # The backups are listed from the catalog of the save directory, which is refreshed on the background thread.
+        # Backups elsewhere can still be picked with the file open dialog.
+        Directory = Parameters_SaveAndRestore.SAVE_DIRECTORY
+        if DefaultPath is None:
+            DefaultPath = Directory
+
+        def Browse():
+            return Standard_Functions.GetFileDialog(
+                Filter=Filter,
+                parent=self.form,
+                DefaultPath=DefaultPath,
+                SaveAs=False,
+            )
+
+        def OnRefreshed(Result):
+            if Result is None:
+                Fullname = Browse()
+            else:
+                Fullname = self.SelectBackup(Directory, Kind, Browse)
+            if Fullname != "" and Fullname is not None:
+                OnChosen(Fullname)
+            return
+
+        if Parameters_SaveAndRestore.USE_CATALOG is False or not os.path.isdir(
+            Directory
+        ):
+            OnRefreshed(None)
+            return
+
+        self.JobQueue.Submit(
+            translate("FreeCAD SaveAndRestore", "Read backup catalog"),
+            lambda Progress: self.RefreshCatalog(Directory, Progress),
+            OnFinished=OnRefreshed,
+        )
         return
 
+    def RefreshCatalog(self, Directory, Progress) -> int:
+        # Runs on the background thread. Returns the number of indexed archives, or None if there is no catalog
+        try:
+            return Catalog_SaveAndRestore.Refresh(Directory, Progress)
+        except Backup_SaveAndRestore.Cancelled:
+            raise
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print("The backup catalog could not be read", "Warning")
+            return None
+
+    def SelectBackup(self, Directory, Kind: str, Browse) -> str:
+        # Show the backups in the catalog, newest first, with a search field.
+        # Returns the selected backup, or None if cancelled. Browse opens the file open dialog instead.
+        Dialog = QDialog(self.form)
+        Dialog.setWindowTitle(translate("FreeCAD SaveAndRestore", "Select a backup"))
+        Dialog.resize(600, 400)
+        Layout = QVBoxLayout(Dialog)
+        SearchField = QLineEdit(Dialog)
+        SearchField.setPlaceholderText(
+            translate(
+                "FreeCAD SaveAndRestore", "Search by name, FreeCAD version or addon"
+            )
+        )
+        Layout.addWidget(SearchField)
+        BackupList = QListWidget(Dialog)
+        Layout.addWidget(BackupList)
+        Chosen = [None]
+
+        def Fill(Text=""):
+            BackupList.clear()
+            try:
+                Rows = Catalog_SaveAndRestore.Search(Directory, Kind, Text)
+            except Exception as e:
+                Standard_Functions.Print(f"Backup catalog: {e}", "Log")
+                Rows = []
+            for Row in Rows:
+                Label = f"{Row['Created'].replace('T', ' ')}    {os.path.basename(Row['Path'])}"
+                if Row["FreeCADVersion"] != "":
+                    Label += f"    FreeCAD {Row['FreeCADVersion']}"
+                if Kind == "Addons":
+                    Label += f"    {len(Row['Addons'])} addons"
+                Label += f"    {Row['Size'] / (1024 * 1024):.1f} MB"
+                Item = QListWidgetItem(Label, BackupList)
+                Item.setData(Qt.ItemDataRole.UserRole, Row["FullPath"])
+                if len(Row["Addons"]) > 0:
+                    Item.setToolTip(
+                        "\n".join(
+                            f"{Addon}    {Row['AddonVersions'].get(Addon, '')}".rstrip()
+                            for Addon in Row["Addons"]
+                        )
+                    )
+            if BackupList.count() > 0:
+                BackupList.setCurrentRow(0)
+            return
+
+        def OnBrowse():
+            Fullname = Browse()
+            if Fullname != "" and Fullname is not None:
+                Chosen[0] = Fullname
+                Dialog.accept()
+            return
+
+        Buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel,
+            parent=Dialog,
+        )
+        BrowseButton = QPushButton(
+            translate("FreeCAD SaveAndRestore", "Browse..."), Dialog
+        )
+        Buttons.addButton(BrowseButton, QDialogButtonBox.ButtonRole.ActionRole)
+        BrowseButton.clicked.connect(OnBrowse)
+        Buttons.accepted.connect(Dialog.accept)
+        Buttons.rejected.connect(Dialog.reject)
+        BackupList.itemDoubleClicked.connect(lambda Item: Dialog.accept())
+        SearchField.textChanged.connect(Fill)
+        Layout.addWidget(Buttons)
+        Fill()
+
+        if Dialog.exec() != QDialog.DialogCode.Accepted:
+            return None
+        if Chosen[0] is None and BackupList.currentItem() is not None:
+            Chosen[0] = BackupList.currentItem().data(Qt.ItemDataRole.UserRole)
+        return Chosen[0]
+
+    def CompareModFiles(self, Fullname, ModDir, Progress, Addons=None) -> dict:
+        # Runs on the background thread. Returns None if the backup could not be read.
+        # For an incremental backup, the files are compared with every archive in the chain.
+        # If Addons is set, only these addons are compared and restored.
+        try:
+            Rules = self.ReturnRestoreRules(Fullname)
+            Plan = Restore_SaveAndRestore.PlanRestore(
+                Fullname,
+                ModDir,
+                Exclude=lambda Name: Name.startswith("SaveAndRestore"),
+                Progress=Progress,
+                Addons=Addons,
+                Rules=Rules,
+            )
+            # The rules are needed again to keep the excluded files in a staged restore
+            Plan["Rules"] = Rules
+            return Plan
+        except Backup_SaveAndRestore.Cancelled:
+            raise
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{ModDir} not present in archive", "Warning")
+            return None
+
+    def RestoreModPlan(self, Plan, ModDir, Progress, State=None) -> bool:
+        # Runs on the background thread. Only the files in the plan are extracted.
+        # The restore is built next to the Mod folder and swapped in. The current Mod folder is kept as rollback point.
+        # If the Mod folder can not be renamed, for example because a file in it is in use, the plan is applied in place.
+        try:
+            Swapped = Restore_SaveAndRestore.ApplyRestorePlanStaged(
+                Plan,
+                ModDir,
+                Exclude=lambda Name: Name.startswith("SaveAndRestore"),
+                KeepPermissions=True,
+                Progress=Progress,
+                Workers=Parameters_SaveAndRestore.WORKER_THREADS,
+                Rules=Plan["Rules"],
+            )
+            if Swapped is False:
+                Standard_Functions.Print(
+                    translate(
+                        "FreeCAD SaveAndRestore",
+                        "{} is in use. The addons are restored in place, without rollback point.",
+                    ).format(ModDir),
+                    "Warning",
+                )
+                if State is not None:
+                    State["InPlace"] = True
+                Restore_SaveAndRestore.ApplyRestorePlan(
+                    Plan,
+                    ModDir,
+                    KeepPermissions=True,
+                    Progress=Progress,
+                    Workers=Parameters_SaveAndRestore.WORKER_THREADS,
+                )
+        except Backup_SaveAndRestore.Cancelled:
+            raise
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{ModDir} could not be restored", "Warning")
+            return False
+        return True
+
+    def RestoreModFiles(self, Fullname, ModDir, Progress, State=None) -> bool:
+        # Runs on the background thread. Returns False if the backup could not be restored.
+        # The snapshot is restored next to the Mod folder and swapped in. The current Mod folder is kept as rollback point.
+        AddonName = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+        Exclude = (
+            lambda Name: Name.startswith("SaveAndRestore")
+            or Name.split("/")[0] == AddonName
+        )
+        Rules = self.ReturnRestoreRules(Fullname)
+        StagingDir = Restore_SaveAndRestore.ReturnStagingPath(ModDir)
+        try:
+            Store_SaveAndRestore.RestoreSnapshot(
+                Fullname,
+                StagingDir,
+                Exclude=Exclude,
+                Progress=Progress,
+                KeepPermissions=True,
+            )
+            Restore_SaveAndRestore.CloneExcluded(ModDir, StagingDir, Exclude, Rules)
+            Progress.Check()
+        except Backup_SaveAndRestore.Cancelled:
+            Restore_SaveAndRestore.RemoveTree(StagingDir)
+            raise
+        except Exception as e:
+            Restore_SaveAndRestore.RemoveTree(StagingDir)
+            print(e)
+            Standard_Functions.Print(f"{ModDir} not present in archive", "Warning")
+            return False
+        try:
+            Restore_SaveAndRestore.SwapIn(StagingDir, ModDir)
+            return True
+        except OSError as e:
+            # The Mod folder is in use. Restore the snapshot in place instead
+            Restore_SaveAndRestore.RemoveTree(StagingDir)
+            Standard_Functions.Print(
+                translate(
+                    "FreeCAD SaveAndRestore",
+                    "{} is in use ({}). The addons are restored in place, without rollback point.",
+                ).format(ModDir, e),
+                "Warning",
+            )
+            if State is not None:
+                State["InPlace"] = True
+
+        # Remove the current addons, but not this one.
+        # What the backup excluded, like .git/ or venv/, is not in it, so it is kept
+        Progress.Check()
+        Restore_SaveAndRestore.RemoveIncluded(ModDir, Rules, Exclude=Exclude)
+
+        # Place the addons from the snapshot
+        try:
+            Store_SaveAndRestore.RestoreSnapshot(
+                Fullname,
+                ModDir,
+                Exclude=Exclude,
+                Progress=Progress,
+                KeepPermissions=True,
+            )
+        except Backup_SaveAndRestore.Cancelled:
+            raise
+        except Exception as e:
+            print(e)
+            Standard_Functions.Print(f"{ModDir} not present in archive", "Warning")
+            return False
+        return True
+
     def EnableToolbars(self, FinishMessage="", StyleSheet=None):
         # Show the restart dialog
         answer = Standard_Functions.RestartDialog(
@@ -806,17 +1695,7 @@ class LoadDialog(ui_Dialog.Ui_Dialog):
             zipObj.writestr(zipInfo, NewArchive_FullPath)
 
         return
-    
-    def rmtree(self, top):
-        for root, dirs, files in os.walk(top, topdown=False):
-            for name in files:
-                filename = os.path.join(root, name)
-                os.chmod(filename, stat.S_IWUSR)
-                os.remove(filename)
-            for name in dirs:
-                os.rmdir(os.path.join(root, name))
-        os.rmdir(top)
-        return
+
 
 def main():
     # Get the form
@@ -48,9 +48,16 @@ class Settings:
         return result
 
     def GetIntSetting(settingName: str) -> int:
-        result = preferences.GetInt(settingName)
-        if result == "":
-            result = None
+        # Return None if the setting does not exist, like GetBoolSetting. GetInt would return 0
+        result = None
+        settings = preferences.GetContents()
+        exists = False
+        for setting in settings:
+            if setting[0] == "Integer" and setting[1] == settingName:
+                exists = True
+                break
+        if exists is True:
+            result = preferences.GetInt(settingName)
         return result
 
     def GetFloatSetting(settingName: str) -> int:
@@ -110,6 +117,7 @@ class Settings:
 
     def WriteSettings():
         Settings.SetStringSetting("SaveDirectory", SAVE_DIRECTORY)
+        Settings.SetIntSetting("WorkerThreads", WORKER_THREADS)
 
         return
 
@@ -121,6 +129,25 @@ UI_LOCATION = os.path.join(os.path.dirname(__file__), "Resources", "ui")
 
 DefaultSettings = {
     "SaveDirectory": Standard_Functions.find_cloud_path(),
+    "ParallelBackup": True,
+    "WorkerThreads": 0,
+    "IncrementalBackup": False,
+    "BackupBackend": "Archive",
+    "KeepSnapshots": 30,
+    "UseDefaultExcludes": True,
+    "ExcludePatterns": "",
+    "CompressionPolicy": "balanced",
+    "SequentialWrite": True,
+    "StageArchiveLocally": False,
+    "SelectParameterGroups": False,
+    "LiveRestore": False,
+    "ConfigSnapshots": False,
+    "ConfigSnapshotInterval": 30,
+    "KeepHourlySnapshots": 24,
+    "KeepDailySnapshots": 14,
+    "KeepWeeklySnapshots": 8,
+    "UseCatalog": True,
+    "WatchAddons": False,
 }
 
 # region - Define the import location ----------------------------------------------------------------------------------
@@ -129,3 +156,108 @@ if SAVE_DIRECTORY == "":
     SAVE_DIRECTORY = DefaultSettings["SaveDirectory"]
     Settings.SetStringSetting("SaveDirectory", SAVE_DIRECTORY)
 # endregion ------------------------------------------------------------------------------------------------------------
+
+# region - Define the backup options -----------------------------------------------------------------------------------
+# Compress the addon backup on all cores
+PARALLEL_BACKUP = Settings.GetBoolSetting("ParallelBackup")
+if PARALLEL_BACKUP is None:
+    PARALLEL_BACKUP = DefaultSettings["ParallelBackup"]
+    Settings.SetBoolSetting("ParallelBackup", PARALLEL_BACKUP)
+
+# Only write new or changed files, on top of the latest addon backup in the save directory
+INCREMENTAL_BACKUP = Settings.GetBoolSetting("IncrementalBackup")
+if INCREMENTAL_BACKUP is None:
+    INCREMENTAL_BACKUP = DefaultSettings["IncrementalBackup"]
+    Settings.SetBoolSetting("IncrementalBackup", INCREMENTAL_BACKUP)
+
+# Where addon backups are written: "Archive" for zip files, "Store" for the deduplicated snapshot store
+BACKUP_BACKEND = Settings.GetStringSetting("BackupBackend")
+if BACKUP_BACKEND == "":
+    BACKUP_BACKEND = DefaultSettings["BackupBackend"]
+    Settings.SetStringSetting("BackupBackend", BACKUP_BACKEND)
+
+# Number of snapshots to keep in the snapshot store. 0 keeps all
+KEEP_SNAPSHOTS = Settings.GetIntSetting("KeepSnapshots")
+if KEEP_SNAPSHOTS is None:
+    KEEP_SNAPSHOTS = DefaultSettings["KeepSnapshots"]
+    Settings.SetIntSetting("KeepSnapshots", KEEP_SNAPSHOTS)
+
+# Number of worker threads. 0 means one per core
+WORKER_THREADS = Settings.GetIntSetting("WorkerThreads")
+if WORKER_THREADS is None:
+    WORKER_THREADS = DefaultSettings["WorkerThreads"]
+    Settings.SetIntSetting("WorkerThreads", WORKER_THREADS)
+
+# Skip caches, version control data and virtual environments in the addon backup
+USE_DEFAULT_EXCLUDES = Settings.GetBoolSetting("UseDefaultExcludes")
+if USE_DEFAULT_EXCLUDES is None:
+    USE_DEFAULT_EXCLUDES = DefaultSettings["UseDefaultExcludes"]
+    Settings.SetBoolSetting("UseDefaultExcludes", USE_DEFAULT_EXCLUDES)
+
+# Extra exclusion patterns for the addon backup, separated by ";". For example: "*.log;Ondsel*/"
+EXCLUDE_PATTERNS = Settings.GetStringSetting("ExcludePatterns")
+
+# Compression of the addon archives: "fast", "balanced" or "small"
+COMPRESSION_POLICY = Settings.GetStringSetting("CompressionPolicy")
+if COMPRESSION_POLICY == "":
+    COMPRESSION_POLICY = DefaultSettings["CompressionPolicy"]
+    Settings.SetStringSetting("CompressionPolicy", COMPRESSION_POLICY)
+
+# Write archives append-only, so they are never rewritten while they are synced or written over the network
+SEQUENTIAL_WRITE = Settings.GetBoolSetting("SequentialWrite")
+if SEQUENTIAL_WRITE is None:
+    SEQUENTIAL_WRITE = DefaultSettings["SequentialWrite"]
+    Settings.SetBoolSetting("SequentialWrite", SEQUENTIAL_WRITE)
+
+# Build addon archives in the local temp folder and copy them to the save directory when they are complete
+STAGE_ARCHIVE_LOCALLY = Settings.GetBoolSetting("StageArchiveLocally")
+if STAGE_ARCHIVE_LOCALLY is None:
+    STAGE_ARCHIVE_LOCALLY = DefaultSettings["StageArchiveLocally"]
+    Settings.SetBoolSetting("StageArchiveLocally", STAGE_ARCHIVE_LOCALLY)
+
+# Ask for the parameter groups of user.cfg to save or restore, instead of always taking the whole file
+SELECT_PARAMETER_GROUPS = Settings.GetBoolSetting("SelectParameterGroups")
+if SELECT_PARAMETER_GROUPS is None:
+    SELECT_PARAMETER_GROUPS = DefaultSettings["SelectParameterGroups"]
+    Settings.SetBoolSetting("SelectParameterGroups", SELECT_PARAMETER_GROUPS)
+
+# Apply restored settings to the running FreeCAD, instead of replacing the config files and restarting
+LIVE_RESTORE = Settings.GetBoolSetting("LiveRestore")
+if LIVE_RESTORE is None:
+    LIVE_RESTORE = DefaultSettings["LiveRestore"]
+    Settings.SetBoolSetting("LiveRestore", LIVE_RESTORE)
+
+# Take a snapshot of the config files in the background, when they changed
+CONFIG_SNAPSHOTS = Settings.GetBoolSetting("ConfigSnapshots")
+if CONFIG_SNAPSHOTS is None:
+    CONFIG_SNAPSHOTS = DefaultSettings["ConfigSnapshots"]
+    Settings.SetBoolSetting("ConfigSnapshots", CONFIG_SNAPSHOTS)
+
+# Minutes between the checks for a config snapshot. 0 only checks when FreeCAD closes
+CONFIG_SNAPSHOT_INTERVAL = Settings.GetIntSetting("ConfigSnapshotInterval")
+if CONFIG_SNAPSHOT_INTERVAL is None:
+    CONFIG_SNAPSHOT_INTERVAL = DefaultSettings["ConfigSnapshotInterval"]
+    Settings.SetIntSetting("ConfigSnapshotInterval", CONFIG_SNAPSHOT_INTERVAL)
+
+# Number of hourly, daily and weekly config snapshots to keep
+CONFIG_SNAPSHOT_RETENTION = []
+for Setting in ["KeepHourlySnapshots", "KeepDailySnapshots", "KeepWeeklySnapshots"]:
+    Value = Settings.GetIntSetting(Setting)
+    if Value is None:
+        Value = DefaultSettings[Setting]
+        Settings.SetIntSetting(Setting, Value)
+    CONFIG_SNAPSHOT_RETENTION.append(Value)
+CONFIG_SNAPSHOT_RETENTION = tuple(CONFIG_SNAPSHOT_RETENTION)
+
+# Pick backups to restore from the backup catalog of the save directory, instead of the file open dialog
+USE_CATALOG = Settings.GetBoolSetting("UseCatalog")
+if USE_CATALOG is None:
+    USE_CATALOG = DefaultSettings["UseCatalog"]
+    Settings.SetBoolSetting("UseCatalog", USE_CATALOG)
+
+# Watch the Mod folder while FreeCAD runs, instead of checking all addons at startup
+WATCH_ADDONS = Settings.GetBoolSetting("WatchAddons")
+if WATCH_ADDONS is None:
+    WATCH_ADDONS = DefaultSettings["WatchAddons"]
+    Settings.SetBoolSetting("WatchAddons", WATCH_ADDONS)
+# endregion ------------------------------------------------------------------------------------------------------------
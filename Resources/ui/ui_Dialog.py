@@ -16,8 +16,8 @@ from PySide.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide.QtWidgets import (QApplication, QCheckBox, QDialog, QGridLayout,
-    QGroupBox, QPushButton, QSizePolicy, QSpacerItem,
-    QWidget)
+    QGroupBox, QLabel, QProgressBar, QPushButton,
+    QSizePolicy, QSpacerItem, QWidget)
 
 class Ui_Dialog(object):
     def setupUi(self, Dialog):
@@ -145,6 +145,14 @@ class Ui_Dialog(object):
 
         self.gridLayout_7.addWidget(self.RestoreMod, 1, 0, 1, 1)
 
+        self.ExportSnapshot = QPushButton(self.groupBox_3)
+        self.ExportSnapshot.setObjectName(u"ExportSnapshot")
+        sizePolicy1.setHeightForWidth(self.ExportSnapshot.sizePolicy().hasHeightForWidth())
+        self.ExportSnapshot.setSizePolicy(sizePolicy1)
+        self.ExportSnapshot.setMinimumSize(QSize(200, 30))
+
+        self.gridLayout_7.addWidget(self.ExportSnapshot, 2, 0, 1, 1)
+
 
         self.gridLayout_8.addWidget(self.groupBox_3, 1, 0, 1, 1)
 
@@ -175,9 +183,31 @@ class Ui_Dialog(object):
 
         self.gridLayout_8.addWidget(self.groupBox2, 2, 0, 1, 1)
 
+        self.gridLayout_9 = QGridLayout()
+        self.gridLayout_9.setObjectName(u"gridLayout_9")
+        self.ProgressLabel = QLabel(Dialog)
+        self.ProgressLabel.setObjectName(u"ProgressLabel")
+
+        self.gridLayout_9.addWidget(self.ProgressLabel, 0, 0, 1, 2)
+
+        self.ProgressBar = QProgressBar(Dialog)
+        self.ProgressBar.setObjectName(u"ProgressBar")
+        self.ProgressBar.setValue(0)
+
+        self.gridLayout_9.addWidget(self.ProgressBar, 1, 0, 1, 1)
+
+        self.CancelJob = QPushButton(Dialog)
+        self.CancelJob.setObjectName(u"CancelJob")
+        self.CancelJob.setEnabled(False)
+
+        self.gridLayout_9.addWidget(self.CancelJob, 1, 1, 1, 1)
+
+
+        self.gridLayout_8.addLayout(self.gridLayout_9, 3, 0, 1, 1)
+
         self.verticalSpacer = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
 
-        self.gridLayout_8.addItem(self.verticalSpacer, 3, 0, 1, 1)
+        self.gridLayout_8.addItem(self.verticalSpacer, 4, 0, 1, 1)
 
         self.gridLayout_3 = QGridLayout()
         self.gridLayout_3.setObjectName(u"gridLayout_3")
@@ -196,7 +226,7 @@ class Ui_Dialog(object):
         self.gridLayout_3.addWidget(self.HelpButton, 0, 0, 1, 1)
 
 
-        self.gridLayout_8.addLayout(self.gridLayout_3, 4, 0, 1, 1)
+        self.gridLayout_8.addLayout(self.gridLayout_3, 5, 0, 1, 1)
 
 
         self.retranslateUi(Dialog)
@@ -229,6 +259,10 @@ class Ui_Dialog(object):
         self.groupBox_3.setTitle(QCoreApplication.translate("Dialog", u"Addons", None))
         self.BackupMod.setText(QCoreApplication.translate("Dialog", u"Backup addon directory", None))
         self.RestoreMod.setText(QCoreApplication.translate("Dialog", u"Restore addon directory", None))
+#if QT_CONFIG(tooltip)
+        self.ExportSnapshot.setToolTip(QCoreApplication.translate("Dialog", u"Write a snapshot from the snapshot store as a regular zip file.", None))
+#endif // QT_CONFIG(tooltip)
+        self.ExportSnapshot.setText(QCoreApplication.translate("Dialog", u"Export snapshot to zipfile", None))
         self.groupBox2.setTitle(QCoreApplication.translate("Dialog", u"Extra functions", None))
         self.OpenModDir.setText(QCoreApplication.translate("Dialog", u"Open addon directory", None))
 #if QT_CONFIG(tooltip)
@@ -236,6 +270,11 @@ class Ui_Dialog(object):
 #endif // QT_CONFIG(tooltip)
         self.restoreToolbars.setText(QCoreApplication.translate("Dialog", u"Restore toolbars", None))
         self.startSafeMode.setText(QCoreApplication.translate("Dialog", u"Start FreeCAD in safe mode", None))
+        self.ProgressLabel.setText("")
+#if QT_CONFIG(tooltip)
+        self.CancelJob.setToolTip(QCoreApplication.translate("Dialog", u"Cancel the running operation and the queued operations.", None))
+#endif // QT_CONFIG(tooltip)
+        self.CancelJob.setText(QCoreApplication.translate("Dialog", u"Cancel", None))
         self.CloseButton.setText(QCoreApplication.translate("Dialog", u"Close", None))
         self.HelpButton.setText(QCoreApplication.translate("Dialog", u"Help", None))
     # retranslateUi
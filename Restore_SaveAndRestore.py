@@ -0,0 +1,1042 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# This module holds the archive logic for the addon restore.
+# A restore is built in a staging folder next to its target and then swapped in with two renames.
+# The replaced folder or file is kept next to it with the suffix ".previous", as rollback point.
+# Like Backup_SaveAndRestore, it has no dependency on FreeCAD.
+
+import os
+import glob
+import shutil
+import stat
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import zipfile_SaveAndRestore
+from zipfile_SaveAndRestore import ZipFile, ZIP_STORED
+import Backup_SaveAndRestore
+import Exclude_SaveAndRestore
+import Trash_SaveAndRestore
+
+# Version made by unix
+ZIP_SYSTEM = 3
+# Block size for computing the CRC of a file on disk
+CRC_CHUNK_SIZE = 1024 * 1024
+# Suffixes for the staging folder of a restore and for the rollback point
+STAGING_SUFFIX = ".restore"
+PREVIOUS_SUFFIX = ".previous"
+# Suffix of the folder with the rollback points of addons that were restored one by one
+PREVIOUS_ADDONS_SUFFIX = ".previous-addons"
+
+# The addon index of every archive that was listed, by (path, size, mtime)
+_AddonIndex = {}
+
+
+def IsMetadata(Name: str) -> bool:
+    """Return True for archive members that belong to SaveAndRestore itself and are never extracted."""
+    return Name.startswith(os.path.dirname(Backup_SaveAndRestore.MANIFEST_NAME) + "/")
+
+
+def ResolveArchives(ArchivePath, Manifest: dict) -> dict:
+    """
+    Return the path of every archive in the backup chain of Manifest, by id.
+    The archives are expected next to ArchivePath. If one was renamed, it is found by its id.
+    """
+    Directory = os.path.dirname(os.path.abspath(ArchivePath))
+    result = {}
+    Missing = {}
+    for Id, FileName in Manifest["Archives"].items():
+        if Id == Manifest["Id"]:
+            result[Id] = ArchivePath
+            continue
+        Candidate = os.path.join(Directory, FileName)
+        CandidateManifest = Backup_SaveAndRestore.ReadManifest(Candidate)
+        if CandidateManifest is not None and CandidateManifest["Id"] == Id:
+            result[Id] = Candidate
+        else:
+            Missing[Id] = FileName
+
+    # Look for renamed archives
+    if len(Missing) > 0:
+        for Candidate in glob.glob(os.path.join(glob.escape(Directory), "*.zip")):
+            CandidateManifest = Backup_SaveAndRestore.ReadManifest(Candidate)
+            if CandidateManifest is not None and CandidateManifest["Id"] in Missing:
+                result[CandidateManifest["Id"]] = Candidate
+                del Missing[CandidateManifest["Id"]]
+    if len(Missing) > 0:
+        raise FileNotFoundError(
+            "Part of the backup chain is missing: " + ", ".join(Missing.values())
+        )
+    return result
+
+
+def CheckArchive(ArchivePath):
+    """Raise FileNotFoundError if an archive of the backup chain of ArchivePath is missing."""
+    Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+    if Manifest is not None:
+        ResolveArchives(ArchivePath, Manifest)
+    return
+
+
+def ReadExcludeRules(ArchivePath):
+    """
+    Return the exclusion rules an addon archive was made with, as ExcludeRules.
+    Returns None for archives that did not record them.
+    """
+    Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+    if Manifest is None or "Exclude" not in Manifest:
+        return None
+    return Exclude_SaveAndRestore.ExcludeRules(Manifest["Exclude"])
+
+
+def RemoveIncluded(TargetDir, Rules=None, Exclude=None):
+    """
+    Remove everything below TargetDir that the exclusion rules Rules include, before a full restore.
+    What the rules exclude was not backed up, so it is kept, with the folders that hold it.
+    The ignore files of the addons apply as well, like in the backup. Links are removed, not followed.
+    Exclude (optional): Callable that returns True for names that must be left alone. Folder names end with "/".
+    """
+    if not os.path.isdir(TargetDir):
+        return
+    Folders = []
+    # The folders that are left alone, with a trailing "/"
+    Skipped = ()
+    for FullPath, Name, IsFolder, st in Exclude_SaveAndRestore.Walk(TargetDir, Rules):
+        if Name.startswith(Skipped):
+            continue
+        if Exclude is not None and Exclude(Name + "/" if IsFolder else Name):
+            if IsFolder:
+                Skipped = Skipped + (Name + "/",)
+            continue
+        if IsFolder:
+            Folders.append(FullPath)
+            continue
+        try:
+            os.remove(FullPath)
+        except PermissionError:
+            os.chmod(FullPath, stat.S_IWUSR | stat.S_IRUSR)
+            os.remove(FullPath)
+    # The deepest folders first. A folder that still holds excluded files is kept
+    for FullPath in reversed(Folders):
+        try:
+            os.rmdir(FullPath)
+        except OSError:
+            pass
+    return
+
+
+def ExtractMembers(
+    zipObj: ZipFile,
+    Members: list,
+    TargetDir,
+    KeepPermissions=False,
+    Progress=None,
+    Workers: int = 1,
+    MTimes: dict = None,
+) -> list:
+    """
+    Extract the ZipInfo objects in Members into TargetDir.
+    The folders are created first and the symbolic links last, so no other member is written through a link.
+    With more than one worker, the files in between are extracted in parallel. See ExtractParallel.
+    Afterwards, the mtimes and with KeepPermissions the unix permissions are restored in one pass.
+    MTimes holds the exact mtimes from the manifest, by name. Returns (path, ZipInfo) for every member.
+    """
+    Extracted = ExtractMembersOnly(zipObj, Members, TargetDir, Progress, Workers)
+    zipfile_SaveAndRestore.restore_metadata(Extracted, MTimes, KeepPermissions)
+    return Extracted
+
+
+def ExtractMembersOnly(
+    zipObj: ZipFile, Members: list, TargetDir, Progress=None, Workers: int = 1
+) -> list:
+    """Extract Members like ExtractMembers, but leave the mtimes and permissions for later."""
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    Folders = [info for info in Members if info.is_dir()]
+    Links = [info for info in Members if info.is_symlink()]
+    Files = [info for info in Members if not info.is_dir() and not info.is_symlink()]
+
+    Extracted = [ExtractMember(zipObj, info, TargetDir, Progress) for info in Folders]
+    Workers = Backup_SaveAndRestore.ReturnWorkerCount(Workers)
+    if Workers > 1 and len(Files) > 1 and zipObj.filename is not None:
+        Extracted += ExtractParallel(zipObj, Files, TargetDir, Progress, Workers)
+    else:
+        Extracted += [
+            ExtractMember(zipObj, info, TargetDir, Progress) for info in Files
+        ]
+    Extracted += [ExtractMember(zipObj, info, TargetDir, Progress) for info in Links]
+    return Extracted
+
+
+def ExtractMember(zipObj: ZipFile, info, TargetDir, Progress) -> tuple:
+    """Extract a single member into TargetDir and report it to Progress. Returns (path, info)."""
+    extracted_path = zipObj.extract(info, TargetDir, symlinks=True)
+    Progress.Add(1, info.file_size)
+    return extracted_path, info
+
+
+def ExtractParallel(
+    zipObj: ZipFile, Members: list, TargetDir, Progress, Workers: int
+) -> list:
+    """
+    Extract Members on a pool of worker threads.
+    A ZipFile serializes all reads on its lock, so every worker reads through its own clone of zipObj:
+    a separate file handle that shares the central directory. Reading, decompressing and writing the
+    members then runs at the same time on all workers. Returns (path, ZipInfo) for every member.
+    """
+    Local = threading.local()
+    Clones = []
+    ClonesLock = threading.Lock()
+
+    def Extract(info):
+        Progress.Check()
+        Clone = getattr(Local, "zipObj", None)
+        if Clone is None:
+            Clone = zipObj.clone()
+            Local.zipObj = Clone
+            with ClonesLock:
+                Clones.append(Clone)
+        return ExtractMember(Clone, info, TargetDir, Progress)
+
+    Extracted = []
+    try:
+        with ThreadPoolExecutor(max_workers=Workers) as Pool:
+            Futures = [Pool.submit(Extract, info) for info in Members]
+            try:
+                for Future in Futures:
+                    Extracted.append(Future.result())
+            except BaseException:
+                # Do not start the members that are still waiting
+                for Pending in Futures:
+                    Pending.cancel()
+                raise
+    finally:
+        for Clone in Clones:
+            Clone.close()
+    return Extracted
+
+
+def RestoreArchive(
+    ArchivePath,
+    TargetDir,
+    Exclude=None,
+    KeepPermissions=False,
+    Progress=None,
+    Workers: int = 0,
+) -> int:
+    """
+    Extract an addon archive into TargetDir.
+    For incremental archives, every file is taken from the archive in the chain that holds it,
+    so any point in the chain can be restored.
+
+    Args:
+        ArchivePath: The archive to restore.
+        TargetDir: The folder to extract into.
+        Exclude (optional): Callable that returns True for member names that must be skipped.
+        KeepPermissions (bool, optional): Apply the unix permissions stored in the archive.
+            The mtimes are always restored, so caches that check them, like __pycache__, stay valid.
+        Progress (JobProgress, optional): Receives the progress and can cancel the restore.
+        Workers (int, optional): Number of threads that extract files. 0 means one per core. Defaults to 0.
+
+    Returns:
+        int: the number of restored files.
+    """
+    if Exclude is None:
+
+        def Exclude(Name):
+            return False
+
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+
+    Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+
+    # Archives without a manifest are extracted as they are
+    if Manifest is None:
+        with ZipFile(ArchivePath, "r") as zipObj:
+            Members = [
+                info
+                for info in zipObj.infolist()
+                if not IsMetadata(info.filename) and not Exclude(info.filename)
+            ]
+            Progress.SetTotal(len(Members), sum(info.file_size for info in Members))
+            ExtractMembers(
+                zipObj, Members, TargetDir, KeepPermissions, Progress, Workers
+            )
+        return len(Members)
+
+    Archives = ResolveArchives(ArchivePath, Manifest)
+
+    # Create the folders, including the empty ones
+    for Folder in Manifest["Folders"]:
+        if not Exclude(Folder + "/"):
+            os.makedirs(os.path.join(TargetDir, Folder), exist_ok=True)
+
+    # Group the files by the archive that holds them, so every archive is opened once
+    Groups = {}
+    TotalFiles = 0
+    TotalBytes = 0
+    for Name, Entry in Manifest["Files"].items():
+        if not Exclude(Name):
+            Groups.setdefault(Archives[Entry[3]], []).append(Name)
+            TotalFiles += 1
+            TotalBytes += Entry[0]
+    Progress.SetTotal(TotalFiles, TotalBytes)
+
+    Counter = ExtractGroups(
+        Groups,
+        TargetDir,
+        KeepPermissions,
+        Progress,
+        Workers,
+        ReturnMTimes(Manifest["Files"]),
+    )
+    RestoreHardlinks(Manifest.get("Hardlinks", {}), TargetDir, Exclude)
+    return Counter
+
+
+def ReturnMTimes(Files: dict) -> dict:
+    """Return the mtimes in nanoseconds, by name, of the "Files" of a manifest."""
+    return {Name: Entry[1] for Name, Entry in Files.items()}
+
+
+def ExtractGroups(
+    Groups: dict,
+    TargetDir,
+    KeepPermissions=False,
+    Progress=None,
+    Workers: int = 0,
+    MTimes: dict = None,
+) -> int:
+    """
+    Extract the members in Groups, {archive path: [member names]}, into TargetDir.
+    The symbolic links of all archives are created after the files.
+    The mtimes and permissions are restored at the end, see ExtractMembers. Returns the number of extracted members.
+    """
+    Extracted = []
+    Links = {}
+    for Path, Names in Groups.items():
+        with ZipFile(Path, "r") as zipObj:
+            Members = [zipObj.getinfo(Name) for Name in Names]
+            Links[Path] = [info for info in Members if info.is_symlink()]
+            Members = [info for info in Members if not info.is_symlink()]
+            Extracted += ExtractMembersOnly(
+                zipObj, Members, TargetDir, Progress, Workers
+            )
+    for Path, Members in Links.items():
+        if len(Members) > 0:
+            with ZipFile(Path, "r") as zipObj:
+                Extracted += ExtractMembersOnly(zipObj, Members, TargetDir, Progress)
+    zipfile_SaveAndRestore.restore_metadata(Extracted, MTimes, KeepPermissions)
+    return len(Extracted)
+
+
+def RestoreHardlinks(Hardlinks: dict, TargetDir, Exclude=None):
+    """
+    Recreate the hardlinks of a manifest or snapshot, after the files they link to are restored.
+    Where hardlinks are not supported, the file is copied.
+    """
+    for Name, Source in Hardlinks.items():
+        if Exclude is not None and Exclude(Name):
+            continue
+        SourcePath = os.path.join(TargetDir, *Source.split("/"))
+        if not os.path.isfile(SourcePath):
+            continue
+        FullPath = os.path.join(TargetDir, *Name.split("/"))
+        os.makedirs(os.path.dirname(FullPath), exist_ok=True)
+        if os.path.lexists(FullPath):
+            os.remove(FullPath)
+        try:
+            os.link(SourcePath, FullPath)
+        except OSError:
+            shutil.copy2(SourcePath, FullPath)
+    return
+
+
+def PlanRestore(
+    ArchivePath,
+    TargetDir,
+    Exclude=None,
+    Progress=None,
+    Addons: list = None,
+    Rules=None,
+) -> dict:
+    """
+    Compare an addon archive with TargetDir and return what a restore must change. Nothing is written.
+    A file is unchanged if its size and CRC match the archive. When the manifest has the same mtime
+    as the file on disk, the CRC is not computed. Apply the plan with ApplyRestorePlan.
+
+    Args:
+        ArchivePath: The archive to restore.
+        TargetDir: The folder to restore into.
+        Exclude (optional): Callable that returns True for names that must be left alone,
+            in the archive and on disk. Folder names end with "/".
+        Progress (JobProgress, optional): Can cancel the comparison.
+        Addons (list, optional): Only restore these top-level folders, see ListAddons.
+            Only their members are read and only their folders on disk are compared. Defaults to None (all).
+        Rules (ExcludeRules, optional): The exclusion rules of the backup, see ReadExcludeRules.
+            What they match on disk was not backed up, so it is never deleted. The folders they match
+            are not compared at all. The ignore files of the addons apply as well.
+
+    Returns:
+        dict: "Create", "Update" and "Delete" (lists of names), "Unchanged" (number of files),
+            "Keep" (the names of the unchanged files), "Folders" (all folders in the archive),
+            "DeleteFolders", "Hardlinks" ({name: source} to link again),
+            "Groups" ({archive path: [names to extract]}), "Bytes" (to extract), "Addons",
+            "Touch" ({name: ZipInfo} of unchanged files with another mtime or mode)
+            and "MTimes" ({name: mtime in nanoseconds} for the files to extract or touch).
+    """
+    if Exclude is None:
+
+        def Exclude(Name):
+            return False
+
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+
+    # Leave everything outside the selected addons alone
+    if Addons is not None:
+        Addons = sorted(set(Addons))
+        ExcludeRest = Exclude
+
+        def Exclude(Name):
+            return Name.split("/", 1)[0] not in Addons or ExcludeRest(Name)
+
+    # The state in the archive: the folders and, per file, (archive path, ZipInfo, mtime in ns or None)
+    Folders = set()
+    Members = {}
+    Hardlinks = {}
+    Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+    if Manifest is None:
+        with ZipFile(ArchivePath, "r") as zipObj:
+            for info in zipObj.infolist():
+                Name = info.filename.rstrip("/")
+                if IsMetadata(info.filename) or Exclude(info.filename):
+                    continue
+                if info.is_dir():
+                    Folders.add(Name)
+                else:
+                    Members[Name] = (ArchivePath, info, None)
+    else:
+        Archives = ResolveArchives(ArchivePath, Manifest)
+        Folders.update(Name for Name in Manifest["Folders"] if not Exclude(Name + "/"))
+        Groups = {}
+        for Name, Entry in Manifest["Files"].items():
+            if not Exclude(Name):
+                Groups.setdefault(Archives[Entry[3]], []).append(Name)
+        for Path, Names in Groups.items():
+            with ZipFile(Path, "r") as zipObj:
+                for Name in Names:
+                    Members[Name] = (
+                        Path,
+                        zipObj.getinfo(Name),
+                        Manifest["Files"][Name][1],
+                    )
+        Hardlinks = {
+            Name: Source
+            for Name, Source in Manifest.get("Hardlinks", {}).items()
+            if not Exclude(Name)
+        }
+    # The parent folders of every file are needed as well
+    for Name in list(Members) + list(Hardlinks):
+        Parts = Name.split("/")[:-1]
+        for i in range(len(Parts)):
+            Folders.add("/".join(Parts[: i + 1]))
+
+    # The state on disk
+    DiskFolders = set()
+    DiskFiles = {}
+    # (folder, prefix of the names below it)
+    Roots = [(TargetDir, "")]
+    if Addons is not None:
+        Roots = [(os.path.join(TargetDir, Addon), Addon + "/") for Addon in Addons]
+        DiskFolders.update(
+            Addon for Addon in Addons if os.path.isdir(os.path.join(TargetDir, Addon))
+        )
+    for Root, Prefix in Roots:
+        if not os.path.isdir(Root) or os.path.islink(Root):
+            continue
+        for FullPath, Name, IsFolder, st in Exclude_SaveAndRestore.Walk(
+            Root, Rules, Prefix=Prefix
+        ):
+            if IsFolder:
+                if not Exclude(Name + "/"):
+                    DiskFolders.add(Name)
+            elif not Exclude(Name):
+                DiskFiles[Name] = (FullPath, st)
+
+    Plan = {
+        "Create": [],
+        "Update": [],
+        "Delete": [],
+        "Unchanged": 0,
+        "Keep": [],
+        "Folders": sorted(Folders),
+        "DeleteFolders": sorted(DiskFolders - Folders, reverse=True),
+        "Hardlinks": {},
+        "Groups": {},
+        "Bytes": 0,
+        "Touch": {},
+        "MTimes": {},
+        "Addons": Addons,
+    }
+    Progress.SetTotal(len(Members), 0)
+    Unchanged = set()
+    for Name, (Path, info, MTime) in Members.items():
+        Progress.Add(1)
+        if Name in DiskFiles:
+            FullPath, st = DiskFiles[Name]
+            if IsUnchanged(FullPath, st, info, MTime):
+                Plan["Unchanged"] += 1
+                Plan["Keep"].append(Name)
+                Unchanged.add(Name)
+                if HasOtherMetadata(st, info, MTime):
+                    Plan["Touch"][Name] = info
+                    if MTime is not None:
+                        Plan["MTimes"][Name] = MTime
+                continue
+            Plan["Update"].append(Name)
+        else:
+            Plan["Create"].append(Name)
+        Plan["Groups"].setdefault(Path, []).append(Name)
+        Plan["Bytes"] += info.file_size
+        if MTime is not None:
+            Plan["MTimes"][Name] = MTime
+
+    # A hardlink is only unchanged if it still shares its data with an unchanged file
+    for Name, Source in Hardlinks.items():
+        if Name in DiskFiles and Source in Unchanged:
+            try:
+                if os.path.samefile(DiskFiles[Name][0], DiskFiles[Source][0]):
+                    Plan["Unchanged"] += 1
+                    Plan["Keep"].append(Name)
+                    continue
+            except OSError:
+                pass
+        Plan["Hardlinks"][Name] = Source
+        Plan["Update" if Name in DiskFiles else "Create"].append(Name)
+
+    for Name in DiskFiles:
+        if Name not in Members and Name not in Hardlinks:
+            Plan["Delete"].append(Name)
+    return Plan
+
+
+def IsUnchanged(FullPath, st, info, MTime=None) -> bool:
+    """Return True if the file or link FullPath, with lstat result st, has the content of the ZipInfo info."""
+    if info.is_symlink():
+        if not stat.S_ISLNK(st.st_mode):
+            return False
+        Target = os.fsencode(os.readlink(FullPath))
+        return len(Target) == info.file_size and zlib.crc32(Target) == info.CRC
+    if not stat.S_ISREG(st.st_mode) or st.st_size != info.file_size:
+        return False
+    if MTime is not None and st.st_mtime_ns == MTime:
+        return True
+    return CrcFile(FullPath) == info.CRC
+
+
+def HasOtherMetadata(st, info, MTime=None) -> bool:
+    """
+    Return True if an unchanged file, with lstat result st, has another mtime than MTime
+    or, on unix, other permissions than the ZipInfo info.
+    """
+    if stat.S_ISLNK(st.st_mode):
+        return False
+    if MTime is not None and st.st_mtime_ns != MTime:
+        return True
+    # Windows only knows read-only, so its modes never match those of a unix archive
+    if os.name == "posix" and info.create_system == ZIP_SYSTEM:
+        Mode = stat.S_IMODE(info.external_attr >> 16)
+        if Mode != 0 and Mode != stat.S_IMODE(st.st_mode):
+            return True
+    return False
+
+
+def CrcFile(FullPath) -> int:
+    """Return the CRC-32 of a file, as stored in zip archives."""
+    CRC = 0
+    with open(FullPath, "rb") as file:
+        while True:
+            data = file.read(CRC_CHUNK_SIZE)
+            if not data:
+                break
+            CRC = zlib.crc32(data, CRC)
+    return CRC
+
+
+def ApplyRestorePlan(
+    Plan: dict, TargetDir, KeepPermissions=False, Progress=None, Workers: int = 0
+) -> int:
+    """
+    Make TargetDir match the archive, with a plan from PlanRestore.
+    Only the files in the plan are removed, extracted or linked. Returns the number of changed files.
+    """
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    Changed = len(Plan["Create"]) + len(Plan["Update"]) + len(Plan["Delete"])
+    Progress.SetTotal(Changed, Plan["Bytes"])
+
+    # Remove the files that are gone or differ. Changed files are removed as well, so no file
+    # is written through a link and read-only files can be replaced
+    for Name in Plan["Delete"] + Plan["Update"]:
+        RemoveFile(os.path.join(TargetDir, *Name.split("/")))
+        if Name in Plan["Delete"]:
+            Progress.Add(1)
+    for Name in Plan["DeleteFolders"]:
+        try:
+            os.rmdir(os.path.join(TargetDir, *Name.split("/")))
+        except OSError:
+            # The folder still holds excluded files
+            pass
+
+    for Name in Plan["Folders"]:
+        os.makedirs(os.path.join(TargetDir, *Name.split("/")), exist_ok=True)
+    ExtractGroups(
+        Plan["Groups"], TargetDir, KeepPermissions, Progress, Workers, Plan["MTimes"]
+    )
+    TouchFiles(Plan, TargetDir, KeepPermissions)
+    RestoreHardlinks(Plan["Hardlinks"], TargetDir)
+    Progress.Add(len(Plan["Hardlinks"]))
+    return Changed
+
+
+def TouchFiles(Plan: dict, TargetDir, KeepPermissions=False):
+    """Give the unchanged files in Plan["Touch"] the mtime, and with KeepPermissions the mode, from the archive."""
+    zipfile_SaveAndRestore.restore_metadata(
+        [
+            (os.path.join(TargetDir, *Name.split("/")), info)
+            for Name, info in Plan["Touch"].items()
+        ],
+        Plan["MTimes"],
+        KeepPermissions,
+    )
+    return
+
+
+def RemoveFile(FullPath):
+    """Remove a file or link. Read-only files are made writable first."""
+    try:
+        os.remove(FullPath)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        os.chmod(FullPath, stat.S_IWUSR | stat.S_IRUSR)
+        os.remove(FullPath)
+    return
+
+
+def FormatPlan(Plan: dict) -> str:
+    """Return a one-line summary of a plan from PlanRestore."""
+    return (
+        f"{len(Plan['Create'])} files to create, {len(Plan['Update'])} to update "
+        + f"({Plan['Bytes'] / (1024 * 1024):.1f} MB), {len(Plan['Delete'])} to delete, "
+        + f"{Plan['Unchanged']} unchanged"
+    )
+
+
+def ApplyRestorePlanStaged(
+    Plan: dict,
+    TargetDir,
+    Exclude=None,
+    KeepPermissions=False,
+    Progress=None,
+    Workers: int = 0,
+    Rules=None,
+) -> bool:
+    """
+    Restore a plan from PlanRestore into a staging folder next to TargetDir and swap it in.
+    Unchanged files and everything that matches Exclude or Rules are hardlinked from TargetDir, so only the changed
+    files are written. Pass the same Exclude and Rules as to PlanRestore.
+    TargetDir stays untouched until the swap, and is kept as rollback point afterwards.
+    If the plan is for a selection of addons, only their folders are swapped. Their rollback points are
+    kept in a folder next to TargetDir, see ReturnPreviousAddonPath.
+    If the restore fails or is cancelled, the staging folder is removed.
+
+    Returns:
+        bool: False if TargetDir could not be renamed, for example because a file in it is in use.
+            Nothing is changed then, and the plan can still be applied in place with ApplyRestorePlan.
+    """
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    Progress.SetTotal(
+        len(Plan["Create"]) + len(Plan["Update"]) + len(Plan["Delete"]), Plan["Bytes"]
+    )
+    StagingDir = ReturnStagingPath(TargetDir)
+    # Replaced rollback points and failed restores go to the trash next to TargetDir
+    TrashDir = ReturnTrashDir(TargetDir)
+    # (staging folder, target, rollback point) for every folder to swap
+    Swaps = [(StagingDir, TargetDir, ReturnPreviousPath(TargetDir))]
+    if Plan.get("Addons") is not None:
+        Swaps = [
+            (
+                os.path.join(StagingDir, Addon),
+                os.path.join(TargetDir, Addon),
+                ReturnPreviousAddonPath(TargetDir, Addon),
+            )
+            for Addon in Plan["Addons"]
+        ]
+    try:
+        os.makedirs(StagingDir)
+        for Staging, Target, Previous in Swaps:
+            os.makedirs(Staging, exist_ok=True)
+        for Name in Plan["Folders"]:
+            os.makedirs(os.path.join(StagingDir, *Name.split("/")), exist_ok=True)
+        for Name in Plan["Keep"]:
+            Progress.Check()
+            Source = os.path.join(TargetDir, *Name.split("/"))
+            Target = os.path.join(StagingDir, *Name.split("/"))
+            # A hardlink shares its mtime and mode, so files to touch are copied. The rollback point keeps its own
+            if Name in Plan["Touch"]:
+                shutil.copy2(Source, Target)
+            else:
+                CloneFile(Source, Target)
+        if Plan.get("Addons") is None:
+            CloneExcluded(TargetDir, StagingDir, Exclude, Rules)
+        else:
+            for Addon in Plan["Addons"]:
+                CloneExcluded(
+                    os.path.join(TargetDir, Addon),
+                    os.path.join(StagingDir, Addon),
+                    Exclude,
+                    Rules,
+                    Prefix=Addon + "/",
+                )
+        ExtractGroups(
+            Plan["Groups"],
+            StagingDir,
+            KeepPermissions,
+            Progress,
+            Workers,
+            Plan["MTimes"],
+        )
+        TouchFiles(Plan, StagingDir, KeepPermissions)
+        RestoreHardlinks(Plan["Hardlinks"], StagingDir)
+        Progress.Add(len(Plan["Hardlinks"]) + len(Plan["Delete"]))
+        Progress.Check()
+
+        # Swap the folders in. If one fails, the ones that were swapped already are swapped back
+        Done = []
+        try:
+            for Staging, Target, Previous in Swaps:
+                SwapIn(Staging, Target, Previous, TrashDir)
+                Done.append((Target, Previous))
+        except OSError:
+            for Target, Previous in reversed(Done):
+                if os.path.lexists(Previous):
+                    Rollback(Target, Previous)
+                else:
+                    # The addon was not installed before
+                    RemoveTree(Target, TrashDir)
+            RemoveTree(StagingDir, TrashDir)
+            return False
+        RemoveTree(StagingDir, TrashDir)
+    except BaseException:
+        RemoveTree(StagingDir, TrashDir)
+        raise
+    return True
+
+
+def ReturnStagingPath(Target) -> str:
+    """Return a new name next to Target, to build a restore in."""
+    Target = os.path.normpath(os.fspath(Target))
+    return f"{Target}{STAGING_SUFFIX}-{uuid.uuid4().hex[:8]}"
+
+
+def ReturnTrashDir(TargetDir) -> str:
+    """Return the trash folder for a restore into TargetDir. It is next to TargetDir, so on the same drive."""
+    return Trash_SaveAndRestore.ReturnTrashDir(
+        os.path.dirname(os.path.normpath(os.fspath(TargetDir)))
+    )
+
+
+def ReturnPreviousPath(Target) -> str:
+    """Return the rollback point of Target."""
+    return os.path.normpath(os.fspath(Target)) + PREVIOUS_SUFFIX
+
+
+def ReturnPreviousAddonPath(TargetDir, Addon: str) -> str:
+    """
+    Return the rollback point of an addon that was restored on its own.
+    It can not be next to the addon, because FreeCAD would load it as another addon.
+    """
+    return os.path.join(
+        os.path.normpath(os.fspath(TargetDir)) + PREVIOUS_ADDONS_SUFFIX, Addon
+    )
+
+
+def SwapIn(StagingPath, Target, Previous=None, TrashDir=None):
+    """
+    Replace the folder or file Target by StagingPath, which must be on the same drive.
+    The replaced Target becomes the rollback point Previous, by default next to Target.
+    The previous rollback point is moved to TrashDir, by default the trash next to Target.
+    Files are replaced in one atomic step; folders with two renames.
+    """
+    Target = os.path.normpath(os.fspath(Target))
+    if Previous is None:
+        Previous = ReturnPreviousPath(Target)
+    os.makedirs(os.path.dirname(Previous), exist_ok=True)
+    if os.path.isfile(StagingPath):
+        # Keep the current file as rollback point, without a moment where Target is missing
+        RemoveTree(Previous)
+        if os.path.lexists(Target):
+            try:
+                os.link(Target, Previous)
+            except OSError:
+                shutil.copy2(Target, Previous)
+            # Windows does not replace read-only files
+            os.chmod(Target, stat.S_IWRITE | stat.S_IREAD)
+        os.replace(StagingPath, Target)
+        return
+
+    # Rename the old rollback point first, so it is only removed when the swap succeeded
+    Expired = None
+    if os.path.lexists(Previous):
+        Expired = ReturnStagingPath(Previous)
+        os.rename(Previous, Expired)
+    try:
+        if os.path.lexists(Target):
+            os.rename(Target, Previous)
+        try:
+            os.rename(StagingPath, Target)
+        except OSError:
+            if os.path.lexists(Previous):
+                os.rename(Previous, Target)
+            raise
+    except OSError:
+        if Expired is not None and not os.path.lexists(Previous):
+            os.rename(Expired, Previous)
+        raise
+    if Expired is not None:
+        RemoveTree(Expired, TrashDir or ReturnTrashDir(Target))
+    return
+
+
+def Rollback(Target, Previous=None):
+    """
+    Swap Target and its rollback point. Calling Rollback again undoes the rollback.
+    Previous is the rollback point, by default next to Target. See ReturnPreviousAddonPath for addons
+    that were restored on their own. Raises FileNotFoundError if there is no rollback point.
+    """
+    Target = os.path.normpath(os.fspath(Target))
+    if Previous is None:
+        Previous = ReturnPreviousPath(Target)
+    if not os.path.lexists(Previous):
+        raise FileNotFoundError(f"There is no rollback point for {Target}")
+    # The target may not exist, when the addon was not installed before the restore
+    if not os.path.lexists(Target):
+        os.rename(Previous, Target)
+        return
+    Temporary = ReturnStagingPath(Target)
+    os.rename(Target, Temporary)
+    os.rename(Previous, Target)
+    os.rename(Temporary, Previous)
+    return
+
+
+def CloneFile(Source, Target):
+    """Hardlink the file Source as Target, or copy it where hardlinks are not supported. Links are recreated."""
+    os.makedirs(os.path.dirname(Target), exist_ok=True)
+    if os.path.islink(Source):
+        os.symlink(os.readlink(Source), Target)
+        return
+    try:
+        os.link(Source, Target)
+    except OSError:
+        shutil.copy2(Source, Target)
+    return
+
+
+def CloneExcluded(SourceDir, TargetDir, Exclude=None, Rules=None, Prefix: str = ""):
+    """
+    Clone everything below SourceDir that matches Exclude or the exclusion rules Rules into TargetDir.
+    See CloneFile. The ignore files of the addons apply with Rules, like in the backup.
+    Prefix is put before the names that are matched, when SourceDir is a sub folder, e.g. "Addon/".
+    """
+    if (Exclude is None and Rules is None) or not os.path.isdir(SourceDir):
+        return
+    # The names that the rules keep. Everything else was skipped by the backup
+    Included = None
+    if Rules is not None:
+        Included = {
+            Name
+            for FullPath, Name, IsFolder, st in Exclude_SaveAndRestore.Walk(
+                SourceDir, Rules, Prefix=Prefix
+            )
+        }
+    # The excluded folders, with a trailing "/"
+    Excluded = ()
+    for FullPath, Name, IsFolder, st in Exclude_SaveAndRestore.Walk(
+        SourceDir, Prefix=Prefix, IgnoreFiles=False
+    ):
+        Target = os.path.join(TargetDir, *Name[len(Prefix) :].split("/"))
+        # Everything below an excluded folder is cloned with it
+        if not Name.startswith(Excluded):
+            IsExcluded = Included is not None and Name not in Included
+            if not IsExcluded and Exclude is not None:
+                IsExcluded = Exclude(Name + "/" if IsFolder else Name)
+            if not IsExcluded:
+                continue
+            if IsFolder:
+                Excluded = Excluded + (Name + "/",)
+        if IsFolder:
+            os.makedirs(Target, exist_ok=True)
+        else:
+            CloneFile(FullPath, Target)
+    return
+
+
+def RemoveTree(Path, TrashDir=None):
+    """
+    Remove a folder, file or link, if it exists. Links are not followed.
+    Folders are moved to TrashDir and purged in the background, see Trash_SaveAndRestore.Discard.
+    """
+    Trash_SaveAndRestore.Discard(Path, TrashDir)
+    return
+
+
+def RestoreFile(zipObj: ZipFile, info, Target, KeepPermissions=False):
+    """
+    Restore a single member as the file Target, for example a config file.
+    The member is written to a staging file next to Target first, and then swapped in.
+    The replaced file is kept as rollback point.
+    """
+    Target = os.path.normpath(os.fspath(Target))
+    StagingPath = ReturnStagingPath(Target)
+    try:
+        with zipObj.open(info) as Source, open(StagingPath, "wb") as Destination:
+            shutil.copyfileobj(Source, Destination, CRC_CHUNK_SIZE)
+            Destination.flush()
+            os.fsync(Destination.fileno())
+        if KeepPermissions is True and info.create_system == ZIP_SYSTEM:
+            unix_attributes = info.external_attr >> 16
+            if unix_attributes:
+                os.chmod(StagingPath, unix_attributes)
+        SwapIn(StagingPath, Target)
+    except BaseException:
+        RemoveFile(StagingPath)
+        raise
+    return
+
+
+def ListAddons(ArchivePath) -> dict:
+    """
+    Return {top-level folder: [files, bytes]} for an addon archive.
+    The index is built once per archive, from the manifest or from the central directory.
+    """
+    st = os.stat(ArchivePath)
+    Key = (os.path.abspath(ArchivePath), st.st_size, st.st_mtime_ns)
+    if Key in _AddonIndex:
+        return _AddonIndex[Key]
+
+    Index = {}
+    Manifest = Backup_SaveAndRestore.ReadManifest(ArchivePath)
+    if Manifest is None:
+        with ZipFile(ArchivePath, "r") as zipObj:
+            Entries = [
+                (info.filename.rstrip("/"), info.is_dir(), info.file_size)
+                for info in zipObj.infolist()
+                if not IsMetadata(info.filename)
+            ]
+    else:
+        Entries = [(Name, True, 0) for Name in Manifest["Folders"]]
+        Entries += [
+            (Name, False, Entry[0]) for Name, Entry in Manifest["Files"].items()
+        ]
+        Entries += [(Name, False, 0) for Name in Manifest.get("Hardlinks", {})]
+    for Name, IsFolder, Size in Entries:
+        # Files next to the addons are not an addon
+        if "/" not in Name and not IsFolder:
+            continue
+        Counts = Index.setdefault(Name.split("/", 1)[0], [0, 0])
+        if not IsFolder:
+            Counts[0] += 1
+            Counts[1] += Size
+    _AddonIndex[Key] = Index
+    return Index
+
+
+def main(args=None):
+    import argparse
+    import tempfile
+    import time
+
+    description = (
+        "Compare copying stored members by the kernel and through Python buffers, "
+        + "for a stored backup and its restore. Reports the wall time and the CPU time."
+    )
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "directory", help="Folder to backup, for example FreeCAD's Mod folder"
+    )
+    args = parser.parse_args(args)
+
+    def Measure(Function, *Args, **Kwargs):
+        Start = os.times()
+        Function(*Args, **Kwargs)
+        End = os.times()
+        return (
+            End.elapsed - Start.elapsed,
+            End.user - Start.user,
+            End.system - Start.system,
+        )
+
+    KernelCopyMinSize = zipfile_SaveAndRestore.KERNEL_COPY_MIN_SIZE
+    Runs = [("Python buffers", None), ("kernel copy", KernelCopyMinSize)]
+    try:
+        with tempfile.TemporaryDirectory() as TempDir:
+            ArchivePath = os.path.join(TempDir, "benchmark.zip")
+            TargetDir = os.path.join(TempDir, "Mod")
+            for Name, MinSize in Runs:
+                zipfile_SaveAndRestore.KERNEL_COPY_MIN_SIZE = MinSize
+                Backup = Measure(
+                    Backup_SaveAndRestore.BackupDirectory,
+                    args.directory,
+                    ArchivePath,
+                    Parallel=False,
+                    Compression=ZIP_STORED,
+                )
+                Restore = Measure(RestoreArchive, ArchivePath, TargetDir, Workers=1)
+                MegaBytes = os.path.getsize(ArchivePath) / (1024 * 1024)
+                for Step, (Wall, User, System) in (
+                    ("backup", Backup),
+                    ("restore", Restore),
+                ):
+                    print(
+                        f"{Name}, {Step} of {MegaBytes:.1f} MB: {Wall:.2f} s, "
+                        + f"CPU {User + System:.2f} s (user {User:.2f} s, system {System:.2f} s)"
+                    )
+                os.remove(ArchivePath)
+                RemoveTree(TargetDir, os.path.join(TempDir, "trash"))
+                Trash_SaveAndRestore.PurgeTree(os.path.join(TempDir, "trash"))
+    finally:
+        zipfile_SaveAndRestore.KERNEL_COPY_MIN_SIZE = KernelCopyMinSize
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ SOFTWARE.
 """
 
 import os
+import threading
 from stat import S_IWUSR, S_IREAD, S_IWGRP, S_IRGRP
 
 import FreeCAD as App
@@ -47,6 +48,14 @@ import sys
 
 import Standard_Functions_SaveAndRestore as Standard_Functions
 import LoadDialog_SaveAndRestore
+import Trash_SaveAndRestore
+import Addons_SaveAndRestore
+import Jobs_SaveAndRestore
+import Watcher_SaveAndRestore
+import Timing_SaveAndRestore
+import ConfigSnapshots_SaveAndRestore
+import Catalog_SaveAndRestore
+import Parameters_SaveAndRestore
 
 translate = App.Qt.translate
 
@@ -67,14 +76,22 @@ class SaveAndRestore:
         """
         super().__init__()
 
-        # Make sure that the config files are read/write
-        UserConfig = App.getUserConfigDir() + "user.cfg"
-        SystemConfig = App.getUserConfigDir() + "system.cfg"
-        os.chmod(UserConfig, S_IWUSR | S_IREAD | S_IWGRP | S_IRGRP)
-        os.chmod(SystemConfig, S_IWUSR | S_IREAD | S_IWGRP | S_IRGRP)
+        with Timing_SaveAndRestore.Span("SaveAndRestore.__init__"):
+            # Make sure that the config files are read/write
+            with Timing_SaveAndRestore.Span("chmod config files"):
+                UserConfig = App.getUserConfigDir() + "user.cfg"
+                SystemConfig = App.getUserConfigDir() + "system.cfg"
+                os.chmod(UserConfig, S_IWUSR | S_IREAD | S_IWGRP | S_IRGRP)
+                os.chmod(SystemConfig, S_IWUSR | S_IREAD | S_IWGRP | S_IRGRP)
 
-        # Create the application menu
-        self.ApplicationMenus()
+            # The addon registry, opened by the first addon check. The checks update it on the job thread
+            # and the question to the user acknowledges it on the GUI thread, so it is only used with the lock
+            self.Registry = None
+            self.RegistryLock = threading.Lock()
+
+            # Create the application menu
+            with Timing_SaveAndRestore.Span("ApplicationMenus"):
+                self.ApplicationMenus()
 
     def ApplicationMenus(self):
         try:
@@ -130,10 +147,30 @@ class SaveAndRestore:
                     # Run macro only once by disconnecting the signal at first call
                     Gui.getMainWindow().workbenchActivated.disconnect(runStartup)
 
-                    # Write the reset list
-                    self.WriteResetList()
-                    # Check if a addon is changed
-                    self.DetectAddOnChange()
+                    with Timing_SaveAndRestore.Span("runStartup"):
+                        # Purge what is left in the trash from the previous session, in the background
+                        with Timing_SaveAndRestore.Span("StartPurge"):
+                            Trash_SaveAndRestore.StartPurge(
+                                Trash_SaveAndRestore.ReturnTrashDir(
+                                    App.getUserAppDataDir()
+                                )
+                            )
+                        # Check the addons on a background thread, so the workbench is usable right away.
+                        # Only the question to the user is asked on the GUI thread, when the check is done.
+                        # With the watcher, the add-ons that change while FreeCAD runs are checked again.
+                        # The startup timing is reported when this first check is done
+                        if Parameters_SaveAndRestore.WATCH_ADDONS is True:
+                            with Timing_SaveAndRestore.Span("StartAddonWatcher"):
+                                self.StartAddonWatcher()
+
+                        def OnChecked(ResetAddOns):
+                            self.ReportStartupTiming()
+                            self.AskToolbarReset(ResetAddOns)
+
+                        self.SubmitAddonCheck(OnFinished=OnChecked)
+                        # Start the config snapshots
+                        with Timing_SaveAndRestore.Span("StartConfigSnapshots"):
+                            self.StartConfigSnapshots()
 
             # # Connect the function that runs the macro to the appropriate signal
             mw.workbenchActivated.connect(runStartup)
@@ -142,95 +179,159 @@ class SaveAndRestore:
             print(e)
         return
 
-    def DetectAddOnChange(self):
-        # Get the folder with add-ons
-        path = os.path.dirname(__file__)
-        # Make sure you get the Mod folder
-        path = path.split("SaveAndRestore")[0]
-        # # Get the folder with add-ons
-        # for i in range(2):
-        #     # Starting point
-        #     path = os.path.dirname(path)
-
-        # Create a list with addons, for which the toolbar must be reset
-        FileName = os.path.join(path, "SaveAndRestore", "ResetList.json")
-        WB_ResetList = []
-        with open(FileName, "r") as file:
-            WB_ResetList = json.load(file)
-        file.close()
-
-        # Define a indicater for toolbar reset
-        ToolBarReset = False
-
-        # Go through the sub-folders and add them to the list
-        CurrentAddOnList = []
-        for root, dirs, files in os.walk(path):
-            # remove the path from the root and split the remaining path so that only the add-on folder remains
-            # Add this to a list if it is not in yet
-            subdir = root.replace(path + os.sep, "").split(os.sep, 1)[0]
-            # Add the path again to get a full path
-            subdir = os.path.normpath(path + os.sep + subdir)
-
-            # Check if the sub directory is already in the addon list
-            isInList = False
-            for AddOn in CurrentAddOnList:
-                if AddOn == subdir:
-                    isInList = True
-                    break
-            # Add the subdirectory to the current addon list
-            if isInList is False and os.path.exists(subdir):
-                CurrentAddOnList.append(subdir)
-
-        # If there is already a WBlist, read it to compare
-        FileName = os.path.join(path, "SaveAndRestore", "WBList.json")
-        if os.path.exists(FileName):
-            PreviousAddOnList = []
-            with open(FileName, "r") as file:
-                PreviousAddOnList = json.load(file)
-                file.close()
-
-            # Check if an add-on is removed
-            for PreviousAddon in PreviousAddOnList:
-                isInList = False
-                for AddOn in CurrentAddOnList:
-                    if AddOn == PreviousAddon:
-                        isInList = True
-
-                if isInList is False:
-                    for WB in WB_ResetList:
-                        if WB in PreviousAddon:
-                            ToolBarReset = True
-                            break
+    def StartConfigSnapshots(self):
+        # Check on a timer if the config files changed and write a snapshot in the background if so.
+        # The check is done once more when FreeCAD closes, after the parameters are written to the config files.
+        if Parameters_SaveAndRestore.CONFIG_SNAPSHOTS is False:
+            return
+
+        SnapshotDir = ConfigSnapshots_SaveAndRestore.ReturnSnapshotDir(
+            Parameters_SaveAndRestore.SAVE_DIRECTORY
+        )
+        Files = [
+            App.getUserConfigDir() + "user.cfg",
+            App.getUserConfigDir() + "system.cfg",
+        ]
+        Retention = Parameters_SaveAndRestore.CONFIG_SNAPSHOT_RETENTION
+        # Record the FreeCAD version in the snapshots, for the backup catalog
+        Comment = Catalog_SaveAndRestore.ReturnComment(".".join(App.Version()[:3]))
+
+        def OnTimer():
+            ConfigSnapshots_SaveAndRestore.SubmitSnapshot(
+                Files, SnapshotDir, Retention, Comment
+            )
 
-        # Check if a WB is installed that is present in the resetList
-        if ToolBarReset is False:
-            for WB in WB_ResetList:
-                for AddOn in CurrentAddOnList:
-                    if WB in AddOn and WB != "":
-                        # Check if the Addon is disabled
-                        for name in os.listdir(AddOn):
-                            if name == "ADDON_DISABLED":
-                                try:
-                                    # The toolbars must be reset
-                                    ToolBarReset = True
-                                    # After reset, remove the addon from the list
-                                    WB_ResetList.remove(WB)
-                                    # Write the updated list to the resetlist.json
-                                    with open(
-                                        os.path.join(
-                                            path, "SaveAndRestore", "ResetList.json"
-                                        ),
-                                        "w",
-                                    ) as outfile:
-                                        json.dump(WB_ResetList, outfile, indent=4)
-                                    outfile.close()
-                                    break
-                                except Exception:
-                                    pass
-                        break
+        def OnQuit():
+            try:
+                App.saveParameter("User parameter")
+                App.saveParameter("System parameter")
+                ConfigSnapshots_SaveAndRestore.WaitForSnapshot()
+                ConfigSnapshots_SaveAndRestore.TakeSnapshot(
+                    Files, SnapshotDir, Retention, Comment=Comment
+                )
+            except Exception as e:
+                print(e)
+
+        # Check right away, for changes made while FreeCAD was closed
+        OnTimer()
+        if Parameters_SaveAndRestore.CONFIG_SNAPSHOT_INTERVAL > 0:
+            self.SnapshotTimer = QTimer(mw)
+            self.SnapshotTimer.setInterval(
+                Parameters_SaveAndRestore.CONFIG_SNAPSHOT_INTERVAL * 60 * 1000
+            )
+            self.SnapshotTimer.timeout.connect(OnTimer)
+            self.SnapshotTimer.start()
+        QApplication.instance().aboutToQuit.connect(OnQuit)
+        return
+
+    def StartAddonWatcher(self):
+        # Watch the Mod folder on a background thread. A timer on the GUI thread collects the changed add-ons
+        # and checks them with a job, like at startup.
+        # This add-on is not watched: the checks would report it every time they save the registry
+        AddonDir = os.path.dirname(os.path.abspath(__file__))
+        self.AddonWatcher = Watcher_SaveAndRestore.ModWatcher(
+            os.path.dirname(AddonDir), Ignore=[os.path.basename(AddonDir)]
+        )
+        Method = self.AddonWatcher.Start()
+        Standard_Functions.Print(f"Watching the addons with {Method}", "Log")
+
+        def OnTimer():
+            Changes = self.AddonWatcher.TakeChanges()
+            if len(Changes) == 0:
+                return
+            if Watcher_SaveAndRestore.RESCAN in Changes:
+                Changes = None
+            self.SubmitAddonCheck(Changes)
+
+        self.WatcherTimer = QTimer(mw)
+        self.WatcherTimer.setInterval(1000)
+        self.WatcherTimer.timeout.connect(OnTimer)
+        self.WatcherTimer.start()
+        QApplication.instance().aboutToQuit.connect(self.AddonWatcher.Stop)
+        return
+
+    def SubmitAddonCheck(self, Names=None, OnFinished=None):
+        # Cancelling a backup or restore in the dialog does not cancel the check,
+        # so the add-ons the watcher reported are never lost
+        if OnFinished is None:
+            OnFinished = self.AskToolbarReset
+        Jobs_SaveAndRestore.ReturnJobQueue().Submit(
+            translate("FreeCAD SaveAndRestore", "Check addons"),
+            lambda Progress: self.CheckAddOns(Names),
+            OnFinished=OnFinished,
+            Cancellable=False,
+        )
+        return
 
+    def CheckAddOns(self, Names=None) -> list:
+        # Runs on the background thread. Returns the toolbar add-ons that were disabled or removed,
+        # if the toolbars must be reset, otherwise None.
+        # With Names, only these add-ons are read again. See AddonRegistry.Update
+        with Timing_SaveAndRestore.Span("CheckAddOns"), self.RegistryLock:
+            AddonDir = os.path.dirname(os.path.abspath(__file__))
+            if self.Registry is None:
+                with Timing_SaveAndRestore.Span("OpenRegistry"):
+                    self.Registry = Addons_SaveAndRestore.OpenRegistry(
+                        App.getUserAppDataDir(), AddonDir
+                    )
+            with Timing_SaveAndRestore.Span("AddonRegistry.Update"):
+                self.Registry.Update(os.path.dirname(AddonDir), Names)
+
+            # Other changes, like a new add-on, need no action
+            ResetAddOns = self.Registry.NeedsToolbarReset()
+            self.Registry.Acknowledge(
+                [
+                    Name
+                    for Name in self.Registry.ReturnChanges()
+                    if Name not in ResetAddOns
+                ]
+            )
+            with Timing_SaveAndRestore.Span("AddonRegistry.Save"):
+                self.Registry.Save()
+            if len(ResetAddOns) > 0:
+                return ResetAddOns
+        return None
+
+    def ReportStartupTiming(self):
+        # Log the startup spans and add them to the timing report in the FreeCAD user folder
+        Spans = Timing_SaveAndRestore.Finish()
+        if len(Spans) == 0:
+            return
+        Standard_Functions.Print(
+            f"SaveAndRestore startup, {Timing_SaveAndRestore.ReturnMainThreadTime(Spans):.1f} ms on the main thread:\n"
+            + Timing_SaveAndRestore.FormatSpans(Spans),
+            "Log",
+        )
+        try:
+            Timing_SaveAndRestore.WriteReport(
+                os.path.join(
+                    App.getUserAppDataDir(), Timing_SaveAndRestore.REPORT_FILE
+                ),
+                Spans,
+                AddonVersion=Addons_SaveAndRestore.ReadPackageVersion(
+                    os.path.dirname(os.path.abspath(__file__))
+                ),
+                FreeCADVersion=".".join(App.Version()[:3]),
+            )
+        except OSError as e:
+            Standard_Functions.Print(f"Startup timing not written: {e}", "Log")
+        return
+
+    def AskToolbarReset(self, ResetAddOns: list):
+        # Runs on the GUI thread, with the result of CheckAddOns
         # If toolbars must be reset, show a messeage to ask the user if they want to show the dialog
-        if ToolBarReset is True:
+        if ResetAddOns is not None:
+            with self.RegistryLock:
+                # A check that finished while the question was open can report the same add-ons
+                if not set(ResetAddOns) & set(self.Registry.NeedsToolbarReset()):
+                    return
+                # The user is told, so do not ask again for these add-ons
+                self.Registry.Acknowledge(ResetAddOns)
+                try:
+                    self.Registry.Save()
+                except OSError as e:
+                    print(e)
+
             text = translate(
                 "FreeCAD SaveAndRestore",
                 """an add-on is disabled or uninstalled. Do you want to open the "Save and restore" dialog to restore all toolbars or restore to previous saved settings?
@@ -241,111 +342,9 @@ class SaveAndRestore:
             )
 
             if Anwser == "yes":
-                # Write the current addon list to compare on next startup
-                with open(
-                    os.path.join(path, "SaveAndRestore", "WBList.json"), "w"
-                ) as outfile:
-                    json.dump(CurrentAddOnList, outfile, indent=4)
-                outfile.close()
-
                 LoadDialog_SaveAndRestore.main()
         return
 
-    def WriteResetList(self):
-        # Get the folder with add-ons
-        path = os.path.dirname(__file__)
-        # Make sure you get the Mod folder
-        path = path.split("SaveAndRestore")[0]
-
-        resetList = []
-
-        # The list with add-ons for which this applies
-        WbToLookFor = ["FreeCAD-Ribbon"]
-
-        # # Get the folder with add-ons
-        # for i in range(2):
-        #     # Starting point
-        #     path = os.path.dirname(path)
-
-        # Go through the sub-folders and add them to the list
-        CurrentAddOnList = []
-        for root, dirs, files in os.walk(path):
-            # remove the path from the root and split the remaining path so that only the add-on folder remains
-            # Add this to a list if it is not in yet
-            subdir = root.replace(path + os.sep, "").split(os.sep, 1)[0]
-            # Add the path again to get a full path
-            subdir = os.path.normpath(path + os.sep + subdir)
-
-            # Check if the sub directory is already in the addon list
-            isInList = False
-            for AddOn in CurrentAddOnList:
-                if AddOn == subdir:
-                    isInList = True
-                    break
-            # Add the subdirectory to the current addon list
-            if isInList is False and os.path.exists(subdir):
-                CurrentAddOnList.append(subdir)
-
-        # If there is already a WBlist, read it to compare
-        FileName = os.path.join(path, "SaveAndRestore", "WBList.json")
-        if os.path.exists(FileName):
-            PreviousAddOnList = []
-            with open(FileName, "r") as file:
-                PreviousAddOnList = json.load(file)
-                file.close()
-
-            for AddOn in CurrentAddOnList:
-                # Check if an add-on is installed
-                isInList = False
-                for PreviousAddon in PreviousAddOnList:
-                    if AddOn == PreviousAddon:
-                        isInList = True
-
-                if isInList is False:
-                    isInList_2 = False
-                    for WbToLook in WbToLookFor:
-                        if WbToLook in AddOn:
-                            isInList_2 = True
-
-                    if isInList_2 is True:
-                        print("got here")
-                        resetList.append(AddOn)
-
-                # # Check if the Addon is disabled
-                # for name in os.listdir(AddOn):
-                #     if name == "ADDON_DISABLED":
-                #         isInList_2 = False
-                #         for WbToLook in WbToLookFor:
-                #             if WbToLook == os.path.basename(AddOn):
-                #                 isInList_2 = True
-
-                #             if isInList_2 is True:
-                #                 resetList.append(AddOn)
-
-            # Check if an add-on is removed
-            for AddOn in PreviousAddOnList:
-                isInList = False
-                for CurrentAddon in CurrentAddOnList:
-                    if AddOn == CurrentAddon:
-                        isInList = True
-
-                if isInList is False:
-                    isInList_2 = False
-                    for WbToLook in WbToLookFor:
-                        if WbToLook in AddOn:
-                            isInList_2 = True
-
-                    if isInList_2 is True:
-                        resetList.append(AddOn)
-
-        # Write the reset list
-        with open(
-            os.path.join(path, "SaveAndRestore", "ResetList.json"), "w"
-        ) as outfile:
-            json.dump(resetList, outfile, indent=4)
-
-        return
-
 
 class run:
     """
@@ -0,0 +1,456 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# A content-addressed snapshot store for the addon backup.
+# The store lives in a folder with two sub folders:
+#   objects:    the content of every file, once, zlib compressed and named after its sha256 hash.
+#   snapshots:  one small json manifest per snapshot, listing the files and the hash of their content.
+#               Symbolic links are listed with their target, hardlinked files with the name of the first file.
+# Disk use grows with the files that actually change, not with the number of snapshots.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import json
+import stat
+import glob
+import time
+import hashlib
+import zlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from zipfile_SaveAndRestore import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+import Backup_SaveAndRestore
+import Restore_SaveAndRestore
+
+# Name of the store folder inside the save directory
+STORE_FOLDER = "SaveAndRestore Store"
+SNAPSHOT_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+
+def ReturnStoreDir(SaveDirectory) -> str:
+    """Return the store folder inside SaveDirectory."""
+    return os.path.join(str(SaveDirectory), STORE_FOLDER)
+
+
+def ObjectPath(StoreDir, Hash: str) -> str:
+    """Return the path of the object with the given hash."""
+    return os.path.join(StoreDir, "objects", Hash[:2], Hash[2:])
+
+
+def HashFile(FullPath) -> str:
+    """Return the sha256 hash of a file."""
+    Hash = hashlib.sha256()
+    with open(FullPath, "rb") as file:
+        while True:
+            data = file.read(CHUNK_SIZE)
+            if not data:
+                break
+            Hash.update(data)
+    return Hash.hexdigest()
+
+
+def StoreObject(StoreDir, FullPath) -> tuple:
+    """
+    Add the content of a file to the store.
+
+    Returns:
+        tuple: (hash, number of bytes added to the store). The second value is 0 when the content was already stored.
+    """
+    Hash = HashFile(FullPath)
+    Target = ObjectPath(StoreDir, Hash)
+    if os.path.exists(Target):
+        return Hash, 0
+
+    # Write to a temporary file first, so an interrupted backup never leaves a broken object behind
+    os.makedirs(os.path.dirname(Target), exist_ok=True)
+    TempFile = f"{Target}.{uuid.uuid4().hex}.tmp"
+    Compressor = zlib.compressobj(6)
+    with open(FullPath, "rb") as src, open(TempFile, "wb") as dest:
+        while True:
+            data = src.read(CHUNK_SIZE)
+            if not data:
+                break
+            dest.write(Compressor.compress(data))
+        dest.write(Compressor.flush())
+    StoredBytes = os.path.getsize(TempFile)
+    os.replace(TempFile, Target)
+    return Hash, StoredBytes
+
+
+def ReadObject(StoreDir, Hash: str, Target):
+    """Write the content of an object to the file object Target."""
+    Decompressor = zlib.decompressobj()
+    with open(ObjectPath(StoreDir, Hash), "rb") as src:
+        while True:
+            data = src.read(CHUNK_SIZE)
+            if not data:
+                break
+            Target.write(Decompressor.decompress(data))
+        Target.write(Decompressor.flush())
+    return
+
+
+def ListSnapshots(StoreDir) -> list:
+    """Return the snapshot manifests in the store, oldest first."""
+    Snapshots = glob.glob(
+        os.path.join(glob.escape(str(StoreDir)), "snapshots", "*.json")
+    )
+    Snapshots.sort(key=os.path.getmtime)
+    return Snapshots
+
+
+def ReadSnapshot(SnapshotPath) -> dict:
+    with open(SnapshotPath, "r") as file:
+        return json.load(file)
+
+
+def ReturnStoreDirFromSnapshot(SnapshotPath) -> str:
+    """Return the store folder of a snapshot manifest."""
+    return os.path.dirname(os.path.dirname(os.path.abspath(SnapshotPath)))
+
+
+def CreateSnapshot(
+    SourceDir,
+    StoreDir,
+    FileName: str,
+    Workers: int = 0,
+    Keep: int = 0,
+    Progress: Backup_SaveAndRestore.JobProgress = None,
+    Exclude=None,
+) -> tuple:
+    """
+    Add a snapshot of SourceDir to the store.
+    Files with the same size and mtime as in the previous snapshot are not read again.
+
+    Args:
+        SourceDir: The folder to backup.
+        StoreDir: The store folder.
+        FileName (str): Name of the snapshot manifest.
+        Workers (int, optional): Number of workers. 0 means one per core. Defaults to 0.
+        Keep (int, optional): Number of snapshots to keep. Older ones are removed. 0 keeps all. Defaults to 0.
+        Progress (JobProgress, optional): Receives the progress and can cancel the snapshot. Defaults to None.
+            A cancelled snapshot writes no manifest. The objects it already stored are reused by the next one.
+        Exclude (ExcludeRules, optional): Files and folders to skip. Defaults to None (nothing is skipped).
+
+    Returns:
+        tuple: (path of the snapshot manifest, statistics)
+    """
+    StartTime = time.perf_counter()
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    Statistics = {"Files": 0, "Bytes": 0, "NewObjects": 0, "StoredBytes": 0}
+
+    # The previous snapshot serves as cache for the file hashes
+    PreviousFiles = {}
+    Snapshots = ListSnapshots(StoreDir)
+    if len(Snapshots) > 0:
+        PreviousFiles = ReadSnapshot(Snapshots[-1])["Files"]
+
+    Snapshot = {
+        "Version": SNAPSHOT_VERSION,
+        "Id": uuid.uuid4().hex,
+        "Created": datetime.now().isoformat(timespec="seconds"),
+        "Folders": [],
+        # name: [size, mtime in ns, unix mode, sha256]
+        "Files": {},
+        # name: [mtime in ns, link target]
+        "Links": {},
+        # name: name of the file in "Files" it is hardlinked to
+        "Hardlinks": {},
+        # The exclusion patterns of the backup, see Exclude_SaveAndRestore
+        "Exclude": Exclude.Patterns if Exclude is not None else [],
+    }
+    # The first name of every hardlinked file, by (device, inode)
+    Inodes = {}
+
+    Workers = Backup_SaveAndRestore.ReturnWorkerCount(Workers)
+    with ThreadPoolExecutor(max_workers=Workers) as Pool:
+        Futures = {}
+        Entries = Backup_SaveAndRestore.ListFiles(SourceDir, Exclude, Statistics)
+        Progress.SetTotal(
+            sum(1 for Item in Entries if not Item[2]),
+            sum(Item[3].st_size for Item in Entries if not Item[2]),
+        )
+        for FullPath, Name, IsFolder, st in Entries:
+            if IsFolder:
+                Snapshot["Folders"].append(Name)
+                continue
+            if stat.S_ISLNK(st.st_mode):
+                Snapshot["Links"][Name] = [st.st_mtime_ns, os.readlink(FullPath)]
+                Progress.Add(1, st.st_size)
+                continue
+            # Hash a hardlinked file once
+            if st.st_nlink > 1 and st.st_ino != 0:
+                Inode = (st.st_dev, st.st_ino)
+                if Inode in Inodes:
+                    Snapshot["Hardlinks"][Name] = Inodes[Inode]
+                    Progress.Add(1, st.st_size)
+                    continue
+                Inodes[Inode] = Name
+
+            Statistics["Files"] += 1
+            Statistics["Bytes"] += st.st_size
+            Entry = [st.st_size, st.st_mtime_ns, st.st_mode & 0o7777, None]
+            Snapshot["Files"][Name] = Entry
+
+            Previous = PreviousFiles.get(Name)
+            if (
+                Previous is not None
+                and Previous[0] == st.st_size
+                and Previous[1] == st.st_mtime_ns
+                and os.path.exists(ObjectPath(StoreDir, Previous[3]))
+            ):
+                Entry[3] = Previous[3]
+                Progress.Add(1, st.st_size)
+            else:
+                Futures[Name] = Pool.submit(StoreObject, StoreDir, FullPath)
+
+        for Name, Future in Futures.items():
+            if Progress.IsCancelled():
+                # Do not start the objects that are still waiting
+                for Pending in Futures.values():
+                    Pending.cancel()
+                Progress.Check()
+            Hash, StoredBytes = Future.result()
+            Progress.Add(1, Snapshot["Files"][Name][0])
+            Snapshot["Files"][Name][3] = Hash
+            if StoredBytes > 0:
+                Statistics["NewObjects"] += 1
+                Statistics["StoredBytes"] += StoredBytes
+
+    # Write the manifest
+    SnapshotPath = os.path.join(StoreDir, "snapshots", FileName)
+    os.makedirs(os.path.dirname(SnapshotPath), exist_ok=True)
+    TempFile = SnapshotPath + ".tmp"
+    with open(TempFile, "w") as outfile:
+        json.dump(Snapshot, outfile, separators=(",", ":"))
+    os.replace(TempFile, SnapshotPath)
+
+    # Remove the oldest snapshots and the objects that are no longer used
+    if Keep > 0:
+        Snapshots = ListSnapshots(StoreDir)
+        if len(Snapshots) > Keep:
+            for OldSnapshot in Snapshots[: len(Snapshots) - Keep]:
+                os.remove(OldSnapshot)
+            CollectGarbage(StoreDir)
+
+    Statistics["Seconds"] = time.perf_counter() - StartTime
+    return SnapshotPath, Statistics
+
+
+def CollectGarbage(StoreDir) -> int:
+    """
+    Remove the objects that are not used by any snapshot. Returns the number of removed objects.
+    Objects that are still being written, or that were written after the collection started, are kept:
+    they can belong to a backup that did not write its snapshot yet, for example in another FreeCAD.
+    """
+    StartTime = time.time_ns()
+    Used = set()
+    for SnapshotPath in ListSnapshots(StoreDir):
+        for Entry in ReadSnapshot(SnapshotPath)["Files"].values():
+            Used.add(Entry[3])
+
+    Counter = 0
+    ObjectsDir = os.path.join(StoreDir, "objects")
+    if not os.path.isdir(ObjectsDir):
+        return Counter
+    for Prefix in os.scandir(ObjectsDir):
+        if not Prefix.is_dir():
+            continue
+        for Object in os.scandir(Prefix.path):
+            if Object.name.endswith(".tmp") or Prefix.name + Object.name in Used:
+                continue
+            try:
+                if Object.stat().st_mtime_ns >= StartTime:
+                    continue
+                os.remove(Object.path)
+            except OSError:
+                # Removed or replaced by another FreeCAD in the meantime
+                continue
+            Counter = Counter + 1
+    return Counter
+
+
+def RestoreSnapshot(
+    SnapshotPath, TargetDir, Exclude=None, Progress=None, KeepPermissions=False
+) -> int:
+    """
+    Restore a snapshot into TargetDir. The mtimes are restored as well.
+
+    Args:
+        SnapshotPath: The snapshot manifest.
+        TargetDir: The folder to restore into.
+        Exclude (optional): Callable that returns True for names that must be skipped.
+        Progress (JobProgress, optional): Receives the progress and can cancel the restore.
+        KeepPermissions (bool, optional): Apply the permissions stored in the snapshot.
+
+    Returns:
+        int: the number of restored files.
+    """
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    StoreDir = ReturnStoreDirFromSnapshot(SnapshotPath)
+    Snapshot = ReadSnapshot(SnapshotPath)
+    Progress.SetTotal(
+        len(Snapshot["Files"]), sum(Entry[0] for Entry in Snapshot["Files"].values())
+    )
+
+    for Folder in Snapshot["Folders"]:
+        if Exclude is None or not Exclude(Folder + "/"):
+            os.makedirs(os.path.join(TargetDir, Folder), exist_ok=True)
+
+    Counter = 0
+    Written = []
+    for Name, Entry in Snapshot["Files"].items():
+        if Exclude is not None and Exclude(Name):
+            continue
+        FullPath = os.path.join(TargetDir, *Name.split("/"))
+        os.makedirs(os.path.dirname(FullPath), exist_ok=True)
+        with open(FullPath, "wb") as Target:
+            ReadObject(StoreDir, Entry[3], Target)
+        Written.append((FullPath, Entry))
+        Counter = Counter + 1
+        Progress.Add(1, Entry[0])
+
+    # Restore the mtimes and permissions in one pass, once all files are written
+    for FullPath, Entry in Written:
+        try:
+            if KeepPermissions is True:
+                os.chmod(FullPath, Entry[2])
+            os.utime(FullPath, ns=(Entry[1], Entry[1]))
+        except OSError:
+            pass
+
+    # The links come last, so no file is written through a link
+    Restore_SaveAndRestore.RestoreHardlinks(
+        Snapshot.get("Hardlinks", {}), TargetDir, Exclude
+    )
+    for Name, (MTime, LinkTarget) in Snapshot.get("Links", {}).items():
+        if Exclude is not None and Exclude(Name):
+            continue
+        FullPath = os.path.join(TargetDir, *Name.split("/"))
+        os.makedirs(os.path.dirname(FullPath), exist_ok=True)
+        if os.path.lexists(FullPath):
+            os.remove(FullPath)
+        try:
+            os.symlink(LinkTarget, FullPath)
+        except (OSError, NotImplementedError):
+            # Links are not supported here. Write the target as a text file, like the archive restore
+            with open(FullPath, "wb") as Target:
+                Target.write(os.fsencode(LinkTarget))
+        if os.utime in os.supports_follow_symlinks:
+            try:
+                os.utime(FullPath, ns=(MTime, MTime), follow_symlinks=False)
+            except OSError:
+                pass
+        Counter = Counter + 1
+    return Counter
+
+
+def ExportSnapshot(
+    SnapshotPath, ArchivePath, Progress=None, Sequential=False, StageLocally=False
+) -> int:
+    """
+    Write a snapshot as a regular addon archive, which can be restored without the store.
+    If the export fails or is cancelled, the partial archive is removed.
+    See Backup_SaveAndRestore.BackupDirectory for Sequential and StageLocally.
+    Returns the number of exported files.
+    """
+    if Progress is None:
+        Progress = Backup_SaveAndRestore.JobProgress()
+    StoreDir = ReturnStoreDirFromSnapshot(SnapshotPath)
+    Snapshot = ReadSnapshot(SnapshotPath)
+    Manifest = Backup_SaveAndRestore.CreateManifest(os.path.basename(ArchivePath))
+    # Snapshots of older versions did not record their exclusion patterns
+    if "Exclude" in Snapshot:
+        Manifest["Exclude"] = Snapshot["Exclude"]
+    else:
+        del Manifest["Exclude"]
+    Progress.SetTotal(
+        len(Snapshot["Files"]), sum(Entry[0] for Entry in Snapshot["Files"].values())
+    )
+
+    WritePath = ArchivePath
+    if StageLocally is True:
+        WritePath = Backup_SaveAndRestore.ReturnStagingPath()
+    try:
+        WriteExport(StoreDir, Snapshot, Manifest, WritePath, Progress, Sequential)
+        if WritePath != ArchivePath:
+            Backup_SaveAndRestore.MoveArchive(WritePath, ArchivePath)
+    except BaseException:
+        if os.path.exists(WritePath):
+            os.remove(WritePath)
+        raise
+    return len(Snapshot["Files"])
+
+
+def WriteExport(
+    StoreDir, Snapshot: dict, Manifest: dict, ArchivePath, Progress, Sequential=False
+):
+    with ZipFile(ArchivePath, "w", ZIP_DEFLATED, sequential=Sequential) as zipObj:
+        for Folder in Snapshot["Folders"]:
+            zipObj.writestr(Folder + "/", b"")
+            Manifest["Folders"].append(Folder)
+
+        for Name, Entry in Snapshot["Files"].items():
+            zinfo = ZipInfo(Name, DateTimeFromNs(Entry[1]))
+            zinfo.compress_type = ZIP_DEFLATED
+            zinfo.external_attr = (0o100000 | Entry[2]) << 16
+            zinfo.file_size = Entry[0]
+            with zipObj.open(zinfo, "w") as Target:
+                ReadObject(StoreDir, Entry[3], Target)
+            Manifest["Files"][Name] = [Entry[0], Entry[1], zinfo.CRC, Manifest["Id"]]
+            Progress.Add(1, Entry[0])
+
+        for Name, (MTime, LinkTarget) in Snapshot.get("Links", {}).items():
+            data = os.fsencode(LinkTarget)
+            zinfo = ZipInfo(Name, DateTimeFromNs(MTime))
+            zinfo.create_system = Restore_SaveAndRestore.ZIP_SYSTEM
+            zinfo.external_attr = (stat.S_IFLNK | 0o777) << 16
+            zipObj.writestr(zinfo, data, compress_type=ZIP_STORED)
+            Manifest["Files"][Name] = [
+                len(data),
+                MTime,
+                zlib.crc32(data),
+                Manifest["Id"],
+            ]
+        Manifest["Hardlinks"] = dict(Snapshot.get("Hardlinks", {}))
+
+        zipObj.writestr(
+            Backup_SaveAndRestore.MANIFEST_NAME,
+            json.dumps(Manifest, separators=(",", ":")),
+        )
+    return
+
+
+def DateTimeFromNs(MTime: int) -> tuple:
+    """Return a zip date_time tuple for an mtime in nanoseconds."""
+    DateTime = time.localtime(MTime / 1e9)[0:6]
+    if DateTime[0] < 1980:
+        DateTime = (1980, 1, 1, 0, 0, 0)
+    return DateTime
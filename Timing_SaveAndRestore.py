@@ -0,0 +1,139 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Timing spans for the startup of this addon, to track what it adds to the startup of FreeCAD.
+# A span is a named block of code, timed with time.perf_counter:
+#     with Timing_SaveAndRestore.Span("ApplicationMenus"):
+#         ...
+# Spans can be nested and can run on other threads, like the addon check. They are recorded until Finish is called,
+# after that a span costs nothing but the check of a flag.
+# Finish returns the spans, and WriteReport adds them as one run to a json file that keeps the last runs,
+# so the startup cost can be compared between versions.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import Addons_SaveAndRestore
+
+REPORT_FILE = "SaveAndRestore Startup.json"
+REPORT_VERSION = 1
+# Number of runs that is kept in the report file
+MAX_RUNS = 50
+
+# Spans are measured from the moment this module is imported, which is the first thing InitGui.py does
+_Origin = time.perf_counter()
+_Spans = []
+_Lock = threading.Lock()
+_Finished = False
+# The depth of the running spans, per thread
+_Local = threading.local()
+
+
+@contextmanager
+def Span(Name: str):
+    """Time the code in the with block as the span Name."""
+    if _Finished is True:
+        yield
+        return
+    Depth = getattr(_Local, "Depth", 0)
+    _Local.Depth = Depth + 1
+    Start = time.perf_counter()
+    try:
+        yield
+    finally:
+        End = time.perf_counter()
+        _Local.Depth = Depth
+        with _Lock:
+            _Spans.append(
+                {
+                    "Name": Name,
+                    "Thread": threading.current_thread().name,
+                    "Depth": Depth,
+                    "Start": round((Start - _Origin) * 1000, 3),
+                    "Duration": round((End - Start) * 1000, 3),
+                }
+            )
+    return
+
+
+def Finish() -> list:
+    """Stop recording and return the spans in the order they started. Returns [] when called again."""
+    global _Finished
+    with _Lock:
+        if _Finished is True:
+            return []
+        _Finished = True
+        return sorted(_Spans, key=lambda Span: Span["Start"])
+
+
+def FormatSpans(Spans: list) -> str:
+    """Return the spans as text, one line per span, with nested spans indented."""
+    return "\n".join(
+        f"{'  ' * Span['Depth']}{Span['Name']}: {Span['Duration']:.1f} ms"
+        + (f" ({Span['Thread']})" if Span["Thread"] != "MainThread" else "")
+        for Span in Spans
+    )
+
+
+def ReturnMainThreadTime(Spans: list) -> float:
+    """Return the time in ms the spans took on the main thread, which is the time FreeCAD waited for them."""
+    return round(
+        sum(
+            Span["Duration"]
+            for Span in Spans
+            if Span["Depth"] == 0 and Span["Thread"] == "MainThread"
+        ),
+        3,
+    )
+
+
+def WriteReport(
+    FileName, Spans: list, AddonVersion: str = "", FreeCADVersion: str = ""
+):
+    """Add the spans as a run to the report file FileName. Only the last MAX_RUNS runs are kept."""
+    try:
+        with open(FileName, "r") as file:
+            Report = json.load(file)
+    except (OSError, ValueError):
+        Report = {}
+    if not isinstance(Report, dict) or Report.get("Version") != REPORT_VERSION:
+        Report = {"Version": REPORT_VERSION, "Runs": []}
+    Report["Runs"].append(
+        {
+            "Date": datetime.now().isoformat(timespec="seconds"),
+            "AddonVersion": AddonVersion,
+            "FreeCADVersion": FreeCADVersion,
+            "MainThread": ReturnMainThreadTime(Spans),
+            "Spans": Spans,
+        }
+    )
+    Report["Runs"] = Report["Runs"][-MAX_RUNS:]
+    Addons_SaveAndRestore.WriteJson(FileName, Report)
+    return
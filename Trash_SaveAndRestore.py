@@ -0,0 +1,193 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Deletes large folders without waiting for it.
+# A folder is renamed into a trash folder on the same drive, which takes no time, and a background thread
+# purges the trash. The purge pauses after every batch of files, so it does not compete with FreeCAD for the disk.
+# The trash is a normal folder: whatever is left in it when FreeCAD closes, is purged at the next start.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import stat
+import threading
+import uuid
+
+TRASH_FOLDER = ".SaveAndRestore-trash"
+
+# Number of files that is removed before the purge pauses, and the pause in seconds
+BATCH_SIZE = 256
+BATCH_PAUSE = 0.02
+
+# The trash folders that are waiting to be purged, and the thread that purges them
+_Pending = []
+_Lock = threading.Lock()
+_Worker = None
+# Set to stop the purge, for example when FreeCAD closes
+_Stop = threading.Event()
+
+
+def ReturnTrashDir(Folder) -> str:
+    """Return the trash folder inside Folder."""
+    return os.path.join(os.fspath(Folder), TRASH_FOLDER)
+
+
+def MoveToTrash(Path, TrashDir) -> bool:
+    """
+    Rename Path into TrashDir. Returns False if that is not possible,
+    for example because TrashDir is on another drive or a file in Path is in use.
+    """
+    Path = os.path.normpath(os.fspath(Path))
+    try:
+        os.makedirs(TrashDir, exist_ok=True)
+        os.rename(
+            Path,
+            os.path.join(TrashDir, f"{uuid.uuid4().hex[:8]}-{os.path.basename(Path)}"),
+        )
+    except OSError:
+        return False
+    return True
+
+
+def Discard(Path, TrashDir=None):
+    """
+    Remove the folder, file or link Path. Folders are moved to TrashDir and purged in the background.
+    TrashDir defaults to the trash folder next to Path. If Path can not be moved, it is removed right away.
+    """
+    Path = os.path.normpath(os.fspath(Path))
+    if not os.path.lexists(Path):
+        return
+    if os.path.islink(Path) or not os.path.isdir(Path):
+        RemoveEntry(Path)
+        return
+    if TrashDir is None:
+        TrashDir = ReturnTrashDir(os.path.dirname(Path))
+    if MoveToTrash(Path, TrashDir) is True:
+        StartPurge(TrashDir)
+    else:
+        PurgeTree(Path)
+    return
+
+
+def StartPurge(TrashDir):
+    """Purge TrashDir on the background thread. Starts the thread if it is not running."""
+    global _Worker
+    with _Lock:
+        if TrashDir not in _Pending:
+            _Pending.append(TrashDir)
+        if _Worker is None or not _Worker.is_alive():
+            _Stop.clear()
+            # A daemon thread does not keep FreeCAD from closing. The rest is purged at the next start
+            _Worker = threading.Thread(
+                target=_PurgePending, name="SaveAndRestore purge", daemon=True
+            )
+            _Worker.start()
+    return
+
+
+def StopPurge():
+    """Stop the background purge after the current batch. The trash is purged further at the next start."""
+    _Stop.set()
+    return
+
+
+def _PurgePending():
+    while not _Stop.is_set():
+        with _Lock:
+            if len(_Pending) == 0:
+                return
+            TrashDir = _Pending[0]
+        try:
+            Purge(TrashDir, _Stop)
+        except OSError:
+            pass
+        with _Lock:
+            _Pending.remove(TrashDir)
+    return
+
+
+def Purge(TrashDir, Stop: threading.Event = None) -> int:
+    """Remove everything in TrashDir. Returns the number of removed files."""
+    Counter = 0
+    try:
+        with os.scandir(TrashDir) as Iterator:
+            Entries = list(Iterator)
+    except FileNotFoundError:
+        return Counter
+    for Entry in Entries:
+        if Stop is not None and Stop.is_set():
+            break
+        Counter += PurgeTree(Entry.path, Stop)
+    return Counter
+
+
+def PurgeTree(Path, Stop: threading.Event = None) -> int:
+    """
+    Remove the folder Path and everything below it. Links are removed, not followed.
+    With Stop, the files are removed in batches of BATCH_SIZE with a short pause in between,
+    and the purge ends early when Stop is set. Returns the number of removed files.
+    """
+    Counter = 0
+    if os.path.islink(Path) or not os.path.isdir(Path):
+        RemoveEntry(Path)
+        return 1
+    # The folders to list, and the folders to remove once they are empty, deepest last
+    Stack = [Path]
+    Folders = []
+    while len(Stack) > 0:
+        Folder = Stack.pop()
+        Folders.append(Folder)
+        try:
+            with os.scandir(Folder) as Iterator:
+                Entries = list(Iterator)
+        except FileNotFoundError:
+            Folders.pop()
+            continue
+        for Entry in Entries:
+            if Entry.is_dir(follow_symlinks=False):
+                Stack.append(Entry.path)
+                continue
+            RemoveEntry(Entry.path)
+            Counter += 1
+            if Stop is not None and Counter % BATCH_SIZE == 0:
+                if Stop.is_set():
+                    return Counter
+                # Give the disk and the other threads room
+                Stop.wait(BATCH_PAUSE)
+    for Folder in reversed(Folders):
+        RemoveEntry(Folder, IsFolder=True)
+    return Counter
+
+
+def RemoveEntry(Path, IsFolder: bool = False):
+    """Remove a file, link or empty folder. Read-only entries are made writable first."""
+    Function = os.rmdir if IsFolder else os.remove
+    try:
+        Function(Path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        os.chmod(Path, stat.S_IWRITE | stat.S_IREAD | (stat.S_IEXEC if IsFolder else 0))
+        Function(Path)
+    return
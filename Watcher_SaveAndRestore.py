@@ -0,0 +1,334 @@
+"""
+MIT License
+
+Copyright (c) 2025 Paul Ebbers
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+# Watches the Mod folder while FreeCAD runs, so addon changes are seen right away and not only at the next start.
+# It reports the addons that were added, removed or changed: an ADDON_DISABLED file that appears or goes, a new
+# package.xml or a git pull. The addon registry then only reads those addons again.
+# On Linux, inotify is used through ctypes: the Mod folder, every addon folder and every .git folder is watched,
+# none of them recursively. Elsewhere, or when inotify is not available, the Mod folder is polled: it is listed and
+# every addon is stat'ed, like a startup check does.
+# The changes are collected on a background thread and handed over once the Mod folder is quiet for a moment,
+# so an addon manager that writes many files causes one report.
+# Like Backup_SaveAndRestore, this module has no dependency on FreeCAD.
+
+import os
+import sys
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+import Addons_SaveAndRestore
+
+# Seconds without events before the collected changes are handed over, and between two polls
+SETTLE_TIME = 0.5
+POLL_INTERVAL = 10.0
+
+# Reported when the whole Mod folder must be read again, for example when inotify lost events
+RESCAN = "*"
+
+# The inotify flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+MOD_MASK = (
+    IN_CREATE
+    | IN_DELETE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+ADDON_MASK = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+)
+GIT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+
+# The files in an addon folder that change its entry in the registry
+ADDON_FILES = [Addons_SaveAndRestore.DISABLED_FILE, "package.xml", ".git"]
+
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, followed by the name
+_EventHeader = struct.Struct("iIII")
+
+
+def ReturnSignature(ModDir, Ignore=()) -> dict:
+    """Return {addon: (folder time, package.xml time, .git time)} for the polling watcher. Ignore is skipped."""
+    Signature = {}
+    for Name in Addons_SaveAndRestore.ListAddons(ModDir):
+        if Name in Ignore:
+            continue
+        Path = os.path.join(ModDir, Name)
+        Signature[Name] = (
+            Addons_SaveAndRestore.ReturnMTime(Path),
+            Addons_SaveAndRestore.ReturnMTime(os.path.join(Path, "package.xml")),
+            Addons_SaveAndRestore.ReturnMTime(os.path.join(Path, ".git")),
+        )
+    return Signature
+
+
+class Inotify:
+    """A non-blocking inotify instance, through the C library. Raises OSError if inotify is not available."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        try:
+            self._libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+            self._AddWatch = self._libc.inotify_add_watch
+            self._RemoveWatch = self._libc.inotify_rm_watch
+            Init = self._libc.inotify_init1
+        except AttributeError:
+            raise OSError("inotify is not available")
+        self._AddWatch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._RemoveWatch.argtypes = [ctypes.c_int, ctypes.c_int]
+        # IN_NONBLOCK and IN_CLOEXEC have the values of O_NONBLOCK and O_CLOEXEC
+        self.Fd = Init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.Fd < 0:
+            Error = ctypes.get_errno()
+            raise OSError(Error, os.strerror(Error))
+
+    def AddWatch(self, Path, Mask: int) -> int:
+        """Watch Path. Returns the watch descriptor, or -1 if Path can not be watched."""
+        return self._AddWatch(self.Fd, os.fsencode(Path), Mask)
+
+    def RemoveWatch(self, Descriptor: int):
+        self._RemoveWatch(self.Fd, Descriptor)
+        return
+
+    def Read(self, Timeout: float) -> list:
+        """Wait at most Timeout seconds for events. Returns them as (watch descriptor, mask, name)."""
+        Ready, _, _ = select.select([self.Fd], [], [], Timeout)
+        if len(Ready) == 0:
+            return []
+        try:
+            Data = os.read(self.Fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        Events = []
+        Offset = 0
+        while Offset + _EventHeader.size <= len(Data):
+            Descriptor, Mask, _, Length = _EventHeader.unpack_from(Data, Offset)
+            Offset += _EventHeader.size
+            Name = os.fsdecode(Data[Offset : Offset + Length].rstrip(b"\0"))
+            Offset += Length
+            Events.append((Descriptor, Mask, Name))
+        return Events
+
+    def Close(self):
+        os.close(self.Fd)
+        return
+
+
+class ModWatcher:
+    """
+    Watches a Mod folder on a background thread. See the top of this module.
+    Start the watcher with Start and collect the changed addons with TakeChanges, for example on a timer.
+    """
+
+    def __init__(self, ModDir, Interval: float = POLL_INTERVAL, Ignore=()):
+        """
+        Args:
+            ModDir: The Mod folder.
+            Interval (float, optional): Seconds between two polls, if inotify is not available.
+            Ignore (optional): Addons that are not watched, like the one that runs the watcher.
+                Whatever it writes in its own folder would be reported as a change otherwise.
+        """
+        self.ModDir = os.path.normpath(os.fspath(ModDir))
+        self.Interval = Interval
+        self.Ignore = set(Ignore)
+        # "inotify" or "polling", once started
+        self.Method = ""
+        self._Changes = set()
+        self._LastEvent = 0.0
+        self._Lock = threading.Lock()
+        self._Stop = threading.Event()
+        self._Thread = None
+        self._Inotify = None
+        # {watch descriptor: (addon, is .git folder)}. The addon of the Mod folder itself is ""
+        self._Watches = {}
+
+    def Start(self) -> str:
+        """Start watching. Returns the method that is used, "inotify" or "polling"."""
+        try:
+            self._Inotify = Inotify()
+            self._WatchModDir()
+            self.Method = "inotify"
+            Target = self._RunInotify
+        except OSError:
+            if self._Inotify is not None:
+                self._Inotify.Close()
+                self._Inotify = None
+            self.Method = "polling"
+            Target = self._RunPolling
+        # A daemon thread does not keep FreeCAD from closing
+        self._Thread = threading.Thread(
+            target=Target, name="SaveAndRestore addon watcher", daemon=True
+        )
+        self._Thread.start()
+        return self.Method
+
+    def Stop(self):
+        """Stop watching. The thread ends within SETTLE_TIME."""
+        self._Stop.set()
+        return
+
+    def TakeChanges(self) -> set:
+        """
+        Return the addons that changed since the last call, and forget them. The set is empty while nothing
+        changed or while the Mod folder is not quiet yet. It holds RESCAN if the whole Mod folder must be read.
+        """
+        with self._Lock:
+            if time.monotonic() - self._LastEvent < SETTLE_TIME:
+                return set()
+            Changes, self._Changes = self._Changes, set()
+        return Changes
+
+    def _Report(self, Names):
+        with self._Lock:
+            self._Changes.update(Names)
+            self._LastEvent = time.monotonic()
+        return
+
+    def _Watch(self, Path, Mask: int, Addon: str, IsGit: bool = False):
+        Descriptor = self._Inotify.AddWatch(Path, Mask)
+        if Descriptor >= 0:
+            self._Watches[Descriptor] = (Addon, IsGit)
+        return
+
+    def _WatchAddon(self, Name: str):
+        if Name in self.Ignore:
+            return
+        Path = os.path.join(self.ModDir, Name)
+        self._Watch(Path, ADDON_MASK, Name)
+        if os.path.isdir(os.path.join(Path, ".git")):
+            self._Watch(os.path.join(Path, ".git"), GIT_MASK, Name, True)
+        return
+
+    def _WatchModDir(self):
+        Descriptor = self._Inotify.AddWatch(self.ModDir, MOD_MASK)
+        if Descriptor < 0:
+            Error = ctypes.get_errno()
+            raise OSError(Error, os.strerror(Error))
+        self._Watches[Descriptor] = ("", False)
+        for Name in Addons_SaveAndRestore.ListAddons(self.ModDir):
+            self._WatchAddon(Name)
+        return
+
+    def _Unwatch(self, Name: str):
+        # The folder of a moved addon is still watched under its old name
+        for Descriptor, (Addon, _) in list(self._Watches.items()):
+            if Addon == Name:
+                self._Inotify.RemoveWatch(Descriptor)
+                del self._Watches[Descriptor]
+        return
+
+    def _Handle(self, Descriptor: int, Mask: int, Name: str):
+        if Mask & IN_Q_OVERFLOW:
+            # Events were lost
+            self._Report([RESCAN])
+            return
+        if Descriptor not in self._Watches:
+            return
+        if Mask & IN_IGNORED:
+            # The watched folder is gone
+            del self._Watches[Descriptor]
+            return
+        Addon, IsGit = self._Watches[Descriptor]
+        if Addon == "":
+            if Mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # A moved folder stays watched. The Mod folder is watched again by path
+                self._Inotify.RemoveWatch(Descriptor)
+                self._Watches.pop(Descriptor, None)
+                self._Report([RESCAN])
+            elif Name in self.Ignore:
+                return
+            elif Mask & (IN_CREATE | IN_MOVED_TO):
+                self._WatchAddon(Name)
+                self._Report([Name])
+            elif Mask & (IN_DELETE | IN_MOVED_FROM):
+                self._Unwatch(Name)
+                self._Report([Name])
+            return
+        if IsGit or Name in ADDON_FILES:
+            self._Report([Addon])
+        if not IsGit and Name == ".git" and Mask & (IN_CREATE | IN_MOVED_TO):
+            self._Watch(os.path.join(self.ModDir, Addon, ".git"), GIT_MASK, Addon, True)
+        return
+
+    def _RunInotify(self):
+        try:
+            while not self._Stop.is_set():
+                for Descriptor, Mask, Name in self._Inotify.Read(SETTLE_TIME):
+                    self._Handle(Descriptor, Mask, Name)
+                if not any(Addon == "" for Addon, _ in self._Watches.values()):
+                    # The Mod folder itself was removed or moved. Watch it again once it is back
+                    try:
+                        self._WatchModDir()
+                    except OSError:
+                        self._Stop.wait(self.Interval)
+        except OSError:
+            # Keep the changes coming, without inotify
+            self._Report([RESCAN])
+            self.Method = "polling"
+            self._Inotify.Close()
+            self._Inotify = None
+            self._RunPolling()
+            return
+        self._Inotify.Close()
+        self._Inotify = None
+        return
+
+    def _RunPolling(self):
+        try:
+            Signature = ReturnSignature(self.ModDir, self.Ignore)
+        except OSError:
+            Signature = {}
+        while not self._Stop.wait(self.Interval):
+            try:
+                NewSignature = ReturnSignature(self.ModDir, self.Ignore)
+            except OSError:
+                continue
+            Names = [
+                Name
+                for Name in set(Signature) | set(NewSignature)
+                if Signature.get(Name) != NewSignature.get(Name)
+            ]
+            if len(Names) > 0:
+                self._Report(Names)
+            Signature = NewSignature
+        return
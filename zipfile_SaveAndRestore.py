@@ -7,9 +7,12 @@ XXX references to utf-8 need further investigation.
 """
 
 import binascii
+import copy
+import errno
 import importlib.util
 import io
 import itertools
+import mmap
 import os
 import posixpath
 import re
@@ -54,6 +57,8 @@ __all__ = [
     "PyZipFile",
     "LargeZipFile",
     "Path",
+    "compress_file",
+    "restore_metadata",
 ]
 
 
@@ -75,6 +80,18 @@ ZIP64_LIMIT = (1 << 31) - 1
 ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
 ZIP_MAX_COMMENT = (1 << 16) - 1
 
+# Size of the write buffer of archives that are opened with sequential=True
+SEQUENTIAL_BUFFER_SIZE = 1 << 20
+
+# Stored members from this size on are copied between the archive and the
+# file by the kernel, with os.copy_file_range() or os.sendfile(), and their
+# CRC is computed on a memory map. The data then never passes through Python
+# buffers. For smaller members the extra system calls cost more than they
+# save. None copies every member through Python buffers.
+KERNEL_COPY_MIN_SIZE = 1 << 18
+# Largest single kernel copy, and size of the memory map window for the CRC
+KERNEL_COPY_CHUNK = 1 << 26
+
 # constants for Zip file compression methods
 ZIP_STORED = 0
 ZIP_DEFLATED = 8
@@ -537,7 +554,7 @@ class ZipInfo(object):
             extra = extra[ln + 4 :]
 
     @classmethod
-    def from_file(cls, filename, arcname=None, *, strict_timestamps=True):
+    def from_file(cls, filename, arcname=None, *, strict_timestamps=True, st=None):
         """Construct an appropriate ZipInfo for a file on the filesystem.
 
         filename should be the path to a file or directory on the filesystem.
@@ -545,10 +562,14 @@ class ZipInfo(object):
         arcname is the name which it will have within the archive (by default,
         this will be the same as filename, but without a drive letter and with
         leading path separators removed).
+
+        st is the os.stat_result of filename, if the caller has it already,
+        for example from os.scandir(). The file is not stat'ed again.
         """
         if isinstance(filename, os.PathLike):
             filename = os.fspath(filename)
-        st = os.stat(filename)
+        if st is None:
+            st = os.stat(filename)
         isdir = stat.S_ISDIR(st.st_mode)
         mtime = time.localtime(st.st_mtime)
         date_time = mtime[0:6]
@@ -566,6 +587,10 @@ class ZipInfo(object):
             arcname += "/"
         zinfo = cls(arcname, date_time)
         zinfo.external_attr = (st.st_mode & 0xFFFF) << 16  # Unix attributes
+        if stat.S_ISLNK(st.st_mode):
+            # st came from lstat(): the member is stored as a link. The link
+            # type is in the unix mode bits, so mark them as unix attributes
+            zinfo.create_system = 3
         if isdir:
             zinfo.file_size = 0
             zinfo.external_attr |= 0x10  # MS-DOS directory flag
@@ -578,6 +603,11 @@ class ZipInfo(object):
         """Return True if this archive member is a directory."""
         return self.filename[-1] == "/"
 
+    def is_symlink(self):
+        """Return True if this archive member is a symbolic link. The data
+        of the member is the target of the link."""
+        return self.create_system == 3 and stat.S_ISLNK(self.external_attr >> 16)
+
 
 # ZIP encryption uses the CRC32 one-byte primitive for scrambling some
 # internal keys. We noticed that a direct implementation is faster than
@@ -771,6 +801,235 @@ def _get_decompressor(compress_type):
             raise NotImplementedError("compression type %d" % (compress_type,))
 
 
+def compress_file(
+    filename,
+    arcname=None,
+    compress_type=ZIP_DEFLATED,
+    compresslevel=None,
+    *,
+    strict_timestamps=True,
+    chunk_size=1 << 20,
+    st=None,
+):
+    """Read and compress a file from the filesystem in one go.
+
+    Returns a (zinfo, data) tuple, where data is the compressed stream and
+    zinfo carries the CRC and sizes, ready to be passed to
+    ZipFile.writeraw(). This does not touch any ZipFile instance, so it can
+    run on worker threads; zlib, bz2 and lzma release the GIL while they
+    compress. st is passed on to ZipInfo.from_file().
+    """
+    zinfo = ZipInfo.from_file(
+        filename, arcname, strict_timestamps=strict_timestamps, st=st
+    )
+    zinfo.compress_type = compress_type
+    zinfo._compresslevel = compresslevel
+    if zinfo.is_dir():
+        zinfo.compress_type = ZIP_STORED
+        zinfo.CRC = 0
+        return zinfo, b""
+    if zinfo.is_symlink():
+        data = os.fsencode(os.readlink(filename))
+        zinfo.compress_type = ZIP_STORED
+        zinfo.CRC = crc32(data)
+        zinfo.file_size = len(data)
+        return zinfo, data
+
+    _check_compression(compress_type)
+    compressor = _get_compressor(compress_type, compresslevel)
+    crc = 0
+    file_size = 0
+    chunks = []
+    with open(filename, "rb") as src:
+        while True:
+            data = src.read(chunk_size)
+            if not data:
+                break
+            file_size += len(data)
+            crc = crc32(data, crc)
+            if compressor:
+                data = compressor.compress(data)
+            chunks.append(data)
+    if compressor:
+        chunks.append(compressor.flush())
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    return zinfo, b"".join(chunks)
+
+
+def restore_metadata(members, mtimes=None, permissions=True):
+    """Set the modification time, and with permissions the unix mode, of
+    extracted members. members holds (path, ZipInfo) pairs. mtimes maps
+    member names to exact mtimes in nanoseconds, which are used instead of
+    the archive's date_time: that one has a 2-second resolution.
+
+    Runs as one pass after the extraction. Files and links come first and
+    folders last, deepest first, because writing into a folder changes its
+    mtime. A member that can not be updated is skipped."""
+    folders = []
+    for path, zinfo in members:
+        if zinfo.is_dir():
+            folders.append((path, zinfo))
+        else:
+            _restore_member_metadata(path, zinfo, mtimes, permissions)
+    folders.sort(key=lambda item: item[0].count(os.sep), reverse=True)
+    for path, zinfo in folders:
+        _restore_member_metadata(path, zinfo, mtimes, permissions)
+
+
+def _restore_member_metadata(path, zinfo, mtimes, permissions):
+    is_link = zinfo.is_symlink() and os.path.islink(path)
+    mtime_ns = None
+    if mtimes is not None:
+        mtime_ns = mtimes.get(zinfo.filename)
+    try:
+        if mtime_ns is None:
+            mtime_ns = int(time.mktime(zinfo.date_time + (0, 0, -1))) * 1000000000
+        # chmod and utime would change the file the link points to
+        if not is_link:
+            if permissions and zinfo.create_system == 3:
+                mode = stat.S_IMODE(zinfo.external_attr >> 16)
+                if mode:
+                    os.chmod(path, mode)
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        elif os.utime in os.supports_follow_symlinks:
+            os.utime(path, ns=(mtime_ns, mtime_ns), follow_symlinks=False)
+    except (OSError, OverflowError, ValueError):
+        pass
+
+
+# Cleared when a system call turns out not to exist on this system
+_have_copy_file_range = hasattr(os, "copy_file_range")
+_have_sendfile = hasattr(os, "sendfile")
+# Errors on which a kernel copy falls back to the next method
+_KERNEL_COPY_ERRORS = {
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.ENOTSOCK,
+}
+
+
+def _use_kernel_copy(fileobj, size):
+    """Return True if size bytes in the binary file fileobj are copied by
+    the kernel. See KERNEL_COPY_MIN_SIZE."""
+    if KERNEL_COPY_MIN_SIZE is None or size < KERNEL_COPY_MIN_SIZE:
+        return False
+    try:
+        fileobj.fileno()
+    except (AttributeError, OSError):
+        return False
+    return True
+
+
+def _kernel_copy(infd, outfd, offset, dst_offset, count):
+    """Copy count bytes at offset in infd to dst_offset in outfd, with
+    os.copy_file_range() or else os.sendfile(). Returns the number of bytes
+    copied, which is less than count if neither works for these files."""
+    global _have_copy_file_range, _have_sendfile
+    done = 0
+    if _have_copy_file_range:
+        try:
+            while done < count:
+                n = os.copy_file_range(
+                    infd,
+                    outfd,
+                    min(count - done, KERNEL_COPY_CHUNK),
+                    offset + done,
+                    dst_offset + done,
+                )
+                if n == 0:
+                    break
+                done += n
+            return done
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_ERRORS:
+                raise
+            if e.errno == errno.ENOSYS:
+                _have_copy_file_range = False
+    if _have_sendfile:
+        try:
+            # sendfile() writes at the current position of outfd
+            os.lseek(outfd, dst_offset + done, os.SEEK_SET)
+            while done < count:
+                n = os.sendfile(
+                    outfd, infd, offset + done, min(count - done, KERNEL_COPY_CHUNK)
+                )
+                if n == 0:
+                    break
+                done += n
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_ERRORS:
+                raise
+            # Before Linux 2.6.33, and on macOS, the target must be a socket
+            if e.errno in (errno.ENOSYS, errno.ENOTSOCK):
+                _have_sendfile = False
+    return done
+
+
+def _copy_range(src, dst, offset, count):
+    """Copy count bytes at offset in the binary file src to the current
+    position of the binary file dst, and leave dst after them. The kernel
+    copies what it can, the rest goes through Python buffers. Returns the
+    number of bytes copied, which is less than count at the end of src."""
+    dst.flush()
+    start = dst.tell()
+    done = 0
+    try:
+        done = _kernel_copy(src.fileno(), dst.fileno(), offset, start, count)
+    except (AttributeError, io.UnsupportedOperation):
+        pass
+    src.seek(offset + done)
+    dst.seek(start + done)
+    while done < count:
+        data = src.read(min(count - done, 1 << 20))
+        if not data:
+            break
+        dst.write(data)
+        done += len(data)
+    dst.flush()
+    return done
+
+
+def _crc32_range(fileobj, offset, count):
+    """Return the CRC-32 of count bytes at offset in the binary file fileobj.
+    The bytes are read through a memory map, so they are not copied. Files
+    that can not be mapped are read in blocks."""
+    crc = 0
+    done = 0
+    try:
+        fd = fileobj.fileno()
+        # Touching a mapped page past the end of the file is a crash, not an error
+        if os.fstat(fd).st_size >= offset + count:
+            while done < count:
+                start = offset + done
+                base = start - start % mmap.ALLOCATIONGRANULARITY
+                length = min(count - done, KERNEL_COPY_CHUNK)
+                with mmap.mmap(
+                    fd, start - base + length, offset=base, access=mmap.ACCESS_READ
+                ) as mapped:
+                    with memoryview(mapped) as view:
+                        crc = crc32(view[start - base :], crc)
+                done += length
+            return crc
+    except (AttributeError, OSError, ValueError):
+        pass
+    fileobj.seek(offset + done)
+    buffer = bytearray(min(max(count - done, 1), 1 << 20))
+    with memoryview(buffer) as view:
+        while done < count:
+            n = fileobj.readinto(view[: min(count - done, len(buffer))])
+            if not n:
+                break
+            crc = crc32(view[:n], crc)
+            done += n
+    return crc
+
+
 class _SharedFile:
     def __init__(self, file, pos, close, lock, writing):
         self._file = file
@@ -1280,6 +1539,12 @@ class ZipFile:
                    When using ZIP_STORED or ZIP_LZMA this keyword has no effect.
                    When using ZIP_DEFLATED integers 0 through 9 are accepted.
                    When using ZIP_BZIP2 integers 1 through 9 are accepted.
+    sequential: if True, mode 'w' and 'x' write strictly append-only. The
+                CRC and sizes of each member follow its data in a data
+                descriptor (flag bit 3), instead of being patched into the
+                local header with a backward seek. Meant for network and
+                cloud-synced folders, where seeks are slow and rewrites make
+                sync clients upload the file again.
 
     """
 
@@ -1295,6 +1560,7 @@ class ZipFile:
         compresslevel=None,
         *,
         strict_timestamps=True,
+        sequential=False,
     ):
         """Open the ZIP file with mode read 'r', write 'w', exclusive create 'x',
         or append 'a'."""
@@ -1332,9 +1598,12 @@ class ZipFile:
                 "x+b": "xb",
             }
             filemode = modeDict[mode]
+            buffering = -1
+            if sequential and mode in ("w", "x"):
+                buffering = SEQUENTIAL_BUFFER_SIZE
             while True:
                 try:
-                    self.fp = io.open(file, filemode)
+                    self.fp = io.open(file, filemode, buffering=buffering)
                 except OSError:
                     if filemode in modeDict:
                         filemode = modeDict[filemode]
@@ -1369,6 +1638,10 @@ class ZipFile:
                         self.fp.seek(self.start_dir)
                     except (AttributeError, OSError):
                         self._seekable = False
+                # Handle the file as if it can not seek, so every member
+                # is written with a data descriptor
+                if sequential:
+                    self._seekable = False
             elif mode == "a":
                 try:
                     # See if file is a zip file
@@ -1589,6 +1862,25 @@ class ZipFile:
         with self.open(name, "r", pwd) as fp:
             return fp.read()
 
+    def clone(self):
+        """Return a new ZipFile for reading the same archive, with its own
+        file handle and lock. The central directory is not read again: the
+        clone shares the ZipInfo objects of this archive. Every thread can
+        read members from its own clone without waiting for the others.
+        """
+        if self.mode != "r":
+            raise ValueError("clone() requires mode 'r'")
+        if not self.fp:
+            raise ValueError("Attempt to use ZIP archive that was already closed")
+        if self.filename is None or self._filePassed:
+            raise ValueError("clone() requires an archive that was opened by name")
+        other = copy.copy(self)
+        other.fp = io.open(self.filename, "rb")
+        other._filePassed = 0
+        other._fileRefCnt = 1
+        other._lock = threading.RLock()
+        return other
+
     def open(self, name, mode="r", pwd=None, *, force_zip64=False):
         """Return file-like object for 'name'.
 
@@ -1748,24 +2040,30 @@ class ZipFile:
         self._writing = True
         return _ZipWriteFile(self, zinfo, zip64)
 
-    def extract(self, member, path=None, pwd=None):
+    def extract(self, member, path=None, pwd=None, *, symlinks=False):
         """Extract a member from the archive to the current working directory,
         using its full name. Its file information is extracted as accurately
         as possible. `member' may be a filename or a ZipInfo object. You can
-        specify a different directory using `path'.
+        specify a different directory using `path'. If `symlinks' is true,
+        members that are symbolic links are created as links.
         """
         if path is None:
             path = os.getcwd()
         else:
             path = os.fspath(path)
 
-        return self._extract_member(member, path, pwd)
+        return self._extract_member(member, path, pwd, symlinks)
 
-    def extractall(self, path=None, members=None, pwd=None):
+    def extractall(
+        self, path=None, members=None, pwd=None, *, symlinks=False, metadata=False
+    ):
         """Extract all members from the archive to the current working
         directory. `path' specifies a different directory to extract to.
         `members' is optional and must be a subset of the list returned
-        by namelist().
+        by namelist(). If `symlinks' is true, members that are symbolic
+        links are created as links, after all other members. If `metadata'
+        is true, the mtimes and unix permissions are restored afterwards,
+        see restore_metadata().
         """
         if members is None:
             members = self.namelist()
@@ -1775,8 +2073,22 @@ class ZipFile:
         else:
             path = os.fspath(path)
 
+        links = []
+        extracted = []
         for zipinfo in members:
-            self._extract_member(zipinfo, path, pwd)
+            if not isinstance(zipinfo, ZipInfo):
+                zipinfo = self.getinfo(zipinfo)
+            if symlinks and zipinfo.is_symlink():
+                # Create the links last, so no member is written through one
+                links.append(zipinfo)
+                continue
+            extracted.append((self._extract_member(zipinfo, path, pwd), zipinfo))
+        for zipinfo in links:
+            extracted.append(
+                (self._extract_member(zipinfo, path, pwd, symlinks), zipinfo)
+            )
+        if metadata:
+            restore_metadata(extracted)
 
     @classmethod
     def _sanitize_windows_name(cls, arcname, pathsep):
@@ -1793,10 +2105,11 @@ class ZipFile:
         arcname = pathsep.join(x for x in arcname if x)
         return arcname
 
-    def _extract_member(self, member, targetpath, pwd):
+    def _extract_member(self, member, targetpath, pwd, symlinks=False):
         """Extract the ZipInfo object 'member' to a physical
         file on the path targetpath.
         """
+        root = targetpath
         if not isinstance(member, ZipInfo):
             member = self.getinfo(member)
 
@@ -1820,14 +2133,40 @@ class ZipFile:
         targetpath = os.path.join(targetpath, arcname)
         targetpath = os.path.normpath(targetpath)
 
-        # Create all upper directories if necessary.
+        # Create all upper directories if necessary. Other threads may
+        # extract into the same directories at the same time.
         upperdirs = os.path.dirname(targetpath)
         if upperdirs and not os.path.exists(upperdirs):
-            os.makedirs(upperdirs)
+            os.makedirs(upperdirs, exist_ok=True)
 
         if member.is_dir():
-            if not os.path.isdir(targetpath):
-                os.mkdir(targetpath)
+            os.makedirs(targetpath, exist_ok=True)
+            return targetpath
+
+        if symlinks and member.is_symlink():
+            # A link that sits below another link could end up outside root
+            realroot = os.path.realpath(root)
+            realparent = os.path.realpath(os.path.dirname(targetpath))
+            if os.path.commonpath([realroot, realparent]) != realroot:
+                raise BadZipFile(
+                    "Link %r would be created outside of %r" % (member.filename, root)
+                )
+            if os.path.islink(targetpath) or os.path.isfile(targetpath):
+                os.remove(targetpath)
+            try:
+                os.symlink(os.fsdecode(self.read(member, pwd)), targetpath)
+                return targetpath
+            except (OSError, NotImplementedError):
+                # Links are not supported here, for example on Windows
+                # without the privilege. Extract the target as a text file.
+                pass
+
+        if (
+            member.compress_type == ZIP_STORED
+            and not member.flag_bits & 0x1
+            and _use_kernel_copy(self.fp, member.file_size)
+        ):
+            self._extract_stored(member, targetpath)
             return targetpath
 
         with self.open(member, pwd=pwd) as source, open(targetpath, "wb") as target:
@@ -1835,6 +2174,21 @@ class ZipFile:
 
         return targetpath
 
+    def _extract_stored(self, member, targetpath):
+        """Extract the stored, unencrypted ZipInfo object 'member' with a
+        kernel copy. The CRC is checked before anything is written."""
+        with self._lock:
+            # Check the local header and find the start of the data
+            with self.open(member) as source:
+                offset = source._fileobj.tell()
+            if _crc32_range(self.fp, offset, member.file_size) != member.CRC:
+                raise BadZipFile("Bad CRC-32 for file %r" % member.filename)
+            with open(targetpath, "wb") as target:
+                if _copy_range(self.fp, target, offset, member.file_size) != (
+                    member.file_size
+                ):
+                    raise EOFError
+
     def _writecheck(self, zinfo):
         """Check for errors before writing a file to the archive."""
         if zinfo.filename in self.NameToInfo:
@@ -1857,9 +2211,11 @@ class ZipFile:
             if requires_zip64:
                 raise LargeZipFile(requires_zip64 + " would require ZIP64 extensions")
 
-    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+    def write(
+        self, filename, arcname=None, compress_type=None, compresslevel=None, *, st=None
+    ):
         """Put the bytes from filename into the archive under the name
-        arcname."""
+        arcname. st is passed on to ZipInfo.from_file()."""
         if not self.fp:
             raise ValueError("Attempt to write to ZIP archive that was already closed")
         if self._writing:
@@ -1868,7 +2224,7 @@ class ZipFile:
             )
 
         zinfo = ZipInfo.from_file(
-            filename, arcname, strict_timestamps=self._strict_timestamps
+            filename, arcname, strict_timestamps=self._strict_timestamps, st=st
         )
 
         if zinfo.is_dir():
@@ -1885,7 +2241,11 @@ class ZipFile:
             else:
                 zinfo._compresslevel = self.compresslevel
 
-        if zinfo.is_dir():
+        if zinfo.is_symlink():
+            # Store the target of the link, not the file it points to
+            zinfo.compress_type = ZIP_STORED
+            self.writestr(zinfo, os.fsencode(os.readlink(filename)))
+        elif zinfo.is_dir():
             with self._lock:
                 if self._seekable:
                     self.fp.seek(self.start_dir)
@@ -1901,10 +2261,48 @@ class ZipFile:
                 self.NameToInfo[zinfo.filename] = zinfo
                 self.fp.write(zinfo.FileHeader(False))
                 self.start_dir = self.fp.tell()
+        elif (
+            zinfo.compress_type == ZIP_STORED
+            and self._seekable
+            and self.fp.readable()
+            and _use_kernel_copy(self.fp, zinfo.file_size)
+        ):
+            self._write_stored(filename, zinfo)
         else:
             with open(filename, "rb") as src, self.open(zinfo, "w") as dest:
                 shutil.copyfileobj(src, dest, 1024 * 8)
 
+    def _write_stored(self, filename, zinfo):
+        """Write the file filename as stored member 'zinfo' with a kernel
+        copy. The CRC is computed on the copied data, and then patched into
+        the local header. If the file changes meanwhile, the archive holds
+        the first zinfo.file_size bytes, with the matching CRC."""
+        zip64 = self._allowZip64 and zinfo.file_size > ZIP64_LIMIT
+        zinfo.flag_bits = 0x00
+        zinfo.compress_size = zinfo.file_size
+        zinfo.CRC = 0
+        with open(filename, "rb") as src, self._lock:
+            self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()  # Start of header bytes
+
+            self._writecheck(zinfo)
+            self._didModify = True
+
+            self.fp.write(zinfo.FileHeader(zip64))
+            data_offset = self.fp.tell()
+            size = _copy_range(src, self.fp, 0, zinfo.file_size)
+            zinfo.CRC = _crc32_range(self.fp, data_offset, size)
+            zinfo.file_size = zinfo.compress_size = size
+
+            # Write the header again, now with the CRC and the final size
+            self.start_dir = data_offset + size
+            self.fp.seek(zinfo.header_offset)
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.seek(self.start_dir)
+
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+
     def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
         """Write a file into the archive.  The contents is 'data', which
         may be either a 'str' or a 'bytes' instance; if it is a 'str',
@@ -1945,6 +2343,49 @@ class ZipFile:
             with self.open(zinfo, mode="w") as dest:
                 dest.write(data)
 
+    def writeraw(self, zinfo, data):
+        """Write a member whose data is already compressed.
+
+        'zinfo' must describe the member completely: compress_type, CRC and
+        file_size of the uncompressed data must be set, for example by
+        compress_file(). 'data' is the compressed stream, which is copied
+        into the archive as-is. Because the sizes are known up front, the
+        local header is written once and never revisited.
+        """
+        if not self.fp:
+            raise ValueError("Attempt to write to ZIP archive that was already closed")
+        if self._writing:
+            raise ValueError(
+                "Can't write to ZIP archive while an open writing handle exists."
+            )
+
+        zinfo.compress_size = len(data)
+        zinfo.flag_bits = 0x00
+        if zinfo.compress_type == ZIP_LZMA:
+            # Compressed data includes an end-of-stream (EOS) marker
+            zinfo.flag_bits |= 0x02
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16  # permissions: ?rw-------
+
+        zip64 = self._allowZip64 and (
+            zinfo.file_size > ZIP64_LIMIT or zinfo.compress_size > ZIP64_LIMIT
+        )
+
+        with self._lock:
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+
+            self._writecheck(zinfo)
+            self._didModify = True
+
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(data)
+            self.start_dir = self.fp.tell()
+
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+
     def __del__(self):
         """Call the "close()" method in case the user forgot."""
         self.close()